@@ -4,13 +4,13 @@ Explainer Agent.
 Provides bilingual academic explanations of concepts and terms.
 """
 
+import time
 from typing import Dict, Any
 from utils.llm_client import llm_client
 from utils.validators import validators
-from prompts.explainer_prompts import (
-    EXPLAINER_SYSTEM_PROMPT,
-    EXPLAINER_USER_PROMPT_TEMPLATE
-)
+from utils.field_recovery import field_recovery
+from utils.tracing import traced
+from prompts.registry import prompt_registry
 
 
 class ExplainerAgent:
@@ -20,6 +20,7 @@ class ExplainerAgent:
         """Initialize the explainer agent."""
         self.name = "Explainer"
 
+    @traced("agent.explainer")
     def explain(self, user_input: str) -> Dict[str, Any]:
         """
         Generate a bilingual explanation of a concept.
@@ -39,21 +40,30 @@ class ExplainerAgent:
             Exception: If explanation generation fails
         """
         try:
-            # Format the user prompt
-            user_prompt = EXPLAINER_USER_PROMPT_TEMPLATE.format(
+            # Pick the prompt variant and format the user prompt
+            template = prompt_registry.select("explainer")
+            user_prompt = template.user().format(
                 user_input=user_input
             )
 
             # Call LLM for explanation
+            start_time = time.time()
             result = llm_client.generate_json_completion(
-                system_prompt=EXPLAINER_SYSTEM_PROMPT,
+                system_prompt=template.system_prompt,
                 user_prompt=user_prompt,
                 temperature=0.7,
-                max_tokens=2000
+                agent="explainer"
             )
 
-            # Validate the result
+            # Validate the result; on failure, re-ask only for the invalid fields
             is_valid, error_msg = validators.validate_explanation_result(result)
+            prompt_registry.record(template, time.time() - start_time, is_valid)
+            if not is_valid:
+                result = field_recovery.recover(
+                    "explainer", result, template.system_prompt, user_prompt, temperature=0.7
+                )
+                is_valid, error_msg = validators.validate_explanation_result(result)
+
             if not is_valid:
                 raise ValueError(f"Invalid explanation result: {error_msg}")
 
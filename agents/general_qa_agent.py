@@ -5,13 +5,13 @@ Handles general questions that don't fit into explanation, writing improvement,
 Provides bilingual responses to diverse questions.
 """
 
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
 from utils.llm_client import llm_client
 from utils.validators import validators
-from prompts.general_qa_prompts import (
-    GENERAL_QA_SYSTEM_PROMPT,
-    GENERAL_QA_USER_PROMPT_TEMPLATE
-)
+from utils.field_recovery import field_recovery
+from utils.tracing import traced
+from prompts.registry import prompt_registry
 
 
 class GeneralQAAgent:
@@ -21,13 +21,22 @@ class GeneralQAAgent:
         """Initialize the general Q&A agent."""
         self.name = "General Q&A"
 
-    def answer(self, user_question: str, context: str = None) -> Dict[str, Any]:
+    @traced("agent.general_qa")
+    def answer(
+        self,
+        user_question: str,
+        context: str = None,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
         """
         Generate a bilingual answer to a general question with conversation context.
 
         Args:
             user_question: The question to answer
-            context: Recent conversation context (optional)
+            context: Recent conversation context as text (optional)
+            history: Previous conversation turns as chat messages (optional);
+                sent as real multi-turn history between the system prompt and
+                the question
 
         Returns:
             Dictionary containing:
@@ -41,29 +50,54 @@ class GeneralQAAgent:
             Exception: If answer generation fails
         """
         try:
-            # Format the user prompt with context
+            # Pick the prompt variant and format the user prompt with context
+            template = prompt_registry.select("general_qa")
             if context and context.strip():
-                user_prompt = GENERAL_QA_USER_PROMPT_TEMPLATE.format(
+                user_prompt = template.user("context").format(
                     context=context,
                     user_question=user_question
                 )
+            elif history:
+                # History is sent as real chat turns before the question
+                user_prompt = template.user("history").format(
+                    user_question=user_question
+                )
             else:
                 # No context available - use basic template
-                from prompts.general_qa_prompts import GENERAL_QA_USER_PROMPT_NO_CONTEXT
-                user_prompt = GENERAL_QA_USER_PROMPT_NO_CONTEXT.format(
+                user_prompt = template.user().format(
                     user_question=user_question
                 )
 
             # Call LLM for answer generation
-            result = llm_client.generate_json_completion(
-                system_prompt=GENERAL_QA_SYSTEM_PROMPT,
-                user_prompt=user_prompt,
-                temperature=0.7,
-                max_tokens=1500
-            )
-
-            # Validate the result
+            start_time = time.time()
+            if history:
+                messages = (
+                    [{"role": "system", "content": template.system_prompt}]
+                    + history
+                    + [{"role": "user", "content": user_prompt}]
+                )
+                result = llm_client.generate_json_with_history(
+                    messages,
+                    temperature=0.7,
+                    agent="general_qa"
+                )
+            else:
+                result = llm_client.generate_json_completion(
+                    system_prompt=template.system_prompt,
+                    user_prompt=user_prompt,
+                    temperature=0.7,
+                    agent="general_qa"
+                )
+
+            # Validate the result; on failure, re-ask only for the invalid fields
             is_valid, error_msg = validators.validate_general_qa_result(result)
+            prompt_registry.record(template, time.time() - start_time, is_valid)
+            if not is_valid:
+                result = field_recovery.recover(
+                    "general_qa", result, template.system_prompt, user_prompt, temperature=0.7, history=history
+                )
+                is_valid, error_msg = validators.validate_general_qa_result(result)
+
             if not is_valid:
                 raise ValueError(f"Invalid Q&A result: {error_msg}")
 
@@ -4,7 +4,10 @@ Orchestrator Agent.
 Coordinates all other agents and implements autonomous multi-step behavior.
 """
 
+import re
+from functools import partial
 from typing import Dict, Any, Optional
+from config import config
 from utils.validators import validators
 from agents.task_classifier import task_classifier
 from agents.explainer_agent import explainer_agent
@@ -12,7 +15,62 @@ from agents.writer_agent import writer_agent
 from agents.quiz_agent import quiz_agent
 from agents.feedback_agent import feedback_agent
 from agents.general_qa_agent import general_qa_agent
-from utils.message_history import message_history
+from agents.small_talk_agent import small_talk_agent
+from utils.conversation_context import conversation_context
+from utils.intent_matcher import intent_matcher
+from utils.tracing import tracer
+from utils.request_context import RequestContext
+from utils.token_estimator import token_estimator
+from utils.llm_client import llm_client
+from utils.response_cache import response_cache
+from utils.prefetcher import prefetcher
+from utils.arabic_utils import ArabicUtils
+from utils.metrics import (
+    requests_total, request_errors_total, request_seconds, degraded_responses_total, small_talk_responses_total
+)
+
+
+# "what is X" / "how does X" style topics are kept as-is
+QUESTION_FORMAT_PATTERN = re.compile(r'(?:what is|what are|how does|how do|why is|why are|explain) \w+')
+
+# Punctuation stripped from extracted quiz topics
+TOPIC_PUNCTUATION = str.maketrans("", "", "?!,")
+
+# Session state kept in the session store between visits (plus the
+# conversation memory); all JSON-serializable
+PERSISTED_STATE_KEYS = (
+    "quiz_data",
+    "quiz_history",
+    "interaction_count",
+    "last_topic",
+    "last_question",
+    "last_explanation",
+    "last_writing",
+    "last_qa",
+    "small_talk_turns"
+)
+
+# Bilingual replies in degraded mode when nothing suitable is cached
+DEGRADED_MESSAGES = {
+    "explanation": {
+        "message_en": "I can't reach my explanation service right now and have no saved explanation "
+                      "of this topic yet. Please try again in a minute.",
+        "message_ar": "لا أستطيع الوصول إلى خدمة الشرح حاليًا، ولا يوجد لدي شرح محفوظ لهذا الموضوع بعد. "
+                      "يرجى المحاولة مرة أخرى بعد دقيقة."
+    },
+    "quiz_generation": {
+        "message_en": "I can't create a new quiz right now. Please try again in a minute.",
+        "message_ar": "لا أستطيع إنشاء اختبار جديد الآن. يرجى المحاولة مرة أخرى بعد دقيقة."
+    },
+    "writing_improvement": {
+        "message_en": "I can't review your writing right now. Please keep your text and try again in a minute.",
+        "message_ar": "لا أستطيع مراجعة كتابتك الآن. يرجى الاحتفاظ بنصك والمحاولة مرة أخرى بعد دقيقة."
+    },
+    "general_question": {
+        "message_en": "I'm having trouble answering right now. Please try again in a minute.",
+        "message_ar": "أواجه صعوبة في الإجابة الآن. يرجى المحاولة مرة أخرى بعد دقيقة."
+    }
+}
 
 
 class OrchestratorAgent:
@@ -21,12 +79,12 @@ class OrchestratorAgent:
     def __init__(self):
         """Initialize the orchestrator."""
         self.name = "BABA Orchestrator"
-        self.current_state = {}
 
     def process_user_input(
         self,
         user_input: str,
-        session_state: Optional[Dict[str, Any]] = None
+        session_state: Optional[Dict[str, Any]] = None,
+        context: Optional[RequestContext] = None
     ) -> Dict[str, Any]:
         """
         Process user input through the autonomous agent pipeline.
@@ -37,9 +95,16 @@ class OrchestratorAgent:
         3. Generating follow-up actions autonomously
         4. Providing learning path suggestions
 
+        The orchestrator keeps no per-request state of its own: everything
+        specific to the request travels in its RequestContext, so one
+        instance can serve many sessions concurrently.
+
         Args:
             user_input: The user's input text
-            session_state: Optional session state for context
+            session_state: Optional session state for context (ignored when
+                a context is given)
+            context: Optional request context carrying the session,
+                deadline, progress callback and cancel flag
 
         Returns:
             Dictionary with complete processing results including:
@@ -48,23 +113,93 @@ class OrchestratorAgent:
                 - autonomous_actions: List of autonomous follow-up actions taken
                 - suggested_next_steps: Learning path suggestions
                 - error: Error message if any
+                - degraded: True if cached or canned content was served
+                  because the LLM service is failing
+                - trace: Step timings and token usage (see Trace.summary)
         """
         result = {
             "classification": None,
             "main_result": None,
             "autonomous_actions": [],
             "suggested_next_steps": None,
-            "error": None
+            "error": None,
+            "degraded": False,
+            "trace": None
         }
 
+        if context is None:
+            context = RequestContext(session_state=session_state)
+        if context.priority is None:
+            # Short messages ("yes", greetings) should not queue behind long essays
+            is_short = token_estimator.estimate(user_input or "") <= config.INTERACTIVE_MAX_INPUT_TOKENS
+            context.priority = "interactive" if is_short else "standard"
+
+        with context.activate(), tracer.start_trace("process_user_input", **{
+            "input.chars": len(user_input or ""),
+            "session.id": context.session_id
+        }) as trace:
+            context.trace = trace
+            context.history = conversation_context.get_memory(context.session_state)
+            self._run_pipeline(user_input, context, result)
+
+            root = tracer.current_span()
+            root.set_attribute("task_type", (result["classification"] or {}).get("task_type"))
+            if result["error"]:
+                root.set_error(result["error"])
+
+        result["trace"] = trace.summary()
+
+        task_type = (result["classification"] or {}).get("task_type", "none")
+        requests_total.inc(task_type=task_type)
+        request_seconds.observe(result["trace"]["duration_ms"] / 1000, task_type=task_type)
+        if result["error"]:
+            request_errors_total.inc(task_type=task_type)
+
+        context.report("done", error=result["error"])
+        return result
+
+    def _run_pipeline(
+        self,
+        user_input: str,
+        context: RequestContext,
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Run validation, classification and routing, filling in the result.
+
+        Args:
+            user_input: The user's input text
+            context: The request context
+            result: The processing result being built
+        """
         try:
             # Step 1: Validate input
-            is_valid, error_msg = validators.validate_user_input(user_input)
+            with tracer.span("validate_input"):
+                is_valid, error_msg = validators.validate_user_input(user_input)
             if not is_valid:
                 result["error"] = error_msg
-                return result
+                return
+
+            # Greetings, thanks and farewells are answered locally, skipping
+            # classification and the LLM
+            intent = small_talk_agent.match(user_input) if config.SMALL_TALK_FAST_PATH else None
+            if intent:
+                result.update(self._handle_small_talk_flow(user_input, intent, context))
+                self._record_turns(user_input, context, result)
+                return
+
+            # A follow-up suggestion answered ahead of time needs no
+            # classification either
+            prefetched = prefetcher.lookup("general_qa", context.session_id, user_input) if config.PREFETCH_DEPTH else None
+            if prefetched is not None:
+                result.update(self._handle_prefetched_flow(user_input, prefetched, context))
+                self._record_turns(user_input, context, result)
+                self._prefetch_follow_ups(context, result)
+                return
 
             # Step 2: Classify the task (Autonomous Decision Point 1)
+            context.check()
+            context.report("classifying")
             classification = task_classifier.classify(user_input)
             result["classification"] = classification
             result["autonomous_actions"].append({
@@ -75,42 +210,154 @@ class OrchestratorAgent:
 
             # Step 3: Route to appropriate agent based on classification
             task_type = classification["task_type"]
+            context.check()
+            context.report("classified", task_type=task_type)
+
+            if llm_client.breaker.is_open():
+                # Degraded mode: the LLM service is failing, serve cached or canned content
+                result.update(self._handle_degraded_flow(user_input, task_type, context))
 
-            if task_type == "explanation":
+            elif task_type == "explanation":
                 # Handle explanation flow
-                result.update(self._handle_explanation_flow(user_input, session_state))
+                result.update(self._handle_explanation_flow(user_input, context))
 
             elif task_type == "writing_improvement":
                 # Handle writing improvement flow
-                result.update(self._handle_writing_flow(user_input, session_state))
+                result.update(self._handle_writing_flow(user_input, context))
 
             elif task_type == "quiz_generation":
                 # Handle quiz generation flow
-                result.update(self._handle_quiz_generation_flow(user_input, session_state))
+                result.update(self._handle_quiz_generation_flow(user_input, context))
 
             elif task_type == "general_question":
                 # Handle general Q&A flow
-                result.update(self._handle_general_qa_flow(user_input, session_state))
+                result.update(self._handle_general_qa_flow(user_input, context))
 
             else:
                 result["error"] = f"Unknown task type: {task_type}"
 
+            if result.get("error") and llm_client.breaker.is_open() and not context.stop_reason():
+                # The service failed during this request; stale content beats an error
+                result["error"] = None
+                result.update(self._handle_degraded_flow(user_input, task_type, context))
+
+            self._record_turns(user_input, context, result)
+            self._prefetch_follow_ups(context, result)
+
         except Exception as e:
             result["error"] = f"Processing error: {str(e)}"
 
-        return result
+        # Agents wrap failures in their own messages; report a stop as such
+        if result["error"] and context.stop_reason():
+            result["error"] = context.stop_reason()
+
+    def _record_turns(
+        self,
+        user_input: str,
+        context: RequestContext,
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Keep a successful exchange in the session's conversation history.
+
+        Args:
+            user_input: The user's input text
+            context: The request context
+            result: The processing result
+        """
+        if result.get("error"):
+            return
+        with tracer.span("record_turns"):
+            conversation_context.add_turn(context.history, "user", user_input)
+            conversation_context.add_turn(context.history, "assistant", self._describe_result(result["main_result"]))
+
+    def _prefetch_follow_ups(
+        self,
+        context: RequestContext,
+        result: Dict[str, Any]
+    ) -> None:
+        """
+        Answer the follow-up suggestions of a General Q&A answer in the background.
+
+        Up to Config.PREFETCH_DEPTH suggestions are answered at "prefetch"
+        priority with the history as it is after this exchange, so asking
+        one of them next is instant.
+
+        Args:
+            context: The request context
+            result: The processing result
+        """
+        if not config.PREFETCH_DEPTH or result.get("error") or result.get("degraded") or llm_client.breaker.is_open():
+            return
+
+        main_result = result.get("main_result") or {}
+        if main_result.get("type") != "general_qa":
+            return
+
+        suggestions = [
+            suggestion for suggestion in main_result["data"].get("follow_up_suggestions", [])
+            if isinstance(suggestion, str) and suggestion.strip()
+        ][:config.PREFETCH_DEPTH]
+
+        items = [
+            (suggestion, partial(
+                general_qa_agent.answer,
+                suggestion,
+                history=conversation_context.build_messages(context.history, suggestion)
+            ))
+            for suggestion in suggestions
+        ]
+
+        queued = prefetcher.schedule("general_qa", context.session_id, items)
+        if queued:
+            result["autonomous_actions"].append({
+                "agent": "Orchestrator",
+                "action": "Prefetched follow-up answers",
+                "decision": f"Answering {queued} suggested follow-up question(s) in the background"
+            })
+
+    def _describe_result(self, main_result: Optional[Dict[str, Any]]) -> str:
+        """
+        Summarize an agent result as the assistant turn of the conversation.
+
+        Args:
+            main_result: The "main_result" entry of a processing result
+
+        Returns:
+            Plain-text assistant message (English)
+        """
+        if not main_result:
+            return ""
+
+        data = main_result.get("data", {})
+        result_type = main_result.get("type")
+
+        if result_type == "explanation":
+            return data.get("english_explanation", "")
+
+        if result_type == "writing_improvement":
+            return f"Improved the student's text: {data.get('improved_text', '')}"
+
+        if result_type == "general_qa":
+            return data.get("english_answer", "")
+
+        if result_type == "quiz":
+            questions = "; ".join(q.get("question_en", "") for q in data.get("questions", []))
+            return f"Gave a quiz with these questions: {questions}"
+
+        return data.get("message_en", "")
 
     def _handle_explanation_flow(
         self,
         user_input: str,
-        session_state: Optional[Dict[str, Any]]
+        context: RequestContext
     ) -> Dict[str, Any]:
         """
         Handle the explanation workflow with autonomous actions.
 
         Args:
             user_input: The concept to explain
-            session_state: Session state
+            context: The request context
 
         Returns:
             Dictionary with explanation results and autonomous actions
@@ -123,6 +370,7 @@ class OrchestratorAgent:
 
         try:
             # Get explanation from explainer agent
+            context.report("explaining")
             explanation = explainer_agent.explain(user_input)
             result["main_result"] = {
                 "type": "explanation",
@@ -135,9 +383,9 @@ class OrchestratorAgent:
             })
 
             # Store explanation content in session for potential quiz generation
-            if session_state is not None:
-                session_state["last_explanation"] = explanation
-                session_state["last_topic"] = user_input
+            context.session_state["last_explanation"] = explanation
+            context.session_state["last_topic"] = user_input
+            response_cache.put("explanation", user_input, explanation)
 
             # Autonomous Decision Point 2: Suggest quiz (don't auto-generate)
             # Add a prompt asking if user wants a quiz
@@ -162,14 +410,14 @@ class OrchestratorAgent:
     def _handle_writing_flow(
         self,
         user_input: str,
-        session_state: Optional[Dict[str, Any]]
+        context: RequestContext
     ) -> Dict[str, Any]:
         """
         Handle the writing improvement workflow with autonomous actions.
 
         Args:
             user_input: The text to improve
-            session_state: Session state
+            context: The request context
 
         Returns:
             Dictionary with writing results and autonomous actions
@@ -182,6 +430,7 @@ class OrchestratorAgent:
 
         try:
             # Get improved writing from writer agent
+            context.report("improving_writing")
             improved = writer_agent.improve(user_input)
             result["main_result"] = {
                 "type": "writing_improvement",
@@ -194,9 +443,9 @@ class OrchestratorAgent:
             })
 
             # Store writing content in session for potential quiz generation
-            if session_state is not None:
-                session_state["last_writing"] = improved
-                session_state["last_topic"] = "writing improvement"
+            context.session_state["last_writing"] = improved
+            context.session_state["last_topic"] = "writing improvement"
+            response_cache.put("writing", user_input, improved)
 
             # Autonomous Decision Point 2: Analyze feedback
             result["autonomous_actions"].append({
@@ -222,14 +471,14 @@ class OrchestratorAgent:
     def _handle_quiz_generation_flow(
         self,
         user_input: str,
-        session_state: Optional[Dict[str, Any]]
+        context: RequestContext
     ) -> Dict[str, Any]:
         """
         Handle quiz generation when user explicitly requests it.
 
         Args:
             user_input: The user's quiz request
-            session_state: Session state with context
+            context: The request context with the session's previous results
 
         Returns:
             Dictionary with quiz results
@@ -240,27 +489,28 @@ class OrchestratorAgent:
             "suggested_next_steps": None
         }
 
+        session_state = context.session_state
+
         try:
             # Check if user is just affirming (yes, ok, sure) - use previous context
             # Also include standalone words like "quiz", "test", "exam" as affirmative
-            affirmative_responses = ["yes", "yeah", "ok", "sure", "y", "quiz", "test", "exam",
-                                    "نعم", "أجل", "موافق", "اختبار", "امتحان"]
-            is_simple_affirmation = user_input.lower().strip() in affirmative_responses
+            is_simple_affirmation = intent_matcher.matches_exactly(
+                user_input, ["affirmation", "quiz_keyword"]
+            )
 
             # Check if user is explicitly specifying a quiz topic (not just affirming)
-            quiz_topic_keywords = ["quiz on", "quiz about", "test on", "test about",
-                                  "generate quiz", "create quiz", "make quiz",
-                                  "اختبار عن", "اختبار حول"]
-            has_explicit_topic = any(keyword in user_input.lower() for keyword in quiz_topic_keywords)
+            has_explicit_topic = "quiz_topic" in intent_matcher.intents(user_input)
 
             if is_simple_affirmation and not has_explicit_topic:
                 # User is responding to a quiz suggestion - use previous context
-                if session_state and "last_explanation" in session_state:
+                if "last_explanation" in session_state:
                     # Generate quiz based on previous explanation
                     explanation = session_state["last_explanation"]
                     quiz_content = f"{explanation.get('english_explanation', '')}\n\n{explanation.get('gulf_example', '')}"
 
+                    context.report("generating_quiz")
                     quiz = quiz_agent.generate(quiz_content)
+                    response_cache.put("quiz", session_state.get("last_topic", ""), quiz)
                     result["main_result"] = {
                         "type": "quiz",
                         "data": quiz
@@ -271,11 +521,12 @@ class OrchestratorAgent:
                         "decision": "Created bilingual quiz based on previous explanation"
                     })
 
-                elif session_state and "last_writing" in session_state and not has_explicit_topic:
+                elif "last_writing" in session_state and not has_explicit_topic:
                     # Generate quiz on writing skills (only if no explicit topic specified)
                     writing = session_state["last_writing"]
                     quiz_content = f"Writing skills quiz based on: {writing.get('improved_text', '')}"
 
+                    context.report("generating_quiz")
                     quiz = quiz_agent.generate(quiz_content)
                     result["main_result"] = {
                         "type": "quiz",
@@ -303,16 +554,20 @@ class OrchestratorAgent:
                 topic = self._extract_quiz_topic(user_input)
 
                 # First get explanation of the topic (always generate fresh content)
+                context.report("explaining")
                 explanation = explainer_agent.explain(topic)
 
                 # Store for potential future reference
-                if session_state is not None:
-                    session_state["last_explanation"] = explanation
-                    session_state["last_topic"] = topic
+                session_state["last_explanation"] = explanation
+                session_state["last_topic"] = topic
+                response_cache.put("explanation", topic, explanation)
 
                 # Generate quiz based on the NEW explanation
+                context.check()
                 quiz_content = f"{explanation.get('english_explanation', '')}\n\n{explanation.get('gulf_example', '')}"
+                context.report("generating_quiz")
                 quiz = quiz_agent.generate(quiz_content)
+                response_cache.put("quiz", topic, quiz)
 
                 result["main_result"] = {
                     "type": "quiz",
@@ -337,14 +592,14 @@ class OrchestratorAgent:
     def _handle_general_qa_flow(
         self,
         user_input: str,
-        session_state: Optional[Dict[str, Any]]
+        context: RequestContext
     ) -> Dict[str, Any]:
         """
         Handle general Q&A when user asks general questions.
 
         Args:
             user_input: The user's question
-            session_state: Session state
+            context: The request context
 
         Returns:
             Dictionary with general Q&A results
@@ -356,30 +611,23 @@ class OrchestratorAgent:
         }
 
         try:
-            # Get recent message history for context
-            recent_messages = message_history.get_recent_messages()
-
-            # Build context string from recent messages
-            context = None
-            if recent_messages and len(recent_messages) > 0:
-                # Exclude the current message (last one) and get previous messages
-                previous_messages = recent_messages[:-1] if len(recent_messages) > 1 else []
-
-                if previous_messages:
-                    context = "Previous user messages:\n"
-                    for i, msg in enumerate(previous_messages[-4:], 1):  # Use last 4 messages for context
-                        # Truncate long messages
-                        truncated = msg[:150] + "..." if len(msg) > 150 else msg
-                        context += f"{i}. {truncated}\n"
+            # Select relevant conversation history within the token budget
+            memory = context.history
+            history = conversation_context.build_messages(memory, user_input)
 
-                    result["autonomous_actions"].append({
-                        "agent": "Orchestrator",
-                        "action": "Gathered conversation context",
-                        "decision": f"Using {len(previous_messages)} previous messages for context-aware response"
-                    })
+            if history:
+                turn_count = sum(1 for message in history if message["role"] != "system")
+                summary_note = " plus rolling summary" if memory.summary else ""
+                result["autonomous_actions"].append({
+                    "agent": "Orchestrator",
+                    "action": "Gathered conversation context",
+                    "decision": f"Using {turn_count} relevant previous turns{summary_note} "
+                                f"within a {conversation_context.token_budget}-token budget"
+                })
 
             # Get answer from general Q&A agent with context
-            qa_response = general_qa_agent.answer(user_input, context=context)
+            context.report("answering")
+            qa_response = general_qa_agent.answer(user_input, history=history)
             result["main_result"] = {
                 "type": "general_qa",
                 "data": qa_response
@@ -391,15 +639,165 @@ class OrchestratorAgent:
             })
 
             # Store in session for potential context
-            if session_state is not None:
-                session_state["last_qa"] = qa_response
-                session_state["last_question"] = user_input
+            context.session_state["last_qa"] = qa_response
+            context.session_state["last_question"] = user_input
+            response_cache.put("general_qa", user_input, qa_response)
 
         except Exception as e:
             result["error"] = f"General Q&A flow error: {str(e)}"
 
         return result
 
+    def _handle_small_talk_flow(
+        self,
+        user_input: str,
+        intent: str,
+        context: RequestContext
+    ) -> Dict[str, Any]:
+        """
+        Answer a greeting, thanks or farewell from templates.
+
+        The result has the same shape as a General Q&A result, so the
+        UI and API display it like any other answer.
+
+        Args:
+            user_input: The user's message
+            intent: Small-talk intent returned by small_talk_agent.match()
+            context: The request context
+
+        Returns:
+            Dictionary with classification and the templated answer
+        """
+        with tracer.span("agent.small_talk", intent=intent):
+            reply = small_talk_agent.reply(intent, context.session_state)
+
+        context.report("classified", task_type="general_question")
+        small_talk_responses_total.inc(intent=intent)
+
+        return {
+            "classification": {
+                "task_type": "general_question",
+                "confidence": 1.0,
+                "detected_language": ArabicUtils.detect_language(user_input),
+                "reasoning": f"Recognized small talk ({intent}) locally"
+            },
+            "main_result": {
+                "type": "general_qa",
+                "data": reply
+            },
+            "autonomous_actions": [{
+                "agent": "Small Talk",
+                "action": "Answered small talk locally",
+                "decision": f"Recognized {intent}; replied from templates without an LLM call"
+            }],
+            "suggested_next_steps": None
+        }
+
+    def _handle_prefetched_flow(
+        self,
+        user_input: str,
+        qa_response: Dict[str, Any],
+        context: RequestContext
+    ) -> Dict[str, Any]:
+        """
+        Answer a follow-up suggestion with its prefetched answer.
+
+        Args:
+            user_input: The user's question (one of the suggestions)
+            qa_response: The prefetched General Q&A result
+            context: The request context
+
+        Returns:
+            Dictionary with classification and the General Q&A result
+        """
+        context.report("classified", task_type="general_question")
+
+        context.session_state["last_qa"] = qa_response
+        context.session_state["last_question"] = user_input
+
+        return {
+            "classification": {
+                "task_type": "general_question",
+                "confidence": 1.0,
+                "detected_language": ArabicUtils.detect_language(user_input),
+                "reasoning": "Matched a follow-up suggestion answered in advance"
+            },
+            "main_result": {
+                "type": "general_qa",
+                "data": qa_response
+            },
+            "autonomous_actions": [{
+                "agent": "General Q&A",
+                "action": "Served prefetched answer",
+                "decision": "Used the answer prepared in the background for this suggested follow-up"
+            }],
+            "suggested_next_steps": None
+        }
+
+    def _handle_degraded_flow(
+        self,
+        user_input: str,
+        task_type: str,
+        context: RequestContext
+    ) -> Dict[str, Any]:
+        """
+        Answer without the LLM while the circuit breaker is open.
+
+        Serves a cached explanation, quiz, writing review or answer for
+        the same input (stale entries included), otherwise a canned
+        bilingual message.
+
+        Args:
+            user_input: The user's input
+            task_type: The (locally) classified task type
+            context: The request context
+
+        Returns:
+            Dictionary with the degraded result
+        """
+        session_state = context.session_state
+
+        if task_type == "quiz_generation":
+            is_simple_affirmation = intent_matcher.matches_exactly(user_input, ["affirmation", "quiz_keyword"])
+            if is_simple_affirmation and "quiz_topic" not in intent_matcher.intents(user_input):
+                key = session_state.get("last_topic", "")
+            else:
+                key = self._extract_quiz_topic(user_input)
+            kind, result_type = "quiz", "quiz"
+        else:
+            key = user_input
+            kind, result_type = {
+                "explanation": ("explanation", "explanation"),
+                "writing_improvement": ("writing", "writing_improvement"),
+                "general_question": ("general_qa", "general_qa")
+            }.get(task_type, ("general_qa", "general_qa"))
+
+        cached = response_cache.get(kind, key, allow_stale=True)
+
+        if cached is not None:
+            main_result = {"type": result_type, "data": cached.value}
+            decision = f"LLM service unavailable; served a saved {kind.replace('_', ' ')} from {int(cached.age() // 60)} min ago"
+            degraded_responses_total.inc(source="cache")
+
+            if result_type == "explanation":
+                session_state["last_explanation"] = cached.value
+                session_state["last_topic"] = user_input
+        else:
+            main_result = {"type": "message", "data": DEGRADED_MESSAGES.get(task_type, DEGRADED_MESSAGES["general_question"])}
+            decision = "LLM service unavailable and nothing saved for this input; replied with a notice"
+            degraded_responses_total.inc(source="canned")
+
+        return {
+            "main_result": main_result,
+            "autonomous_actions": [{
+                "agent": "Orchestrator",
+                "action": "Switched to degraded mode",
+                "decision": decision
+            }],
+            "suggested_next_steps": None,
+            "degraded": True
+        }
+
     def _extract_quiz_topic(self, user_input: str) -> str:
         """
         Extract the quiz topic from user input.
@@ -410,71 +808,25 @@ class OrchestratorAgent:
         Returns:
             The extracted topic
         """
-        import re
-
-        # Remove common quiz keywords to extract the topic (order matters - longer phrases first)
-        quiz_keywords = [
-            "generate a quiz on the topic",
-            "generate quiz on the topic",
-            "create a quiz on the topic",
-            "create quiz on the topic",
-            "make a quiz on the topic",
-            "make quiz on the topic",
-            "quiz on the topic",
-            "test on the topic",
-            "generate a quiz on",
-            "generate quiz on",
-            "create a quiz on",
-            "create quiz on",
-            "make a quiz on",
-            "make quiz on",
-            "quiz on",
-            "quiz about",
-            "test on",
-            "test about",
-            "generate quiz",
-            "create quiz",
-            "make quiz",
-            "اختبار عن",
-            "اختبار حول",
-        ]
-
-        topic = user_input.lower()
+        # One scan finds both the quiz command phrases and the filler words
+        matches = intent_matcher.scan(user_input)
+        command_matches = [m for m in matches if "quiz_topic" in m.intents]
 
-        # Remove quiz keywords (longest first to avoid partial matches)
-        for keyword in quiz_keywords:
-            topic = topic.replace(keyword, " ")
-
-        # Clean up whitespace first
-        topic = " ".join(topic.split()).strip()
+        # Remove quiz keywords (the matcher prefers the longest phrase)
+        topic = " ".join(intent_matcher.remove_spans(user_input, command_matches).lower().split())
 
         # Check if it's a "what is X" or "how does X" type question
         # If so, preserve it as-is for better context
-        question_patterns = [
-            r'what is \w+',
-            r'what are \w+',
-            r'how does \w+',
-            r'how do \w+',
-            r'why is \w+',
-            r'why are \w+',
-            r'explain \w+'
-        ]
-
-        is_question_format = any(re.search(pattern, topic) for pattern in question_patterns)
+        is_question_format = bool(QUESTION_FORMAT_PATTERN.search(topic))
 
         if not is_question_format:
             # Only remove common words if it's NOT a question format
             # This preserves question context like "what is langgraph"
-            words_to_remove = ["generate", "create", "make", "quiz", "test", "exam", "the", "a", "an"]
-            for word in words_to_remove:
-                # Use regex to match whole words only
-                topic = re.sub(r'\b' + re.escape(word) + r'\b', '', topic)
-
-        # Remove punctuation
-        topic = topic.replace("?", "").replace("!", "").replace(",", "")
+            removed = [m for m in matches if "quiz_topic" in m.intents or "topic_stopword" in m.intents]
+            topic = intent_matcher.remove_spans(user_input, removed).lower()
 
-        # Clean up whitespace again
-        topic = " ".join(topic.split()).strip()
+        # Remove punctuation and clean up whitespace
+        topic = " ".join(topic.translate(TOPIC_PUNCTUATION).split()).strip()
 
         # If topic is still empty or too short, use original input
         if len(topic) < 3:
@@ -541,6 +893,40 @@ class OrchestratorAgent:
 
         return analysis
 
+    def export_session_state(self, session_state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the parts of a session's state worth storing between visits.
+
+        Args:
+            session_state: The session's state
+
+        Returns:
+            JSON-serializable values by key (see utils.session_store), with
+            the conversation memory trimmed to its recent turns
+        """
+        values = {key: session_state[key] for key in PERSISTED_STATE_KEYS if key in session_state}
+        memory = session_state.get(conversation_context.SESSION_KEY)
+        if memory is not None:
+            values[conversation_context.SESSION_KEY] = conversation_context.export_memory(memory)
+        return values
+
+    def restore_session_state(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rebuild a session's state from export_session_state() values.
+
+        Args:
+            values: Stored values by key
+
+        Returns:
+            Session state for process_user_input
+        """
+        session_state = {key: value for key, value in values.items() if key in PERSISTED_STATE_KEYS}
+        if conversation_context.SESSION_KEY in values:
+            session_state[conversation_context.SESSION_KEY] = conversation_context.import_memory(
+                values[conversation_context.SESSION_KEY]
+            )
+        return session_state
+
 
 # Global instance
 orchestrator = OrchestratorAgent()
@@ -4,13 +4,13 @@ Quiz Agent.
 Generates bilingual comprehension quizzes.
 """
 
+import time
 from typing import Dict, Any
 from utils.llm_client import llm_client
 from utils.validators import validators
-from prompts.quiz_prompts import (
-    QUIZ_SYSTEM_PROMPT,
-    QUIZ_USER_PROMPT_TEMPLATE
-)
+from utils.field_recovery import field_recovery
+from utils.tracing import traced
+from prompts.registry import prompt_registry
 
 
 class QuizAgent:
@@ -20,6 +20,7 @@ class QuizAgent:
         """Initialize the quiz agent."""
         self.name = "Quiz Generator"
 
+    @traced("agent.quiz")
     def generate(self, explanation_content: str) -> Dict[str, Any]:
         """
         Generate a bilingual quiz based on an explanation.
@@ -41,21 +42,30 @@ class QuizAgent:
             Exception: If quiz generation fails
         """
         try:
-            # Format the user prompt
-            user_prompt = QUIZ_USER_PROMPT_TEMPLATE.format(
+            # Pick the prompt variant and format the user prompt
+            template = prompt_registry.select("quiz")
+            user_prompt = template.user().format(
                 explanation_content=explanation_content
             )
 
             # Call LLM for quiz generation
+            start_time = time.time()
             result = llm_client.generate_json_completion(
-                system_prompt=QUIZ_SYSTEM_PROMPT,
+                system_prompt=template.system_prompt,
                 user_prompt=user_prompt,
                 temperature=0.7,
-                max_tokens=1500
+                agent="quiz"
             )
 
-            # Validate the result
+            # Validate the result; on failure, re-ask only for the invalid fields
             is_valid, error_msg = validators.validate_quiz_result(result)
+            prompt_registry.record(template, time.time() - start_time, is_valid)
+            if not is_valid:
+                result = field_recovery.recover(
+                    "quiz", result, template.system_prompt, user_prompt, temperature=0.7
+                )
+                is_valid, error_msg = validators.validate_quiz_result(result)
+
             if not is_valid:
                 raise ValueError(f"Invalid quiz result: {error_msg}")
 
@@ -0,0 +1,168 @@
+"""
+Small Talk Agent.
+
+Answers greetings, thanks and farewells from a bilingual template catalog
+without calling the LLM. Messages only take this path when they consist
+of nothing but small-talk phrases; anything else goes through the normal
+classification pipeline.
+"""
+
+import re
+from typing import Dict, Any, List, MutableMapping, Optional
+from utils.intent_matcher import intent_matcher
+from utils.arabic_utils import ArabicUtils
+
+
+# Small-talk intents, in the order they win when a message has several
+# ("thanks, bye!" is a farewell)
+SMALL_TALK_INTENTS = ("farewell", "thanks", "wellbeing", "greeting")
+
+# Longer messages are never treated as small talk
+MAX_WORDS = 8
+
+# Words that may accompany small-talk phrases ("hi there", "thanks so much")
+FILLER_WORDS = {
+    "there", "again", "all", "everyone", "so", "much", "very", "a", "lot", "you", "too",
+    "and", "ok", "okay", "great", "cool", "nice", "perfect", "baba", "dear", "for", "now",
+    "يا", "جزيلا", "لك", "لكم", "بابا", "و"
+}
+
+# Separators between the remaining words of a message
+WORD_SPLIT_PATTERN = re.compile(r"[\s.,!?؟،؛:;\"'()]+")
+
+# Bilingual replies per intent; consecutive messages of the same intent
+# rotate through the variants
+TEMPLATES = {
+    "greeting": [
+        ("Hello! I'm BABA, your bilingual study partner. Ask me to explain a concept, "
+         "improve your writing or quiz you on a topic.",
+         "مرحبًا! أنا بابا، شريكك في الدراسة بلغتين. اطلب مني شرح مفهوم أو تحسين كتابتك أو اختبارك في موضوع ما."),
+        ("Hi there! What would you like to learn today?",
+         "أهلًا بك! ماذا تريد أن تتعلم اليوم؟"),
+        ("Welcome! Send me a concept, a paragraph to improve, or ask for a quiz.",
+         "أهلًا وسهلًا! أرسل لي مفهومًا أو فقرة لتحسينها أو اطلب اختبارًا."),
+    ],
+    "wellbeing": [
+        ("I'm doing well, thank you for asking! How can I help with your studies?",
+         "أنا بخير، شكرًا لسؤالك! كيف يمكنني مساعدتك في دراستك؟"),
+        ("All good here and ready to help. What are you working on?",
+         "كل شيء على ما يرام وأنا مستعد للمساعدة. على ماذا تعمل الآن؟"),
+    ],
+    "thanks": [
+        ("You're welcome! Happy to help.",
+         "على الرحب والسعة! يسعدني أن أساعدك."),
+        ("Glad it helped! Let me know if you have another question.",
+         "سعيد أن ذلك ساعدك! أخبرني إذا كان لديك سؤال آخر."),
+        ("Any time! Keep up the good work.",
+         "في أي وقت! واصل العمل الجيد."),
+    ],
+    "farewell": [
+        ("Goodbye, and good luck with your studies!",
+         "مع السلامة، وبالتوفيق في دراستك!"),
+        ("See you next time! Keep practicing.",
+         "أراك في المرة القادمة! واصل التدريب."),
+    ],
+}
+
+# Follow-up suggestions per intent
+SUGGESTIONS = {
+    "greeting": ["What is critical thinking?", "Quiz me on academic writing"],
+    "wellbeing": ["What is critical thinking?", "Help me improve a paragraph"],
+    "thanks": ["Explain another concept", "Quiz me on what we covered"],
+    "farewell": [],
+}
+
+
+class SmallTalkAgent:
+    """Agent answering greetings, thanks and farewells from templates."""
+
+    def __init__(self):
+        """Initialize the small talk agent."""
+        self.name = "Small Talk"
+
+    def match(self, user_input: str) -> Optional[str]:
+        """
+        Check whether a message is pure small talk.
+
+        A message matches when it contains a small-talk phrase and every
+        other word is a filler ("hi there!", "thanks so much", "شكرا جزيلا").
+        Questions or requests alongside a greeting do not match.
+
+        Args:
+            user_input: The user's input text
+
+        Returns:
+            The winning intent ("farewell", "thanks", "wellbeing" or
+            "greeting"), or None if the message is not pure small talk
+        """
+        if not user_input or len(user_input.split()) > MAX_WORDS:
+            return None
+
+        matches = [
+            match for match in intent_matcher.scan(user_input)
+            if match.intents.intersection(SMALL_TALK_INTENTS)
+        ]
+        if not matches:
+            return None
+
+        remaining = ArabicUtils.normalize(intent_matcher.remove_spans(user_input, matches))
+        if any(word not in FILLER_WORDS for word in WORD_SPLIT_PATTERN.split(remaining) if word):
+            return None
+
+        intents = set()
+        for match in matches:
+            intents |= match.intents
+        return next(intent for intent in SMALL_TALK_INTENTS if intent in intents)
+
+    def reply(self, intent: str, session_state: MutableMapping[str, Any]) -> Dict[str, Any]:
+        """
+        Build the reply to a small-talk message.
+
+        Args:
+            intent: Intent returned by match()
+            session_state: The session's state; used for personalization
+                and to rotate variants between messages
+
+        Returns:
+            Dictionary in the General Q&A result format:
+                - english_answer: Reply in English
+                - arabic_answer: Reply in Arabic
+                - category: "conversational"
+                - confidence: 1.0
+                - follow_up_suggestions: List of suggested next messages
+        """
+        turns = session_state.setdefault("small_talk_turns", {})
+        count = turns.get(intent, 0)
+        turns[intent] = count + 1
+
+        english, arabic = TEMPLATES[intent][count % len(TEMPLATES[intent])]
+        suggestions: List[str] = list(SUGGESTIONS[intent])
+
+        # Personalize from what the session has covered so far
+        last_topic = session_state.get("last_topic")
+        quiz_history = session_state.get("quiz_history", [])
+
+        if intent in ("greeting", "wellbeing") and last_topic:
+            english += f" Last time we looked at \"{last_topic}\"; want to continue?"
+            arabic += f" في المرة السابقة تناولنا \"{last_topic}\"؛ هل تريد المتابعة؟"
+            suggestions = [f"Quiz me on {last_topic}"] + suggestions[1:]
+
+        elif intent == "thanks" and last_topic:
+            suggestions = [f"Quiz me on {last_topic}"] + suggestions[:1]
+
+        elif intent == "farewell" and quiz_history:
+            correct = sum(1 for answer in quiz_history if answer.get("is_correct", False))
+            english += f" You answered {correct} of {len(quiz_history)} quiz questions correctly this session."
+            arabic += f" أجبت عن {correct} من {len(quiz_history)} أسئلة الاختبار بشكل صحيح في هذه الجلسة."
+
+        return {
+            "english_answer": english,
+            "arabic_answer": arabic,
+            "category": "conversational",
+            "confidence": 1.0,
+            "follow_up_suggestions": suggestions
+        }
+
+
+# Global instance
+small_talk_agent = SmallTalkAgent()
@@ -4,13 +4,13 @@ Writer Agent.
 Improves academic writing and provides feedback in Arabic.
 """
 
+import time
 from typing import Dict, Any
 from utils.llm_client import llm_client
 from utils.validators import validators
-from prompts.writer_prompts import (
-    WRITER_SYSTEM_PROMPT,
-    WRITER_USER_PROMPT_TEMPLATE
-)
+from utils.field_recovery import field_recovery
+from utils.tracing import traced
+from prompts.registry import prompt_registry
 
 
 class WriterAgent:
@@ -20,6 +20,7 @@ class WriterAgent:
         """Initialize the writer agent."""
         self.name = "Writer"
 
+    @traced("agent.writer")
     def improve(self, user_input: str) -> Dict[str, Any]:
         """
         Improve academic writing and explain changes.
@@ -39,21 +40,30 @@ class WriterAgent:
             Exception: If writing improvement fails
         """
         try:
-            # Format the user prompt
-            user_prompt = WRITER_USER_PROMPT_TEMPLATE.format(
+            # Pick the prompt variant and format the user prompt
+            template = prompt_registry.select("writer")
+            user_prompt = template.user().format(
                 user_input=user_input
             )
 
             # Call LLM for writing improvement
+            start_time = time.time()
             result = llm_client.generate_json_completion(
-                system_prompt=WRITER_SYSTEM_PROMPT,
+                system_prompt=template.system_prompt,
                 user_prompt=user_prompt,
                 temperature=0.5,  # Moderate temperature for balanced creativity and consistency
-                max_tokens=2000
+                agent="writer"
             )
 
-            # Validate the result
+            # Validate the result; on failure, re-ask only for the invalid fields
             is_valid, error_msg = validators.validate_writing_result(result)
+            prompt_registry.record(template, time.time() - start_time, is_valid)
+            if not is_valid:
+                result = field_recovery.recover(
+                    "writer", result, template.system_prompt, user_prompt, temperature=0.5
+                )
+                is_valid, error_msg = validators.validate_writing_result(result)
+
             if not is_valid:
                 raise ValueError(f"Invalid writing result: {error_msg}")
 
@@ -0,0 +1,654 @@
+"""
+BABA - Bilingual Academic Bridge Agent
+Headless HTTP API
+
+Serves the orchestrator over HTTP/JSON so that other front ends (such as
+an LMS integration) can share one backend process. Sessions are keyed by
+ID and kept in the session store, so they outlive idle eviction from
+memory and server restarts. Chat responses can be streamed as Server-Sent
+Events, and a bounded number of requests is processed at once with the
+rest queued.
+
+    python api_server.py --port 8000
+
+Endpoints:
+    POST   /v1/sessions                          Create a session
+    GET    /v1/sessions/<id>                     Session summary
+    DELETE /v1/sessions/<id>                     End a session
+    POST   /v1/sessions/<id>/messages            Process a message ({"message", "stream"})
+    GET    /v1/sessions/<id>/messages            Stored messages, newest page first (?before=<seq>&limit=<n>)
+    POST   /v1/sessions/<id>/quiz/answers        Check an answer ({"question_index", "answer"})
+    GET    /v1/sessions/<id>/performance         Quiz performance analysis
+    GET    /healthz                              Liveness and load
+    GET    /metrics                              Prometheus metrics
+"""
+
+import argparse
+import json
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional
+from urllib.parse import parse_qs
+from config import config
+from agents.orchestrator import orchestrator
+from utils.request_context import RequestContext
+from utils.validators import validators
+from utils.session_store import SessionStore, SESSION_ID_PATTERN, session_store
+from utils.metrics import metrics, api_active_requests, api_queued_requests, api_rejected_total
+
+
+# Largest accepted request body
+MAX_BODY_BYTES = 1024 * 1024
+
+ROUTE_PATTERN = re.compile(r"^/v1/sessions(?:/(?P<session_id>[^/]+)(?P<action>/messages|/quiz/answers|/performance)?)?/?$")
+
+
+class ApiError(Exception):
+    """An error answered with an HTTP status and a JSON body."""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        """
+        Initialize the error.
+
+        Args:
+            status: HTTP status code
+            message: Error message for the client
+            headers: Optional extra response headers
+        """
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+class ApiSession:
+    """State of one client session."""
+
+    def __init__(self, session_id: str):
+        """
+        Initialize a session.
+
+        Args:
+            session_id: Session identifier
+        """
+        self.session_id = session_id
+        self.state: Dict[str, Any] = {"quiz_data": None, "quiz_history": [], "interaction_count": 0}
+        # One request at a time per session keeps its history consistent
+        self.lock = threading.Lock()
+        self.last_used = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """Get a JSON-serializable overview of the session."""
+        return {
+            "session_id": self.session_id,
+            "interaction_count": self.state.get("interaction_count", 0),
+            "last_topic": self.state.get("last_topic"),
+            "has_quiz": bool(self.state.get("quiz_data")),
+            "quiz_history": self.state.get("quiz_history", [])
+        }
+
+
+class SessionManager:
+    """
+    Sessions keyed by ID, cached in memory over the session store.
+
+    Sessions idle in memory for longer than the TTL are dropped from
+    memory only; the next request for one restores it from the store.
+    """
+
+    def __init__(self, ttl: int = None, store: SessionStore = None):
+        """
+        Initialize the manager.
+
+        Args:
+            ttl: Seconds an idle session stays in memory (defaults to Config.API_SESSION_TTL)
+            store: Session store (defaults to the global session store)
+        """
+        self.ttl = ttl or config.API_SESSION_TTL
+        self.store = store or session_store
+        self.sessions: Dict[str, ApiSession] = {}
+        self.lock = threading.Lock()
+
+    def create(self, session_id: Optional[str] = None) -> ApiSession:
+        """
+        Create a session, or return the existing one with that ID.
+
+        Args:
+            session_id: Optional client-chosen ID (random when omitted)
+
+        Returns:
+            The session
+        """
+        self.expire()
+        if session_id is not None:
+            session = self.get(session_id)
+            if session is not None:
+                return session
+
+        session = ApiSession(session_id or secrets.token_hex(16))
+        self.save(session)
+        with self.lock:
+            return self.sessions.setdefault(session.session_id, session)
+
+    def get(self, session_id: str) -> Optional[ApiSession]:
+        """Get a session by ID, restoring it from the store if needed, and mark it as used."""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.time()
+                return session
+
+        if not self.store.exists(session_id):
+            return None
+
+        restored = ApiSession(session_id)
+        restored.state.update(orchestrator.restore_session_state(self.store.load_state(session_id)))
+        with self.lock:
+            # Another request may have restored it meanwhile
+            session = self.sessions.setdefault(session_id, restored)
+            session.last_used = time.time()
+            return session
+
+    def save(self, session: ApiSession, messages: List[Dict[str, Any]] = ()) -> None:
+        """
+        Write a session's state, and optionally new messages, to the store.
+
+        Args:
+            session: The session
+            messages: Messages to append to its conversation
+        """
+        for message in messages:
+            self.store.append_message(session.session_id, message)
+        self.store.save_state(session.session_id, orchestrator.export_session_state(session.state))
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session from memory and the store; returns False if it did not exist."""
+        with self.lock:
+            in_memory = self.sessions.pop(session_id, None) is not None
+        return self.store.delete(session_id) or in_memory
+
+    def expire(self) -> int:
+        """
+        Drop sessions idle for longer than the TTL from memory.
+
+        Returns:
+            Number of sessions dropped
+        """
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            expired = [sid for sid, s in self.sessions.items() if s.last_used < cutoff and not s.lock.locked()]
+            for session_id in expired:
+                del self.sessions[session_id]
+        return len(expired)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.sessions)
+
+
+class AdmissionControl:
+    """Limits how many requests are processed at once and queues the rest."""
+
+    def __init__(self, max_concurrency: int = None, max_queue: int = None, queue_timeout: float = None):
+        """
+        Initialize admission control.
+
+        Args:
+            max_concurrency: Requests processed at once (defaults to Config.API_MAX_CONCURRENCY)
+            max_queue: Requests allowed to wait (defaults to Config.API_MAX_QUEUE)
+            queue_timeout: Seconds a request may wait (defaults to Config.API_QUEUE_TIMEOUT)
+        """
+        self.max_concurrency = max_concurrency or config.API_MAX_CONCURRENCY
+        self.max_queue = config.API_MAX_QUEUE if max_queue is None else max_queue
+        self.queue_timeout = config.API_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, on_wait: Optional[Callable[[int], None]] = None) -> Optional[str]:
+        """
+        Take a processing slot, waiting in the queue if all are busy.
+
+        Args:
+            on_wait: Optional callback receiving the queue position, called
+                once before waiting (not called when a slot is free)
+
+        Returns:
+            None once a slot is taken, otherwise why the request was
+            turned away ("queue_full" or "queue_timeout")
+        """
+        with self.condition:
+            if self.active < self.max_concurrency:
+                self.active += 1
+                api_active_requests.inc()
+                return None
+            if self.waiting >= self.max_queue:
+                api_rejected_total.inc(reason="queue_full")
+                return "queue_full"
+            self.waiting += 1
+            position = self.waiting
+            api_queued_requests.inc()
+
+        try:
+            if on_wait is not None:
+                on_wait(position)
+
+            deadline = time.monotonic() + self.queue_timeout
+            with self.condition:
+                while self.active >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        api_rejected_total.inc(reason="queue_timeout")
+                        return "queue_timeout"
+                    self.condition.wait(remaining)
+                self.active += 1
+                api_active_requests.inc()
+                return None
+        finally:
+            with self.condition:
+                self.waiting -= 1
+            api_queued_requests.dec()
+
+    def release(self) -> None:
+        """Give back a processing slot."""
+        with self.condition:
+            self.active -= 1
+            api_active_requests.dec()
+            self.condition.notify()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Routes API requests to the orchestrator."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "BABA-API/1.0"
+
+    # --- Routing -------------------------------------------------------------
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str) -> None:
+        """Call the handler for the method and path, answering errors as JSON."""
+        path = self.path.split("?")[0]
+
+        try:
+            if path == "/healthz" and method == "GET":
+                self._send_json(200, self._health())
+                return
+            if path == "/metrics" and method == "GET":
+                self._send_text(200, metrics.render(), "text/plain; version=0.0.4; charset=utf-8")
+                return
+
+            match = ROUTE_PATTERN.match(path)
+            if not match:
+                raise ApiError(404, f"Unknown path: {path}")
+
+            session_id = match.group("session_id")
+            action = match.group("action")
+
+            if session_id is None:
+                if method != "POST":
+                    raise ApiError(405, "Use POST to create a session")
+                self._create_session()
+            elif action is None:
+                if method == "GET":
+                    self._send_json(200, self._session(session_id).summary())
+                elif method == "DELETE":
+                    if not self.server.sessions.delete(session_id):
+                        raise ApiError(404, f"Unknown session: {session_id}")
+                    self._send_json(200, {"deleted": session_id})
+                else:
+                    raise ApiError(405, "Use GET or DELETE on a session")
+            elif action == "/messages" and method == "POST":
+                self._process_message(self._session(session_id))
+            elif action == "/messages" and method == "GET":
+                self._list_messages(self._session(session_id))
+            elif action == "/quiz/answers" and method == "POST":
+                self._check_answer(self._session(session_id))
+            elif action == "/performance" and method == "GET":
+                session = self._session(session_id)
+                self._send_json(200, orchestrator.analyze_session_performance(session.state))
+            else:
+                raise ApiError(405, f"{method} is not supported on {path}")
+
+        except ApiError as e:
+            self._send_json(e.status, {"error": e.message}, e.headers)
+        except Exception as e:
+            self._send_json(500, {"error": f"Internal error: {str(e)}"})
+
+    def _health(self) -> Dict[str, Any]:
+        """Liveness and load of the server."""
+        admission = self.server.admission
+        return {
+            "status": "ok",
+            "sessions": len(self.server.sessions),
+            "active_requests": admission.active,
+            "queued_requests": admission.waiting,
+            "max_concurrency": admission.max_concurrency
+        }
+
+    def _session(self, session_id: str) -> ApiSession:
+        """Look up a session or answer 404."""
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            raise ApiError(404, f"Unknown session: {session_id}")
+        return session
+
+    # --- Endpoints -----------------------------------------------------------
+
+    def _create_session(self) -> None:
+        """POST /v1/sessions - optionally with a client-chosen "session_id"."""
+        body = self._read_json(required=False)
+        session_id = body.get("session_id")
+        if session_id is not None and not (isinstance(session_id, str) and SESSION_ID_PATTERN.match(session_id)):
+            raise ApiError(400, "session_id must be 1-64 letters, digits, '_' or '-'")
+
+        session = self.server.sessions.create(session_id)
+        self._send_json(201, session.summary())
+
+    def _list_messages(self, session: ApiSession) -> None:
+        """GET /v1/sessions/<id>/messages - a page of stored messages, oldest first."""
+        query = parse_qs(self.path.partition("?")[2])
+        try:
+            before = int(query["before"][0]) if "before" in query else None
+            limit = min(int(query.get("limit", [config.SESSION_PAGE_SIZE])[0]), 100)
+        except ValueError:
+            raise ApiError(400, "before and limit must be integers")
+        if limit < 1:
+            raise ApiError(400, "limit must be at least 1")
+
+        messages = self.server.sessions.store.messages_before(session.session_id, before, limit)
+        self._send_json(200, {
+            "messages": messages,
+            # Pass as "before" to get the preceding page
+            "next_before": messages[0]["seq"] if messages and messages[0]["seq"] > 1 else None
+        })
+
+    def _process_message(self, session: ApiSession) -> None:
+        """POST /v1/sessions/<id>/messages - process a user message."""
+        body = self._read_json()
+        message = body.get("message")
+        if not isinstance(message, str):
+            raise ApiError(400, "Body must contain a \"message\" string")
+        is_valid, error_msg = validators.validate_user_input(message)
+        if not is_valid:
+            raise ApiError(400, error_msg)
+
+        stream = bool(body.get("stream")) or "text/event-stream" in self.headers.get("Accept", "")
+
+        # The session comes first: a request waiting for its session must
+        # not hold one of the server's processing slots meanwhile
+        with self._session_turn(session):
+            if stream:
+                self._process_message_stream(session, message)
+                return
+
+            reason = self.server.admission.acquire()
+            if reason:
+                raise ApiError(503, f"Server busy ({reason}), retry later", {"Retry-After": "5"})
+
+            try:
+                result = self._run_orchestrator(session, message)
+            finally:
+                self.server.admission.release()
+
+        self._send_json(200, result)
+
+    @contextmanager
+    def _session_turn(self, session: ApiSession):
+        """
+        Hold the session's lock for the block, one request per session at a time.
+
+        Raises:
+            ApiError: 409 if the session stays busy for longer than a
+                request may wait in the queue
+        """
+        if not session.lock.acquire(timeout=self.server.admission.queue_timeout):
+            raise ApiError(409, "Another request of this session is still being processed", {"Retry-After": "5"})
+        try:
+            yield
+        finally:
+            session.lock.release()
+
+    def _process_message_stream(self, session: ApiSession, message: str) -> None:
+        """
+        Process a message, streaming queue position, progress and result as SSE.
+
+        Once the stream is open errors can only be reported as events, so
+        a failure ends the stream with an "error" event followed by "done".
+        """
+        stream_open = [False]
+
+        def open_stream():
+            if not stream_open[0]:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                stream_open[0] = True
+
+        def on_wait(position: int):
+            open_stream()
+            self._send_event("queued", {"position": position})
+
+        reason = self.server.admission.acquire(on_wait=on_wait)
+        if reason:
+            if not stream_open[0]:
+                raise ApiError(503, f"Server busy ({reason}), retry later", {"Retry-After": "5"})
+            self._send_event("error", {"error": f"Server busy ({reason}), retry later"})
+            return
+
+        try:
+            open_stream()
+
+            def on_progress(step: str, details: Dict[str, Any]):
+                if not self._send_event("progress", {"step": step, **details}):
+                    # The client went away; stop spending tokens on it
+                    context.cancel()
+
+            context = RequestContext(session_state=session.state, session_id=session.session_id, on_progress=on_progress)
+            self._send_event("started", {"request_id": context.request_id})
+            try:
+                result = self._run_orchestrator(session, message, context)
+            except Exception as e:
+                result = {"error": f"Internal error: {str(e)}"}
+        finally:
+            self.server.admission.release()
+
+        self._send_event("error" if result.get("error") else "result", result)
+        self._send_event("done", {"request_id": context.request_id})
+
+    def _run_orchestrator(
+        self,
+        session: ApiSession,
+        message: str,
+        context: Optional[RequestContext] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a message in a session (the caller holds the session's lock).
+
+        Args:
+            session: The session
+            message: The user message
+            context: Optional request context (created when omitted)
+
+        Returns:
+            The orchestrator result
+        """
+        context = context or RequestContext(session_state=session.state, session_id=session.session_id)
+
+        result = orchestrator.process_user_input(message, context=context)
+        if result.get("error") and not result.get("main_result"):
+            # Nothing answered the message: it is not part of the conversation
+            return result
+
+        session.state["interaction_count"] = session.state.get("interaction_count", 0) + 1
+        main_result = result.get("main_result") or {}
+        if main_result.get("type") == "quiz":
+            session.state["quiz_data"] = main_result.get("data")
+
+        self.server.sessions.save(session, [
+            {"role": "user", "content": message},
+            {"role": "assistant", "result": result}
+        ])
+
+        return result
+
+    def _check_answer(self, session: ApiSession) -> None:
+        """POST /v1/sessions/<id>/quiz/answers - check an answer to the session's quiz."""
+        body = self._read_json()
+        question_index = body.get("question_index")
+        answer = body.get("answer")
+        if not isinstance(question_index, int) or not isinstance(answer, int) or min(question_index, answer) < 0:
+            raise ApiError(400, "Body must contain non-negative integer \"question_index\" and \"answer\"")
+
+        with self._session_turn(session):
+            quiz_data = session.state.get("quiz_data")
+            if not quiz_data:
+                raise ApiError(409, "The session has no quiz yet")
+
+            questions = quiz_data.get("questions") or []
+            if question_index >= len(questions) or answer >= len(questions[question_index].get("options") or []):
+                raise ApiError(400, f"No question {question_index} with answer {answer} in the current quiz")
+
+            result = orchestrator.check_quiz_answer(question_index, answer, quiz_data)
+
+            session.state["quiz_history"].append({
+                "question_index": question_index,
+                "user_answer": answer,
+                "is_correct": result["is_correct"]
+            })
+            self.server.sessions.save(session)
+
+        self._send_json(200, result)
+
+    # --- I/O helpers ---------------------------------------------------------
+
+    def _read_json(self, required: bool = True) -> Dict[str, Any]:
+        """Read the JSON object request body."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, "Request body too large")
+        if not length:
+            if required:
+                raise ApiError(400, "Request body must be a JSON object")
+            return {}
+
+        try:
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ApiError(400, "Request body is not valid JSON")
+
+        if not isinstance(body, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+        return body
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a JSON response."""
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self._send_text(status, body, "application/json; charset=utf-8", headers)
+
+    def _send_text(self, status: int, body: Any, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        """Send a complete response."""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, event: str, data: Any) -> bool:
+        """
+        Send one Server-Sent Event.
+
+        Returns:
+            False if the client has disconnected
+        """
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        try:
+            self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            return True
+        except OSError:
+            return False
+
+    def log_message(self, format, *args):
+        if config.DEBUG_MODE:
+            super().log_message(format, *args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the sessions and admission control."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = None, port: int = None):
+        """
+        Initialize the server (not started).
+
+        Args:
+            host: Interface to bind (defaults to Config.API_HOST)
+            port: Port to bind (defaults to Config.API_PORT; 0 picks a free port)
+        """
+        super().__init__((host or config.API_HOST, config.API_PORT if port is None else port), ApiHandler)
+        self.sessions = SessionManager()
+        self.admission = AdmissionControl()
+
+    @property
+    def base_url(self) -> str:
+        """URL of the running server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Headless HTTP API for BABA")
+    parser.add_argument("--host", default=None, help="interface to bind (default: API_HOST)")
+    parser.add_argument("--port", type=int, default=None, help="port to bind (default: API_PORT)")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Run the API server until interrupted."""
+    args = parse_args()
+
+    try:
+        config.validate()
+    except ValueError as e:
+        print(f"⚠️ Configuration Error: {str(e)}")
+        return 1
+
+    server = ApiServer(args.host, args.port)
+    print(f"BABA API listening on {server.base_url} "
+          f"(max {server.admission.max_concurrency} concurrent, {server.admission.max_queue} queued)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
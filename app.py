@@ -6,11 +6,41 @@ An autonomous AI agent that supports bilingual (Arabic-English) students
 in understanding, improving, and producing academic work.
 """
 
+import re
+import secrets
 import streamlit as st
 from config import config
 from agents.orchestrator import orchestrator
+from agents.task_classifier import task_classifier
 from utils.arabic_utils import arabic_utils
 from utils.message_history import message_history
+from utils.request_context import RequestContext
+from utils.session_store import session_store
+from utils.job_queue import job_queue, QueueFullError
+from utils.scheduler import llm_scheduler, PRIORITIES
+from utils.llm_client import llm_client
+from utils.prefetcher import prefetcher
+from utils.http_transport import get_pool_report
+from utils.metrics import (
+    metrics,
+    metrics_server,
+    llm_request_seconds,
+    llm_requests_total,
+    llm_retries_total,
+    llm_tokens_total,
+    llm_truncations_total,
+    llm_queue_wait_seconds,
+    llm_quota_waits_total,
+    requests_total,
+    request_errors_total,
+    request_seconds,
+    cache_requests_total
+)
+
+# Session IDs the UI accepts in the URL: only ones it issued itself
+# (secrets.token_hex(16)), so a short guessable ?sid= cannot open another
+# user's stored session
+ISSUED_SESSION_ID = re.compile(r"[0-9a-f]{32}")
 
 # Page configuration
 st.set_page_config(
@@ -133,7 +163,10 @@ st.markdown("""
 
 
 def initialize_session_state():
-    """Initialize session state variables."""
+    """Initialize session state variables, restoring the session from the store."""
+    if "session_id" not in st.session_state:
+        restore_session()
+
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
@@ -149,6 +182,57 @@ def initialize_session_state():
     if "interaction_count" not in st.session_state:
         st.session_state.interaction_count = 0
 
+    if "show_timings" not in st.session_state:
+        st.session_state.show_timings = False
+
+    if "show_admin" not in st.session_state:
+        st.session_state.show_admin = False
+
+    # Plain dictionary for the orchestrator: jobs run on worker threads,
+    # which cannot use st.session_state. It shares the quiz history list
+    # so replies can refer to the student's progress
+    if "agent_state" not in st.session_state:
+        st.session_state.agent_state = {"quiz_history": st.session_state.quiz_history}
+
+
+def restore_session():
+    """
+    Open the session named in the URL (?sid=), or start a new one.
+
+    Only IDs issued by the app are accepted; any other ?sid= gets a fresh
+    ID instead.
+
+    The latest page of messages and the stored session state are loaded
+    from the session store, so a reload or server restart continues the
+    conversation.
+    """
+    session_id = st.query_params.get("sid", "")
+    if not ISSUED_SESSION_ID.fullmatch(session_id):
+        session_id = secrets.token_hex(16)
+        st.query_params["sid"] = session_id
+    st.session_state.session_id = session_id
+
+    stored = orchestrator.restore_session_state(session_store.load_state(session_id))
+    st.session_state.messages = session_store.recent_messages(session_id)
+    st.session_state.quiz_history = stored.get("quiz_history", [])
+    st.session_state.interaction_count = stored.get("interaction_count", 0)
+    st.session_state.agent_state = dict(stored, quiz_history=st.session_state.quiz_history)
+
+
+def add_chat_message(message):
+    """Append a chat message to the conversation and the session store."""
+    message["seq"] = session_store.append_message(st.session_state.session_id, message)
+    st.session_state.messages.append(message)
+    # Only the latest page stays in the session; older ones load on demand
+    del st.session_state.messages[:-config.SESSION_PAGE_SIZE]
+
+
+def save_session_state():
+    """Write the session's state (quiz history, topics, conversation memory) to the store."""
+    values = orchestrator.export_session_state(st.session_state.agent_state)
+    values["interaction_count"] = st.session_state.interaction_count
+    session_store.save_state(st.session_state.session_id, values)
+
 
 def render_header():
     """Render the application header with Clear Session button."""
@@ -168,6 +252,8 @@ def render_header():
     with col2:
         st.markdown("<div style='padding: 1rem 0;'>", unsafe_allow_html=True)
         if st.button("🔄 Clear", key="clear_session_top", help="Clear current session"):
+            session_store.delete(st.session_state.session_id)
+            del st.query_params["sid"]
             st.session_state.clear()
             st.rerun()
         st.markdown("</div>", unsafe_allow_html=True)
@@ -179,6 +265,9 @@ def render_header():
 def render_sidebar():
     """Render the sidebar with information and settings."""
     with st.sidebar:
+        # Kept first so the same component stays mounted on every run
+        message_history.sync_browser(st.session_state)
+
         st.header("About BABA")
         st.markdown("""
         BABA is an autonomous AI agent designed to help bilingual Arabic-English students with:
@@ -222,8 +311,22 @@ def render_sidebar():
 
         st.markdown("---")
 
+        # Opt-in step timings in the "See How BABA Thinks" expander
+        st.checkbox(
+            "⏱️ Show step timings",
+            key="show_timings",
+            help="Show how long each pipeline step took and how many tokens it used"
+        )
+        st.checkbox(
+            "📈 Admin: metrics",
+            key="show_admin",
+            help="Show latency, retry, error, token and cache metrics for this server"
+        )
+
+        st.markdown("---")
+
         # Recent messages history
-        recent_messages = message_history.get_recent_messages()
+        recent_messages = message_history.get_recent_messages(st.session_state)
         if recent_messages:
             st.header("📝 Recent Messages")
             st.caption("Your last 5 messages (persisted)")
@@ -233,11 +336,59 @@ def render_sidebar():
                 st.caption(f"{i}. {truncated}")
 
             if st.button("🗑️ Clear History", use_container_width=True, key="clear_history"):
-                message_history.clear_history()
+                message_history.clear_history(st.session_state)
                 st.success("Message history cleared!")
                 st.rerun()
 
 
+# Status shown for each pipeline step while a request job runs
+STEP_LABELS = {
+    "queued": "Waiting for a free worker...",
+    "classifying": "Understanding your request...",
+    "classified": "Choosing the right agent...",
+    "explaining": "Writing a bilingual explanation...",
+    "generating_quiz": "Generating your quiz...",
+    "improving_writing": "Improving your writing...",
+    "answering": "Preparing an answer...",
+    "done": "Finishing up..."
+}
+
+
+def display_degraded_notice(result):
+    """Tell the student when a response was served in degraded mode."""
+    if result.get("degraded"):
+        st.warning(
+            "⚠️ BABA is in limited mode because the AI service is slow or unavailable. "
+            "This response is a saved or standard reply.\n\n"
+            "⚠️ يعمل بابا في وضع محدود لأن خدمة الذكاء الاصطناعي بطيئة أو غير متاحة. هذا الرد محفوظ مسبقًا أو رد عام."
+        )
+
+
+def run_request_job(user_input):
+    """
+    Process a message on the job queue, showing each step while it runs.
+
+    A newer message from the same session cancels the job, so a message
+    sent while the previous one is still running replaces it. The script
+    thread still waits here, polling the job, until it finishes.
+    """
+    context = RequestContext(session_state=st.session_state.agent_state, session_id=st.session_state.session_id)
+
+    try:
+        job = job_queue.submit(
+            orchestrator.process_user_input, user_input, context=context, key=st.session_state.session_id
+        )
+    except QueueFullError:
+        return {"error": "BABA is very busy right now. Please try again in a moment."}
+
+    status = st.empty()
+    while not job.wait(0.25):
+        status.caption(f"⏳ {STEP_LABELS.get(job.step, 'Thinking...')}")
+    status.empty()
+
+    return job.result or {"error": job.error}
+
+
 def display_autonomous_actions(actions):
     """Display the autonomous actions taken by the system."""
     if not actions:
@@ -255,6 +406,168 @@ def display_autonomous_actions(actions):
             """, unsafe_allow_html=True)
 
 
+def display_step_timings(trace):
+    """Display per-step durations and token usage of a processing trace."""
+    if not trace or not st.session_state.show_timings:
+        return
+
+    st.markdown(
+        f"**⏱️ Step timings** - {trace['duration_ms']:.0f} ms total, "
+        f"{trace['prompt_tokens']} prompt + {trace['completion_tokens']} completion tokens"
+    )
+
+    lines = []
+    for span in trace["spans"]:
+        tokens = ""
+        if span["prompt_tokens"] is not None:
+            tokens = f" ({span['prompt_tokens']} → {span['completion_tokens']} tokens)"
+        status = " ❌" if span["status"] == "ERROR" else ""
+        lines.append(f"{'  ' * span['depth']}{span['name']}: {span['duration_ms']:.0f} ms{tokens}{status}")
+
+    st.code("\n".join(lines), language=None)
+    st.caption(f"Trace ID: {trace['trace_id']}")
+
+
+def render_admin_page():
+    """Render the admin page with the in-process metrics."""
+    st.header("📈 Metrics")
+
+    if metrics_server.server is not None:
+        st.caption(f"Prometheus endpoint: http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+
+    def seconds(value):
+        return f"{value:.2f}" if value is not None else "-"
+
+    # LLM calls per agent
+    st.subheader("LLM calls by agent")
+    agent_rows = []
+    for (agent,) in llm_request_seconds.label_sets():
+        errors = llm_requests_total.get(agent=agent, outcome="error")
+        agent_rows.append({
+            "Agent": agent,
+            "Calls": llm_request_seconds.count(agent=agent),
+            "p50 (s)": seconds(llm_request_seconds.quantile(0.5, agent=agent)),
+            "p95 (s)": seconds(llm_request_seconds.quantile(0.95, agent=agent)),
+            "Retries": int(llm_retries_total.get(agent=agent)),
+            "Errors": int(errors),
+            "Prompt tokens": int(llm_tokens_total.get(agent=agent, kind="prompt")),
+            "Completion tokens": int(llm_tokens_total.get(agent=agent, kind="completion")),
+            "Truncations": int(llm_truncations_total.get(agent=agent))
+        })
+    if agent_rows:
+        st.dataframe(agent_rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No LLM calls yet.")
+
+    # Requests per task type
+    st.subheader("Requests by task type")
+    task_rows = []
+    for (task_type,) in request_seconds.label_sets():
+        total = requests_total.get(task_type=task_type)
+        errors = request_errors_total.get(task_type=task_type)
+        task_rows.append({
+            "Task type": task_type,
+            "Requests": int(total),
+            "Error rate": f"{errors / total:.1%}" if total else "-",
+            "p50 (s)": seconds(request_seconds.quantile(0.5, task_type=task_type)),
+            "p95 (s)": seconds(request_seconds.quantile(0.95, task_type=task_type))
+        })
+    if task_rows:
+        st.dataframe(task_rows, use_container_width=True, hide_index=True)
+    else:
+        st.info("No requests yet.")
+
+    # LLM scheduler queue waits per priority class
+    st.subheader("LLM scheduling")
+    scheduler_report = llm_scheduler.get_report()
+    st.caption(f"{scheduler_report['active']} of {scheduler_report['max_concurrency'] or 'unlimited'} LLM slots in use")
+    wait_rows = []
+    for priority in PRIORITIES:
+        wait_rows.append({
+            "Priority": priority,
+            "Waiting": scheduler_report["waiting"][priority],
+            "Calls": llm_queue_wait_seconds.count(priority=priority),
+            "Wait p50 (s)": seconds(llm_queue_wait_seconds.quantile(0.5, priority=priority)),
+            "Wait p95 (s)": seconds(llm_queue_wait_seconds.quantile(0.95, priority=priority)),
+            "Quota waits": int(llm_quota_waits_total.get(priority=priority))
+        })
+    st.dataframe(wait_rows, use_container_width=True, hide_index=True)
+
+    batching = task_classifier.batcher.get_report()
+    if batching["batches"]:
+        st.caption(
+            f"Classification batching: {batching['outcomes']['batched']} inputs classified in "
+            f"{batching['batches']} shared calls ({batching['average_batch_size']:.1f} per call), "
+            f"{batching['outcomes']['single'] + batching['outcomes']['fallback']} alone"
+        )
+
+    # Endpoint pool routing and health
+    st.subheader("LLM endpoints")
+    endpoint_rows = []
+    for endpoint in llm_client.pool.get_report():
+        endpoint_rows.append({
+            "Endpoint": endpoint["name"],
+            "Model": endpoint["model"],
+            "Weight": endpoint["weight"],
+            "Status": "healthy" if endpoint["healthy"] else "ejected",
+            "In flight": endpoint["outstanding"],
+            "Calls": endpoint["requests"],
+            "Failures": endpoint["failures"],
+            "Latency (s)": seconds(endpoint["latency"]),
+            "Last error": endpoint["last_error"] or ""
+        })
+    st.dataframe(endpoint_rows, use_container_width=True, hide_index=True)
+
+    pool_rows = []
+    for pool in get_pool_report():
+        pool_rows.append({
+            "Connection pool": pool["name"],
+            "Active": pool["active"],
+            "Idle": pool["idle"],
+            "Limit": pool["max_connections"],
+            "Waits": pool["waits"]
+        })
+    st.dataframe(pool_rows, use_container_width=True, hide_index=True)
+
+    # Circuit breaker
+    breaker = llm_client.breaker.get_report()
+    if breaker["state"] != "closed":
+        st.error(f"LLM circuit {breaker['state'].replace('_', '-')}: serving degraded responses ({breaker['last_error']})")
+    else:
+        st.caption(f"LLM circuit closed ({breaker['recent_failure_rate']:.0%} of the last {breaker['recent_calls']} calls failed or were slow)")
+
+    # Cache hit ratios
+    st.subheader("Caches")
+    caches = sorted({cache for cache, _ in cache_requests_total.samples()})
+    if caches:
+        for cache in caches:
+            hits = cache_requests_total.get(cache=cache, result="hit")
+            misses = cache_requests_total.get(cache=cache, result="miss")
+            lookups = hits + misses
+            st.metric(cache, f"{hits / lookups:.0%} hit ratio" if lookups else "-", f"{int(lookups)} lookups", delta_color="off")
+    else:
+        st.info("No cache lookups yet.")
+
+    # Whether speculative follow-up answers pay off
+    st.subheader("Follow-up prefetching")
+    prefetch_report = prefetcher.get_report()
+    if prefetch_report["prefetched"]:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Prefetched answers", prefetch_report["prefetched"])
+        col2.metric("Hit rate", f"{prefetch_report['hit_rate']:.0%}", f"{prefetch_report['hits']} hits", delta_color="off")
+        col3.metric(
+            "Tokens per hit",
+            f"{prefetch_report['tokens_per_hit']:.0f}" if prefetch_report["tokens_per_hit"] else "-",
+            f"{prefetch_report['tokens']} tokens spent",
+            delta_color="off"
+        )
+    else:
+        st.info("No follow-ups prefetched yet.")
+
+    with st.expander("Raw Prometheus output"):
+        st.code(metrics.render(), language=None)
+
+
 def display_explanation_result(data):
     """Display explanation results in bilingual format."""
     st.markdown("**📚 Academic Explanation | الشرح الأكاديمي**")
@@ -449,6 +762,7 @@ def display_quiz(quiz_data, quiz_id=None):
                 "user_answer": user_answer,
                 "is_correct": result["is_correct"]
             })
+            save_session_state()
 
             # Display result
             if result["is_correct"]:
@@ -508,10 +822,17 @@ def main():
     # Initialize session state
     initialize_session_state()
 
+    # Expose metrics for scraping (started once per process)
+    metrics_server.start()
+
     # Render UI components
     render_header()
     render_sidebar()
 
+    if st.session_state.show_admin:
+        render_admin_page()
+        return
+
     # Display welcome message if no messages yet
     if len(st.session_state.messages) == 0:
         with st.chat_message("assistant", avatar="🤖"):
@@ -526,6 +847,12 @@ def main():
             Just type your question or paste text you'd like me to review!
             """)
 
+    # Older messages stay in the session store until asked for
+    first_seq = st.session_state.messages[0].get("seq", 1) if st.session_state.messages else 1
+    if first_seq > 1 and st.button("⬆️ Load earlier messages", key="load_earlier"):
+        st.session_state.messages[:0] = session_store.messages_before(st.session_state.session_id, first_seq)
+        st.rerun()
+
     # Display chat history
     for message in st.session_state.messages:
         with st.chat_message(message["role"], avatar=message.get("avatar", None)):
@@ -540,6 +867,7 @@ def main():
                     if result.get("classification"):
                         classification = result["classification"]
                         st.caption(f"✅ Task: **{classification['task_type'].replace('_', ' ').title()}** (Confidence: {classification['confidence']:.0%})")
+                    display_degraded_notice(result)
 
                     # Show autonomous actions in expander
                     if result.get("autonomous_actions"):
@@ -551,6 +879,7 @@ def main():
                                     <em>{action['action']}</em> - {action['decision']}
                                 </div>
                                 """, unsafe_allow_html=True)
+                            display_step_timings(result.get("trace"))
 
                     # Display main result
                     if result.get("main_result"):
@@ -602,10 +931,10 @@ def main():
     # Process user input
     if user_input:
         # Save to persistent message history
-        message_history.add_message(user_input)
+        message_history.add_message(st.session_state, user_input)
 
         # Add user message to chat
-        st.session_state.messages.append({
+        add_chat_message({
             "role": "user",
             "content": user_input,
             "avatar": "👤"
@@ -618,7 +947,7 @@ def main():
         # Process through orchestrator
         with st.chat_message("assistant", avatar="🤖"):
             with st.spinner("Thinking..."):
-                result = orchestrator.process_user_input(user_input, st.session_state)
+                result = run_request_job(user_input)
 
                 # Increment interaction count
                 st.session_state.interaction_count += 1
@@ -626,7 +955,7 @@ def main():
             # Display results
             if result.get("error"):
                 st.error(f"❌ Error: {result['error']}")
-                st.session_state.messages.append({
+                add_chat_message({
                     "role": "assistant",
                     "error": result['error'],
                     "avatar": "🤖"
@@ -636,6 +965,7 @@ def main():
                 if result.get("classification"):
                     classification = result["classification"]
                     st.caption(f"✅ Task: **{classification['task_type'].replace('_', ' ').title()}** (Confidence: {classification['confidence']:.0%})")
+                display_degraded_notice(result)
 
                 # Show autonomous actions
                 if result.get("autonomous_actions"):
@@ -647,6 +977,7 @@ def main():
                                 <em>{action['action']}</em> - {action['decision']}
                             </div>
                             """, unsafe_allow_html=True)
+                        display_step_timings(result.get("trace"))
 
                 # Display main result
                 if result.get("main_result"):
@@ -708,7 +1039,9 @@ def main():
                     import time
                     message_data["quiz_id"] = int(time.time() * 1000)
 
-                st.session_state.messages.append(message_data)
+                add_chat_message(message_data)
+
+            save_session_state()
 
         # Rerun to update chat display
         st.rerun()
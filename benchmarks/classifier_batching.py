@@ -0,0 +1,155 @@
+"""
+Classifier Micro-Batching Benchmark
+
+Classifies the same inputs through TaskClassifierAgent against a fake
+OpenAI server, first with batching disabled and then enabled, under
+concurrent load and one at a time, and compares prompt tokens per
+classified input, LLM calls, latency and how inputs were answered.
+
+    python benchmarks/classifier_batching.py --inputs 400 --concurrency 32
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+from hedging import percentile
+
+
+SAMPLE_INPUTS = [
+    "What is critical thinking?",
+    "ما هو التفكير النقدي؟",
+    "How can I manage my time during exams?",
+    "Give me a quiz on sustainability",
+    "Explain the concept of cultural diversity",
+    "كيف أنظم وقتي؟",
+    "Can you recommend a study routine for the weekend?",
+    "Test my knowledge of research methods",
+]
+
+AGENTS = ("classifier", "classifier_batch")
+
+
+def classify_all(task_classifier, inputs: List[str], concurrency: int) -> List[float]:
+    """Classify inputs concurrently; returns their latencies in seconds."""
+    def call(text: str) -> float:
+        start = time.time()
+        result = task_classifier.classify(text)
+        if result["reasoning"].startswith("Fallback"):
+            raise RuntimeError(result["reasoning"])
+        return time.time() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(call, inputs))
+
+
+def usage() -> Dict[str, float]:
+    """LLM calls and prompt tokens of the classifier profiles so far."""
+    from utils.metrics import llm_requests_total, llm_tokens_total
+    return {
+        "calls": sum(llm_requests_total.get(agent=agent, outcome="ok") for agent in AGENTS),
+        "prompt_tokens": sum(llm_tokens_total.get(agent=agent, kind="prompt") for agent in AGENTS)
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare classification cost with and without micro-batching")
+    parser.add_argument("--inputs", type=int, default=400, help="Inputs classified per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent classifications")
+    parser.add_argument("--latency", type=float, default=0.1, help="Fake server latency in seconds")
+    parser.add_argument("--batch-size", type=int, default=8, help="Most inputs per batched call")
+    parser.add_argument("--window", type=float, default=0.01, help="Seconds a batch waits for more inputs")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run every configuration and print the comparison."""
+    args = parse_args(argv)
+
+    server = FakeOpenAIServer(latency=args.latency, seed=7).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["METRICS_PORT"] = "0"
+    # All calls come from one anonymous user; don't let per-user limits serialize them
+    os.environ["LLM_USER_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_USER_TOKENS_PER_MINUTE"] = "0"
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_HEDGE_AGENTS"] = ""
+    # Keep the prompt variant fixed so runs differ only in batching
+    os.environ["PROMPT_VARIANTS"] = "classifier=default"
+
+    from agents.task_classifier import task_classifier
+
+    inputs = [SAMPLE_INPUTS[index % len(SAMPLE_INPUTS)] + f" ({index})" for index in range(args.inputs)]
+    sequential_inputs = inputs[:min(40, len(inputs))]
+    batcher = task_classifier.batcher
+    batcher.window = args.window
+    results: Dict[str, Any] = {}
+    failures = []
+
+    try:
+        runs = (
+            ("single calls", 1, args.concurrency, inputs),
+            ("batched", args.batch_size, args.concurrency, inputs),
+            ("batched, light", args.batch_size, 1, sequential_inputs),
+        )
+        for name, batch_size, concurrency, run_inputs in runs:
+            batcher.max_size = batch_size
+            before = usage()
+            outcomes_before = dict(batcher.get_report()["outcomes"])
+            start = time.time()
+            latencies = classify_all(task_classifier, run_inputs, concurrency)
+            seconds = time.time() - start
+            after = usage()
+            outcomes = {
+                outcome: count - outcomes_before[outcome] for outcome, count in batcher.get_report()["outcomes"].items()
+            }
+            results[name] = {
+                "inputs": len(run_inputs),
+                "calls": after["calls"] - before["calls"],
+                "tokens_per_input": (after["prompt_tokens"] - before["prompt_tokens"]) / len(run_inputs),
+                "p50": percentile(latencies, 50),
+                "p99": percentile(latencies, 99),
+                "throughput": len(run_inputs) / seconds,
+                "outcomes": outcomes
+            }
+    finally:
+        server.stop()
+
+    print("=" * 78)
+    print(f"Classification micro-batching, batches of up to {args.batch_size}, {args.window * 1000:.0f} ms window")
+    print("=" * 78)
+    print(f"{'':<16}{'inputs':>8}{'calls':>7}{'prompt tok/input':>18}{'p50':>8}{'p99':>8}{'inputs/s':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<16}{row['inputs']:8d}{int(row['calls']):7d}{row['tokens_per_input']:18.1f}"
+            f"{row['p50']:8.3f}{row['p99']:8.3f}{row['throughput']:10.1f}"
+        )
+        print(f"{'':<16}answered: " + ", ".join(f"{count} {outcome}" for outcome, count in row["outcomes"].items()))
+
+    single, batched, light = results["single calls"], results["batched"], results["batched, light"]
+    reduction = single["tokens_per_input"] / batched["tokens_per_input"]
+    print(f"\nPrompt tokens per input reduced {reduction:.1f}x under load")
+    if reduction < 2:
+        failures.append("Batching did not reduce prompt tokens per input")
+    if light["outcomes"]["batched"] or light["calls"] != light["inputs"]:
+        failures.append("Light traffic was batched instead of sent as single calls")
+    if light["p50"] > single["p50"] + args.window:
+        failures.append("Light traffic waited for the batch window")
+
+    for failure in failures:
+        print(f"✗ {failure}")
+    print("All checks passed" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""
+Endpoint Pool Failover Check
+
+Runs LLMClient against several local fake OpenAI servers configured as
+an endpoint pool and checks the routing and health handling:
+
+1. Balance: calls are spread by weight over healthy endpoints
+2. Failover: when one endpoint starts failing, calls move to the others
+   without errors or retry delays, and the endpoint is ejected
+3. Recovery: once it answers again it rejoins the rotation after the
+   ejection period
+
+    python benchmarks/endpoint_failover.py --calls 200 --concurrency 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+
+# Endpoint weights of the pool; the second endpoint is the one that fails
+WEIGHTS = [2, 1, 1]
+
+EJECT_SECONDS = 1.0
+
+
+def run_calls(llm_client, calls: int, concurrency: int) -> Dict[str, Any]:
+    """Send classifier calls concurrently; returns errors and elapsed time."""
+    def call(index: int) -> Optional[str]:
+        try:
+            llm_client.generate_completion(
+                system_prompt="You are a task classifier.",
+                user_prompt=f"Classify this input: question {index}",
+                response_format="json_object",
+                agent="classifier"
+            )
+            return None
+        except Exception as e:
+            return str(e)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        errors = [error for error in executor.map(call, range(calls)) if error]
+    return {"errors": errors, "seconds": time.time() - start}
+
+
+def shares(servers: List[FakeOpenAIServer], before: List[int]) -> List[float]:
+    """Share of the requests each server received since the given counts."""
+    counts = [server.get_stats()["requests"] - previous for server, previous in zip(servers, before)]
+    total = sum(counts) or 1
+    return [count / total for count in counts]
+
+
+def request_counts(servers: List[FakeOpenAIServer]) -> List[int]:
+    """Requests received so far per server."""
+    return [server.get_stats()["requests"] for server in servers]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check LLM endpoint balancing and failover")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per phase")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake server latency in seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the three phases and report failures."""
+    args = parse_args(argv)
+
+    servers = [FakeOpenAIServer(latency=args.latency, seed=index).start() for index in range(len(WEIGHTS))]
+    os.environ["LLM_ENDPOINTS"] = ";".join(
+        f"url={server.base_url},key=fake,name=fake-{index + 1},weight={weight}"
+        for index, (server, weight) in enumerate(zip(servers, WEIGHTS))
+    )
+    os.environ["LLM_ENDPOINT_EJECT_SECONDS"] = str(EJECT_SECONDS)
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["METRICS_PORT"] = "0"
+    # All calls come from one anonymous user; don't let per-user limits serialize them
+    os.environ["LLM_USER_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_USER_TOKENS_PER_MINUTE"] = "0"
+
+    from utils.llm_client import llm_client
+    from utils.metrics import llm_failovers_total, llm_retries_total
+
+    failures = []
+
+    def report(phase: str, result: Dict[str, Any], observed: List[float]):
+        print(f"\n{phase}: {args.calls} calls in {result['seconds']:.2f}s, {len(result['errors'])} errors")
+        for endpoint, share in zip(llm_client.pool.get_report(), observed):
+            status = "healthy" if endpoint["healthy"] else "ejected"
+            print(f"  {endpoint['name']:<8} weight {endpoint['weight']:.0f}  {share:6.1%} of requests  {status}")
+        if result["errors"]:
+            failures.append(f"{phase}: {len(result['errors'])} calls failed ({result['errors'][0]})")
+
+    try:
+        print("=" * 60)
+        print("Endpoint Pool Failover Check")
+        print("=" * 60)
+
+        # 1. Balance
+        before = request_counts(servers)
+        result = run_calls(llm_client, args.calls, args.concurrency)
+        observed = shares(servers, before)
+        report("Balance", result, observed)
+        expected = [weight / sum(WEIGHTS) for weight in WEIGHTS]
+        if any(abs(share - target) > 0.15 for share, target in zip(observed, expected)):
+            failures.append(f"Balance: shares {observed} too far from weights {expected}")
+
+        # 2. Failover
+        servers[1].error_rate = 1.0
+        retries_before = llm_retries_total.get(agent="classifier")
+        before = request_counts(servers)
+        result = run_calls(llm_client, args.calls, args.concurrency)
+        report("Failover", result, shares(servers, before))
+        failovers = llm_failovers_total.get(agent="classifier")
+        print(f"  {failovers:.0f} failovers, {llm_retries_total.get(agent='classifier') - retries_before:.0f} retries")
+        if llm_client.pool.get_report()[1]["healthy"]:
+            failures.append("Failover: the failing endpoint was not ejected")
+        if result["seconds"] > args.calls / args.concurrency * args.latency * 3 + 1:
+            failures.append(f"Failover: took {result['seconds']:.2f}s, calls waited for retry delays")
+
+        # 3. Recovery
+        servers[1].error_rate = 0.0
+        time.sleep(EJECT_SECONDS + 0.2)
+        before = request_counts(servers)
+        result = run_calls(llm_client, args.calls, args.concurrency)
+        observed = shares(servers, before)
+        report("Recovery", result, observed)
+        if observed[1] < 0.1:
+            failures.append("Recovery: the endpoint did not rejoin the rotation")
+        if llm_client.breaker.is_open():
+            failures.append("Recovery: circuit breaker opened although other endpoints were healthy")
+
+    finally:
+        for server in servers:
+            server.stop()
+
+    print()
+    for failure in failures:
+        print(f"✗ {failure}")
+    print("All checks passed" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+"""
+Fake OpenAI Server
+
+A local stand-in for the OpenAI Chat Completions API, used to benchmark
+and test the pipeline without network access or an API key. It answers
+POST /v1/chat/completions with canned, agent-shaped compact JSON and can
+simulate latency, slow outliers, generation speed, server errors, rate
+limiting and streaming (server-sent events).
+
+Run it standalone and point the app at it:
+
+    python benchmarks/fake_openai_server.py --port 8765 --latency 0.3
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 streamlit run app.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+
+# Canned responses per agent, using the compact wire keys of the prompts
+CANNED_RESPONSES = {
+    "classifier": {"t": "general_question", "cf": 0.9, "l": "en", "r": "Canned classification"},
+    "explainer": {
+        "en": "Critical thinking is the disciplined process of analysing, evaluating and "
+              "questioning information before accepting it or acting on it.",
+        "ar": "التفكير النقدي هو عملية منضبطة لتحليل المعلومات وتقييمها والتساؤل عنها قبل قبولها أو العمل بها.",
+        "ex": "A student in Kuwait compares two news reports about a new metro line before sharing one.",
+        "kt": ["analysis", "evaluation", "evidence"],
+        "nx": "Try evaluating the sources of one article you read this week."
+    },
+    "writer": {
+        "lang": "en",
+        "it": "Research shows that climate change affects the economy, and many people in the "
+              "region are worried about the future of their jobs and family income.",
+        "tar": "يُظهر البحث أن تغير المناخ يؤثر على الاقتصاد، ويشعر كثيرون في المنطقة بالقلق على مستقبل وظائفهم ودخل أسرهم.",
+        "ch": "صُحح توافق الفعل مع الفاعل ('is show' إلى 'shows') واختيار الكلمات ('effect' إلى 'affects' و'there' إلى 'their').",
+        "gp": ["Subject-verb agreement", "Affect vs effect"],
+        "ti": ["Read each sentence aloud to check agreement"],
+        "nx": "Rewrite one of your own paragraphs using these corrections."
+    },
+    "quiz": {
+        "qs": [
+            {
+                "q": "What is the first step of critical thinking?",
+                "qa": "ما هي الخطوة الأولى في التفكير النقدي؟",
+                "o": ["Accepting information", "Analysing information", "Ignoring information"],
+                "oa": ["قبول المعلومات", "تحليل المعلومات", "تجاهل المعلومات"],
+                "c": 1,
+                "e": "Critical thinking starts by analysing information."
+            },
+            {
+                "q": "Which habit supports critical thinking?",
+                "qa": "أي عادة تدعم التفكير النقدي؟",
+                "o": ["Checking sources", "Sharing quickly", "Memorising headlines"],
+                "oa": ["التحقق من المصادر", "المشاركة بسرعة", "حفظ العناوين"],
+                "c": 0,
+                "e": "Checking sources is a core evaluation habit."
+            }
+        ]
+    },
+    "general_qa": {
+        "en": "Plan your week in short study blocks, start with the hardest subject, and review "
+              "your notes for ten minutes at the end of each day.",
+        "ar": "خطط لأسبوعك في فترات دراسة قصيرة، وابدأ بالمادة الأصعب، وراجع ملاحظاتك عشر دقائق في نهاية كل يوم.",
+        "cat": "advice",
+        "cf": 0.85,
+        "fu": ["How do I prepare for exams?", "How can I stay motivated?"]
+    },
+}
+
+CANNED_SUMMARY = "The student asked about study skills and academic concepts; BABA explained them with examples."
+
+# System prompt markers identifying each agent when no json_schema name is sent
+AGENT_MARKERS = [
+    ("classifier_batch", ("as a numbered list",)),
+    ("classifier", ("task classification agent", "Classify a student's message")),
+    ("explainer", ("bilingual academic tutor",)),
+    ("writer", ("academic writing coach",)),
+    ("quiz", ("quiz generator",)),
+    ("general_qa", ("helpful bilingual assistant",)),
+    ("summary", ("running summary",)),
+]
+
+INPUT_PATTERN = re.compile(r'Input:\s*(.*?)\s*(?:\n\n|$)', re.DOTALL)
+NUMBERED_INPUT_PATTERN = re.compile(r'Input (\d+):\s*(.*?)\s*(?=\n\nInput \d+:|\n\nRespond|$)', re.DOTALL)
+
+
+def detect_agent(payload: Dict[str, Any]) -> str:
+    """
+    Work out which agent sent a request.
+
+    Args:
+        payload: The chat completion request body
+
+    Returns:
+        Agent profile name, "summary", or "unknown"
+    """
+    response_format = payload.get("response_format") or {}
+    schema_name = (response_format.get("json_schema") or {}).get("name", "")
+    if schema_name.endswith("_result"):
+        return schema_name[:-len("_result")]
+
+    system_prompt = next(
+        (m.get("content", "") for m in payload.get("messages", []) if m.get("role") == "system"), ""
+    )
+    for agent, markers in AGENT_MARKERS:
+        if any(marker in system_prompt for marker in markers):
+            return agent
+
+    return "unknown"
+
+
+def classify_input(text: str) -> str:
+    """
+    Pick a task type for a classifier request with simple keyword rules.
+
+    Args:
+        text: The user input being classified
+
+    Returns:
+        A task type label
+    """
+    lowered = text.lower()
+
+    if any(word in lowered for word in ("quiz", "test", "exam", "اختبار", "امتحان")) or \
+            lowered.strip(" !.") in ("yes", "ok", "sure", "yeah", "نعم"):
+        return "quiz_generation"
+    if any(phrase in lowered for phrase in ("what is", "what are", "explain", "define", "ما هو", "ما هي")):
+        return "explanation"
+    if len(text.split()) > 20:
+        return "writing_improvement"
+    return "general_question"
+
+
+def classification_for(text: str) -> Dict[str, Any]:
+    """Canned classifier response for one input."""
+    return dict(
+        CANNED_RESPONSES["classifier"],
+        t=classify_input(text),
+        l="ar" if re.search(r'[\u0600-\u06FF]', text) else "en"
+    )
+
+
+def build_content(agent: str, payload: Dict[str, Any]) -> str:
+    """
+    Build the canned response text for a request.
+
+    Args:
+        agent: Agent profile name (see detect_agent)
+        payload: The chat completion request body
+
+    Returns:
+        Response content (minified JSON for agents, text for summaries)
+    """
+    if agent == "summary":
+        return CANNED_SUMMARY
+
+    user_messages = [m.get("content", "") for m in payload.get("messages", []) if m.get("role") == "user"]
+    user_prompt = user_messages[-1] if user_messages else ""
+
+    if agent == "classifier_batch":
+        response = {"rs": [
+            dict(classification_for(text), i=int(number))
+            for number, text in NUMBERED_INPUT_PATTERN.findall(user_prompt)
+        ]}
+    elif agent == "classifier":
+        match = INPUT_PATTERN.search(user_prompt)
+        response = classification_for(match.group(1) if match else "")
+    else:
+        response = dict(CANNED_RESPONSES.get(agent, CANNED_RESPONSES["general_qa"]))
+
+    return json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server implementing /v1/chat/completions."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tokens_per_second: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: Optional[int] = None,
+        slow_rate: float = 0.0,
+        slow_latency: float = 0.0
+    ):
+        """
+        Initialize the server (call start() or serve_forever()).
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            latency: Seconds before the first token
+            jitter: Extra random latency, uniformly 0..jitter seconds
+            tokens_per_second: Simulated generation speed (0 = instant)
+            error_rate: Share of requests answered with HTTP 500
+            rate_limit_rate: Share of requests answered with HTTP 429
+            seed: Random seed for reproducible fault injection
+            slow_rate: Share of requests delayed by slow_latency on top
+                (tail latency)
+            slow_latency: Extra seconds of a slow request
+        """
+        super().__init__((host, port), FakeOpenAIHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, Any] = {}
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to configure as OPENAI_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        """Serve from a background daemon thread."""
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+    def reset_stats(self) -> None:
+        """Clear the request counters."""
+        with self.lock:
+            self.stats = {
+                "requests": 0,
+                "by_agent": {},
+                "errors_injected": 0,
+                "rate_limits_injected": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get a copy of the request counters."""
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def draw_fault(self) -> Optional[int]:
+        """Decide whether to inject a fault; returns the HTTP status or None."""
+        with self.lock:
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.stats["rate_limits_injected"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.stats["errors_injected"] += 1
+                return 500
+            return None
+
+    def delay(self) -> float:
+        """Seconds to wait before answering."""
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                delay += self.slow_latency
+            return delay
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Request handler for FakeOpenAIServer."""
+
+    server: FakeOpenAIServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        time.sleep(self.server.delay())
+
+        fault = self.server.draw_fault()
+        if fault == 429:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            {"Retry-After": "1"})
+            return
+        if fault == 500:
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        agent = detect_agent(payload)
+        content = build_content(agent, payload)
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in payload.get("messages", []))
+        completion_tokens = estimate_tokens(content)
+
+        max_tokens = payload.get("max_tokens")
+        finish_reason = "stop"
+        if max_tokens and completion_tokens > max_tokens:
+            # Mimic truncation at max_tokens
+            content = content[:max_tokens * 4]
+            completion_tokens = max_tokens
+            finish_reason = "length"
+
+        with self.server.lock:
+            stats = self.server.stats
+            stats["requests"] += 1
+            stats["by_agent"][agent] = stats["by_agent"].get(agent, 0) + 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = payload.get("model", "fake-model")
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        if payload.get("stream"):
+            self._stream(completion_id, model, content, finish_reason, usage)
+            return
+
+        if self.server.tokens_per_second:
+            time.sleep(completion_tokens / self.server.tokens_per_second)
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": usage
+        })
+
+    def _stream(self, completion_id: str, model: str, content: str, finish_reason: str, usage: Dict[str, int]):
+        """Send the content as server-sent event chunks of about one token."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            }
+
+        pieces = [content[i:i + 4] for i in range(0, len(content), 4)]
+        per_piece = 1 / self.server.tokens_per_second if self.server.tokens_per_second else 0
+
+        events = [chunk({"role": "assistant", "content": ""})]
+        events += [chunk({"content": piece}) for piece in pieces]
+        final = chunk({}, finish_reason)
+        final["usage"] = usage
+        events.append(final)
+
+        try:
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if per_piece:
+                    time.sleep(per_piece)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Local fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, 0..jitter seconds")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="generated tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds of a slow request")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Run the fake server in the foreground."""
+    args = parse_args()
+    server = FakeOpenAIServer(
+        args.host, args.port, args.latency, args.jitter, args.token_rate,
+        args.error_rate, args.rate_limit_rate, args.seed, args.slow_rate, args.slow_latency
+    )
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Request Hedging Benchmark
+
+Sends classifier calls to a fake OpenAI server where a small share of
+responses are very slow, first without and then with request hedging,
+and compares the latency percentiles and the extra calls hedging cost.
+
+    python benchmarks/hedging.py --calls 400 --slow-rate 0.03 --slow-latency 1.0
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+def run_calls(llm_client, calls: int, concurrency: int) -> List[float]:
+    """Send classifier calls; returns their latencies in seconds."""
+    def call(index: int) -> float:
+        start = time.time()
+        llm_client.generate_completion(
+            system_prompt="You are a task classifier.",
+            user_prompt=f"Classify this input: question {index}",
+            response_format="json_object",
+            agent="classifier"
+        )
+        return time.time() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(call, range(calls)))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare classifier tail latency with and without hedging")
+    parser.add_argument("--calls", type=int, default=400, help="Calls per run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent calls")
+    parser.add_argument("--latency", type=float, default=0.05, help="Normal response latency in seconds")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Share of very slow responses")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra seconds of a slow response")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run both configurations and print the comparison."""
+    args = parse_args(argv)
+
+    server = FakeOpenAIServer(
+        latency=args.latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency, seed=7
+    ).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["LLM_USER_CONCURRENCY"] = str(args.concurrency)
+    os.environ["LLM_USER_TOKENS_PER_MINUTE"] = "0"
+
+    from utils.llm_client import llm_client
+    from utils.hedging import hedger
+    from utils.metrics import llm_hedges_total
+
+    results: Dict[str, Any] = {}
+    hedged_agents = hedger.agents
+
+    try:
+        for name, agents in (("no hedging", ()), ("hedging", hedged_agents)):
+            hedger.agents = agents
+            if agents:
+                # Warm up the latency window so hedging is active from the first measured call
+                run_calls(llm_client, hedger.min_samples, args.concurrency)
+            sent_before = llm_hedges_total.get(agent="classifier", outcome="sent")
+            won_before = llm_hedges_total.get(agent="classifier", outcome="won")
+
+            latencies = run_calls(llm_client, args.calls, args.concurrency)
+            results[name] = {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": max(latencies),
+                "hedges": llm_hedges_total.get(agent="classifier", outcome="sent") - sent_before,
+                "won": llm_hedges_total.get(agent="classifier", outcome="won") - won_before
+            }
+    finally:
+        hedger.agents = hedged_agents
+        server.stop()
+
+    print("=" * 60)
+    print(f"Classifier latency, {args.calls} calls, {args.slow_rate:.0%} of responses {args.slow_latency:.1f}s slower")
+    print("=" * 60)
+    print(f"{'':<12}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}{'hedges':>10}{'won':>6}")
+    for name, row in results.items():
+        print(
+            f"{name:<12}{row['p50']:8.3f}{row['p95']:8.3f}{row['p99']:8.3f}{row['max']:8.3f}"
+            f"{row['hedges'] / args.calls:10.1%}{int(row['won']):6d}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Intent Matcher Corpus Check and Microbenchmark
+
+Run this script to verify the intent phrase engine against a bilingual
+test corpus and to time it against the previous per-call keyword scans.
+No API key is needed.
+
+    python benchmarks/intent_matching.py
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-offline")
+
+from utils.intent_matcher import intent_matcher
+from agents.task_classifier import task_classifier
+from agents.orchestrator import orchestrator
+
+
+# (input, expected fallback task type)
+CLASSIFICATION_CORPUS = [
+    ("yes", "quiz_generation"),
+    ("Yes!", "quiz_generation"),
+    ("y", "quiz_generation"),
+    ("Sure, let's do it", "quiz_generation"),
+    ("Give me a quiz on photosynthesis", "quiz_generation"),
+    ("نعم", "quiz_generation"),
+    ("أريد امتحان", "quiz_generation"),
+    ("الاختبار من فضلك", "quiz_generation"),
+    ("إختبار", "quiz_generation"),
+    ("hello there", "general_question"),
+    ("Hey BABA", "general_question"),
+    ("مرحبا", "general_question"),
+    ("السلام عليكم", "general_question"),
+    ("What is critical thinking?", "explanation"),
+    ("define sustainability", "explanation"),
+    ("ما هو التفكير النقدي؟", "explanation"),
+    ("ما هي الاستدامة", "explanation"),
+    ("How can I manage my time?", "general_question"),
+    ("كيف أنظم وقتي؟", "general_question"),
+    # Word boundaries: "hi" in "this", "ok" in "book", "test" in "latest"
+    ("this is about the book I read", "general_question"),
+    ("the latest research on economics", "general_question"),
+    ("Explain the concept of sustainability", "explanation"),
+    (
+        "The research is show that climate change effect economy and many people "
+        "in the region is worry about the future of there jobs and family income",
+        "writing_improvement"
+    ),
+]
+
+# (input, expected is_simple_affirmation, expected has_explicit_topic)
+QUIZ_FLOW_CORPUS = [
+    ("yes", True, False),
+    ("  OK ", True, False),
+    ("quiz", True, False),
+    ("اختبار", True, False),
+    ("أجل", True, False),
+    ("yes please", False, False),
+    ("quiz on photosynthesis", False, True),
+    ("Generate a quiz on the topic of AI", False, True),
+    ("اختبار عن الذكاء الاصطناعي", False, True),
+    ("test about cells", False, True),
+    ("take a test", False, False),
+]
+
+# (input, expected extracted topic)
+TOPIC_CORPUS = [
+    ("Generate a quiz on the topic of machine learning", "of machine learning"),
+    ("quiz on photosynthesis", "photosynthesis"),
+    ("Create quiz about the water cycle", "about water cycle"),
+    ("make a quiz on what is langgraph?", "what is langgraph"),
+    ("test on the French revolution!", "french revolution"),
+    ("اختبار عن الذكاء الاصطناعي", "الذكاء الاصطناعي"),
+    ("quiz", "quiz"),
+]
+
+
+def legacy_fallback_scan(user_input):
+    """The keyword scans the fallback classifier ran before the matcher."""
+    s = user_input.lower().strip()
+    is_quiz = any(x in s for x in ["quiz", "test", "exam", "اختبار", "امتحان",
+                                   "yes", "yeah", "ok", "sure", "نعم", "أجل", "موافق"])
+    is_quiz = is_quiz or s in ["yes", "yeah", "ok", "sure", "y", "نعم", "أجل", "موافق"]
+    is_academic = any(x in s for x in ["what is", "what are", "explain the concept", "define", "ما هو", "ما هي"])
+    is_general = any(x in s for x in ["how to", "how can", "how do", "advice", "help me", "hello", "hi",
+                                      "thanks", "كيف", "نصيحة", "مرحبا", "شكرا"])
+    is_greeting = any(x in s for x in ["hello", "hi", "hey", "good morning", "good evening", "مرحبا", "السلام"])
+    return is_quiz, is_academic, is_general, is_greeting
+
+
+def legacy_extract_topic(user_input):
+    """The str.replace / re.sub topic extraction used before the matcher."""
+    keywords = [
+        "generate a quiz on the topic", "generate quiz on the topic", "create a quiz on the topic",
+        "create quiz on the topic", "make a quiz on the topic", "make quiz on the topic",
+        "quiz on the topic", "test on the topic", "generate a quiz on", "generate quiz on",
+        "create a quiz on", "create quiz on", "make a quiz on", "make quiz on", "quiz on",
+        "quiz about", "test on", "test about", "generate quiz", "create quiz", "make quiz",
+        "اختبار عن", "اختبار حول",
+    ]
+    topic = user_input.lower()
+    for keyword in keywords:
+        topic = topic.replace(keyword, " ")
+    topic = " ".join(topic.split()).strip()
+    patterns = [r'what is \w+', r'what are \w+', r'how does \w+', r'how do \w+',
+                r'why is \w+', r'why are \w+', r'explain \w+']
+    if not any(re.search(p, topic) for p in patterns):
+        for word in ["generate", "create", "make", "quiz", "test", "exam", "the", "a", "an"]:
+            topic = re.sub(r'\b' + re.escape(word) + r'\b', '', topic)
+    topic = topic.replace("?", "").replace("!", "").replace(",", "")
+    topic = " ".join(topic.split()).strip()
+    return topic if len(topic) >= 3 else user_input
+
+
+def check_corpus():
+    """Check the matcher-based call sites against the corpus."""
+    failures = []
+
+    for text, expected in CLASSIFICATION_CORPUS:
+        actual = task_classifier._fallback_classification(text, "corpus")["task_type"]
+        if actual != expected:
+            failures.append(f"classify {text!r}: expected {expected}, got {actual}")
+
+    for text, affirmation, explicit in QUIZ_FLOW_CORPUS:
+        actual_affirmation = intent_matcher.matches_exactly(text, ["affirmation", "quiz_keyword"])
+        actual_explicit = "quiz_topic" in intent_matcher.intents(text)
+        if (actual_affirmation, actual_explicit) != (affirmation, explicit):
+            failures.append(
+                f"quiz flow {text!r}: expected {(affirmation, explicit)}, "
+                f"got {(actual_affirmation, actual_explicit)}"
+            )
+
+    for text, expected in TOPIC_CORPUS:
+        actual = orchestrator._extract_quiz_topic(text)
+        if actual != expected:
+            failures.append(f"topic {text!r}: expected {expected!r}, got {actual!r}")
+
+    return failures
+
+
+def run_benchmark(number=2000):
+    """Time the matcher against the legacy scans over the whole corpus."""
+    inputs = [text for text, _ in CLASSIFICATION_CORPUS]
+    topics = [text for text, _ in TOPIC_CORPUS]
+
+    timings = {
+        "fallback scan (legacy)": lambda: [legacy_fallback_scan(t) for t in inputs],
+        "fallback scan (matcher)": lambda: [intent_matcher.intents(t) for t in inputs],
+        "topic extraction (legacy)": lambda: [legacy_extract_topic(t) for t in topics],
+        "topic extraction (matcher)": lambda: [orchestrator._extract_quiz_topic(t) for t in topics],
+    }
+
+    results = {}
+    for name, func in timings.items():
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        calls = number * (len(inputs) if "fallback" in name else len(topics))
+        results[name] = seconds / calls * 1e6
+
+    return results
+
+
+def main():
+    """Run the corpus check and the microbenchmark."""
+    print("=" * 60)
+    print("Intent Matcher Corpus Check")
+    print("=" * 60)
+
+    failures = check_corpus()
+    total = len(CLASSIFICATION_CORPUS) + len(QUIZ_FLOW_CORPUS) + len(TOPIC_CORPUS)
+
+    for failure in failures:
+        print(f"✗ {failure}")
+
+    print(f"\n{total - len(failures)}/{total} corpus cases passed")
+
+    print("\n" + "=" * 60)
+    print("Microbenchmark (microseconds per input)")
+    print("=" * 60)
+
+    for name, micros in run_benchmark().items():
+        print(f"{name:.<40} {micros:8.2f} µs")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
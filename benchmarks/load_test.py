@@ -0,0 +1,528 @@
+"""
+Concurrent Multi-Session Load Test
+
+Simulates many students using one BABA process at the same time. Each
+simulated session has its own session_state and follows a realistic
+script (explanation -> "yes" quiz -> answers -> writing submission ->
+performance summary). Concurrency is ramped level by level while the
+latency distribution, error rate, thread count and memory are recorded,
+and the shared module-level objects are instrumented to show where
+sessions contend or leak into each other.
+
+    python benchmarks/load_test.py --levels 1,4,16 --latency 0.2
+    python benchmarks/load_test.py --backend real --levels 1,2 --sessions 2
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+
+TOPICS = [
+    "What is critical thinking?",
+    "ما هو التفكير النقدي؟",
+    "Explain the concept of sustainability",
+    "What is cultural diversity?",
+    "ما هي الاستدامة؟",
+    "Explain the concept of academic integrity",
+]
+
+WRITING_SAMPLES = [
+    "The research is show that climate change effect economy and many people in the region "
+    "is worry about the future of there jobs and family income in next years.",
+    "In my opinion the technology have change how students learn because they can finding "
+    "information more faster than before and this make them more independent learner.",
+]
+
+
+# Steps that send a user message through orchestrator.process_user_input
+MESSAGE_STEPS = ("explain", "quiz", "writing")
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(math.ceil(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class InstrumentedLock:
+    """Drop-in replacement for a threading.Lock that measures waiting time."""
+
+    def __init__(self, name: str, lock=None):
+        self.name = name
+        self.lock = lock or threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self.lock.acquire(blocking=False):
+            waited = 0.0
+        else:
+            start = time.perf_counter()
+            if not self.lock.acquire(blocking, timeout):
+                return False
+            waited = time.perf_counter() - start
+
+        with self.stats_lock:
+            self.acquisitions += 1
+            if waited:
+                self.contended += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+        return True
+
+    def release(self) -> None:
+        self.lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def report(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "contended": self.contended,
+                "wait_total_ms": self.wait_total * 1000,
+                "wait_max_ms": self.wait_max * 1000
+            }
+
+
+class ConcurrencyProbe:
+    """Counts how many sessions are inside a shared object's method at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, int] = {}
+        self.max_in_flight: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+
+    def wrap(self, obj: Any, method_name: str, label: str) -> None:
+        """Replace obj.method_name with a counting wrapper (instance attribute)."""
+        original = getattr(obj, method_name)
+        probe = self
+
+        def wrapper(*args, **kwargs):
+            with probe.lock:
+                probe.in_flight[label] = probe.in_flight.get(label, 0) + 1
+                probe.calls[label] = probe.calls.get(label, 0) + 1
+                probe.max_in_flight[label] = max(probe.max_in_flight.get(label, 0), probe.in_flight[label])
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with probe.lock:
+                    probe.in_flight[label] -= 1
+
+        setattr(obj, method_name, wrapper)
+
+    def report(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                label: {"calls": self.calls[label], "max_concurrent": self.max_in_flight.get(label, 0)}
+                for label in sorted(self.calls)
+            }
+
+
+def state_fingerprint(obj: Any) -> Dict[str, str]:
+    """Summarize an object's attributes so mutations can be detected."""
+    fingerprint = {}
+    for name, value in vars(obj).items():
+        if callable(value) or isinstance(value, (InstrumentedLock, type(threading.Lock()))):
+            continue
+        if isinstance(value, (dict, list, set, tuple)):
+            fingerprint[name] = f"{type(value).__name__}[{len(value)}]#{hash(repr(value)[:2000])}"
+        else:
+            fingerprint[name] = repr(value)[:200]
+    return fingerprint
+
+
+class ResourceSampler:
+    """Samples thread count and memory in the background."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            sample = {"threads": threading.active_count(), "rss_mb": current_rss_mb() or 0.0}
+            if tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                sample["traced_mb"] = current / (1024 * 1024)
+                sample["traced_peak_mb"] = peak / (1024 * 1024)
+            self.samples.append(sample)
+            self.stop_event.wait(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        self.thread.join()
+
+    def peak(self, key: str) -> Optional[float]:
+        values = [s[key] for s in self.samples if key in s]
+        return max(values) if values else None
+
+
+def run_session(session_id: int, rng: random.Random, components: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one simulated student session, as app.py would drive it.
+
+    Args:
+        session_id: Index of the session
+        rng: Random generator for this session
+        components: The shared objects (orchestrator, message_history)
+
+    Returns:
+        Dictionary with per-step records and detected cross-session leaks
+    """
+    orchestrator = components["orchestrator"]
+    message_history = components["message_history"]
+
+    session_state: Dict[str, Any] = {"quiz_history": []}
+    records = []
+    leaks = []
+    sent_messages = []
+
+    def step(name: str, func, *args):
+        start = time.perf_counter()
+        error = None
+        try:
+            result = func(*args)
+            if isinstance(result, dict) and result.get("error"):
+                error = result["error"]
+        except Exception as e:
+            result = None
+            error = str(e)
+        records.append({"step": name, "latency": time.perf_counter() - start, "error": error})
+        return result
+
+    def send(name: str, message: str):
+        message_history.add_message(session_state, message)
+        sent_messages.append(message)
+        return step(name, orchestrator.process_user_input, message, session_state)
+
+    topic = rng.choice(TOPICS)
+    send("explain", topic)
+
+    quiz_result = send("quiz", rng.choice(["yes", "Yes!", "نعم", "quiz"]))
+    quiz = ((quiz_result or {}).get("main_result") or {}).get("data") or {}
+    for index, question in enumerate(quiz.get("questions", [])):
+        answer = rng.randrange(len(question.get("options", [])) or 1)
+        checked = step("answer", orchestrator.check_quiz_answer, index, answer, quiz)
+        if checked:
+            session_state["quiz_history"].append({"is_correct": checked.get("is_correct", False)})
+
+    send("writing", rng.choice(WRITING_SAMPLES))
+    step("performance", orchestrator.analyze_session_performance, session_state)
+
+    # Another session's data showing up here means state is shared between sessions
+    if session_state.get("last_topic") not in (topic, "writing improvement"):
+        leaks.append(f"session {session_id}: last_topic is {session_state.get('last_topic')!r}, expected {topic!r}")
+    foreign = [m for m in message_history.get_recent_messages(session_state) if m not in sent_messages]
+    if foreign:
+        leaks.append(f"session {session_id}: message_history contains {len(foreign)} message(s) from other sessions")
+
+    return {"records": records, "leaks": leaks}
+
+
+def run_level(concurrency: int, sessions: int, ramp: float, seed: int, components: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one concurrency level.
+
+    Args:
+        concurrency: Sessions running at the same time
+        sessions: Total sessions to run at this level
+        ramp: Seconds over which the first wave of sessions is started
+        seed: Random seed
+        components: The shared objects
+
+    Returns:
+        Results for this level
+    """
+    results: List[Dict[str, Any]] = []
+    results_lock = threading.Lock()
+
+    def worker(session_id: int):
+        # Stagger the first wave so sessions do not all start in the same instant
+        if session_id < concurrency and ramp:
+            time.sleep(ramp * session_id / concurrency)
+        outcome = run_session(session_id, random.Random(seed * 1000 + session_id), components)
+        with results_lock:
+            results.append(outcome)
+
+    with ResourceSampler() as sampler:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as pool:
+            list(pool.map(worker, range(sessions)))
+        wall_time = time.perf_counter() - start
+
+    records = [r for outcome in results for r in outcome["records"]]
+    # Headline percentiles cover the user messages; answer checks are local
+    latencies = [r["latency"] for r in records if r["step"] in MESSAGE_STEPS]
+    errors = [r for r in records if r["error"]]
+
+    by_step = {}
+    for step_name in sorted({r["step"] for r in records}):
+        step_latencies = [r["latency"] for r in records if r["step"] == step_name]
+        by_step[step_name] = {
+            "count": len(step_latencies),
+            "p50_ms": percentile(step_latencies, 50) * 1000,
+            "p95_ms": percentile(step_latencies, 95) * 1000
+        }
+
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "requests": len(latencies),
+        "wall_time_s": wall_time,
+        "throughput_rps": len(latencies) / wall_time if wall_time else None,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+        "error_rate": len(errors) / len(records) if records else 0.0,
+        "sample_errors": sorted({r["error"][:120] for r in errors})[:5],
+        "peak_threads": sampler.peak("threads"),
+        "peak_rss_mb": sampler.peak("rss_mb"),
+        "peak_traced_mb": sampler.peak("traced_peak_mb"),
+        "by_step": by_step,
+        "leaks": [leak for outcome in results for leak in outcome["leaks"]]
+    }
+
+
+def instrument(components: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Instrument the shared objects for contention reporting.
+
+    Args:
+        components: The shared objects
+
+    Returns:
+        Dictionary with the probe, the instrumented locks and the initial
+        state fingerprints
+    """
+    from utils.token_estimator import token_budgets
+    from prompts.registry import prompt_registry
+    from utils.metrics import metrics
+    from utils.tracing import tracer
+
+    locks = {
+        "token_budgets.lock": InstrumentedLock("token_budgets.lock"),
+        "prompt_registry.lock": InstrumentedLock("prompt_registry.lock"),
+        "tracer.export_lock": InstrumentedLock("tracer.export_lock"),
+        "wire_stats.lock": InstrumentedLock("wire_stats.lock"),
+    }
+    token_budgets.lock = locks["token_budgets.lock"]
+    prompt_registry.lock = locks["prompt_registry.lock"]
+    tracer.export_lock = locks["tracer.export_lock"]
+    components["wire_stats"].lock = locks["wire_stats.lock"]
+
+    # Each metric keeps its own lock; they are reported together
+    for metric in metrics.metrics.values():
+        metric.lock = InstrumentedLock(metric.name)
+    locks["metrics (all metric locks)"] = [metric.lock for metric in metrics.metrics.values()]
+
+    probe = ConcurrencyProbe()
+    probe.wrap(components["orchestrator"], "process_user_input", "orchestrator.process_user_input")
+    probe.wrap(components["llm_client"], "_chat", "llm_client._chat")
+    probe.wrap(components["message_history"], "add_message", "message_history.add_message")
+
+    shared = {
+        name: components[name]
+        for name in ("orchestrator", "llm_client", "message_history", "task_classifier", "wire_stats")
+    }
+
+    return {
+        "probe": probe,
+        "locks": locks,
+        "shared": shared,
+        "fingerprints": {name: state_fingerprint(obj) for name, obj in shared.items()}
+    }
+
+
+def contention_report(instrumentation: Dict[str, Any]) -> Dict[str, Any]:
+    """Summarize lock waits, concurrent entries and shared state mutations."""
+    locks = {}
+    for name, lock in instrumentation["locks"].items():
+        if isinstance(lock, list):
+            reports = [item.report() for item in lock]
+            locks[name] = {
+                "acquisitions": sum(r["acquisitions"] for r in reports),
+                "contended": sum(r["contended"] for r in reports),
+                "wait_total_ms": sum(r["wait_total_ms"] for r in reports),
+                "wait_max_ms": max((r["wait_max_ms"] for r in reports), default=0.0)
+            }
+        else:
+            locks[name] = lock.report()
+
+    mutated = {}
+    for name, obj in instrumentation["shared"].items():
+        before = instrumentation["fingerprints"][name]
+        after = state_fingerprint(obj)
+        changed = sorted(attr for attr in set(before) | set(after) if before.get(attr) != after.get(attr))
+        if changed:
+            mutated[name] = changed
+
+    return {
+        "locks": locks,
+        "concurrent_entries": instrumentation["probe"].report(),
+        "shared_state_mutated": mutated
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print the load test results."""
+    print("=" * 100)
+    print(f"Load Test ({report['backend']} backend)")
+    print("=" * 100)
+    print(f"{'conc':>5} {'sess':>5} {'req':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'err %':>6} {'threads':>8} {'rss MB':>8} {'leaks':>6}")
+
+    for level in report["levels"]:
+        print(f"{level['concurrency']:>5} {level['sessions']:>5} {level['requests']:>6} "
+              f"{level['throughput_rps']:>8.2f} {level['p50_ms']:>9.1f} {level['p95_ms']:>9.1f} "
+              f"{level['p99_ms']:>9.1f} {level['error_rate'] * 100:>6.1f} {level['peak_threads']:>8} "
+              f"{(level['peak_rss_mb'] or 0):>8.1f} {len(level['leaks']):>6}")
+        for error in level["sample_errors"]:
+            print(f"      error: {error}")
+
+    contention = report["contention"]
+    print("\nLock contention:")
+    for name, stats in contention["locks"].items():
+        print(f"  {name:<30} {stats['acquisitions']:>8} acquisitions  {stats['contended']:>6} contended  "
+              f"wait total {stats['wait_total_ms']:8.2f} ms  max {stats['wait_max_ms']:7.2f} ms")
+
+    print("\nMaximum sessions inside one shared object at once:")
+    for name, stats in contention["concurrent_entries"].items():
+        print(f"  {name:<36} {stats['max_concurrent']:>4}  ({stats['calls']} calls)")
+
+    print("\nShared module-level state mutated by requests:")
+    if contention["shared_state_mutated"]:
+        for name, attrs in contention["shared_state_mutated"].items():
+            print(f"  {name}: {', '.join(attrs)}")
+    else:
+        print("  none")
+
+    leaks = [leak for level in report["levels"] for leak in level["leaks"]]
+    print(f"\nCross-session leaks detected: {len(leaks)}")
+    for leak in leaks[:10]:
+        print(f"  {leak}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Concurrent multi-session load test of the orchestrator")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrency levels")
+    parser.add_argument("--sessions", type=int, default=None, help="sessions per level (default: 2 x level)")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds to start the first wave of sessions")
+    parser.add_argument("--backend", choices=["fake", "real"], default="fake")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="fake server extra random latency")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="fake tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fake share of 429 responses")
+    parser.add_argument("--tracemalloc", action="store_true", help="track Python allocations (slower)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="write the report as JSON to this file")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Run the load test."""
+    args = parse_args()
+    levels = [int(level) for level in args.levels.split(",") if level.strip()]
+
+    server = None
+    if args.backend == "fake":
+        server = FakeOpenAIServer(
+            latency=args.latency, jitter=args.jitter, tokens_per_second=args.token_rate,
+            error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed
+        ).start()
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "load-test-offline")
+    os.environ.setdefault("METRICS_PORT", "0")
+
+    # Outside "streamlit run", st.session_state is one process-wide object
+    # and every access warns about it; the warnings would drown the report
+    # (the app itself does not log, so nothing of ours is hidden)
+    logging.disable(logging.WARNING)
+
+    from agents.orchestrator import orchestrator
+    from agents.task_classifier import task_classifier
+    from utils.llm_client import llm_client
+    from utils.message_history import message_history
+    from utils.wire_schema import wire_stats
+
+    components = {
+        "orchestrator": orchestrator,
+        "llm_client": llm_client,
+        "message_history": message_history,
+        "task_classifier": task_classifier,
+        "wire_stats": wire_stats,
+    }
+    instrumentation = instrument(components)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    report = {"backend": args.backend, "settings": vars(args), "levels": []}
+    for concurrency in levels:
+        sessions = args.sessions or concurrency * 2
+        print(f"Running {sessions} sessions at concurrency {concurrency}...", flush=True)
+        report["levels"].append(run_level(concurrency, sessions, args.ramp, args.seed, components))
+
+    report["contention"] = contention_report(instrumentation)
+    if server is not None:
+        report["server"] = server.get_stats()
+        server.stop()
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nReport saved to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Offline Pipeline Benchmark
+
+Drives orchestrator.process_user_input over a bilingual workload mix
+against the local fake OpenAI server, so the pipeline's own overhead can
+be measured without network access or an API key. Reports throughput,
+p50/p95/p99 latency and LLM calls per request, and saves the results as
+JSON so runs can be compared across commits.
+
+    python benchmarks/run_benchmark.py --requests 200 --latency 0.05
+    python benchmarks/run_benchmark.py --compare benchmarks/results/<earlier>.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+from fake_openai_server import FakeOpenAIServer
+
+
+# (weight, conversation script) - each message is one measured request
+WORKLOAD = [
+    (3, ["What is critical thinking?", "yes"]),
+    (2, ["ما هو التفكير النقدي؟", "نعم"]),
+    (2, ["Explain the concept of sustainability"]),
+    (3, ["How can I manage my time better during exams?", "What about group projects?"]),
+    (2, ["كيف أنظم وقتي أثناء الامتحانات؟"]),
+    (2, [
+        "The research is show that climate change effect economy and many people in the "
+        "region is worry about the future of there jobs and family income in next years"
+    ]),
+    (2, ["Give me a quiz on photosynthesis"]),
+    (1, ["Hello BABA", "Can you give me career advice?", "How do I write a good essay?"]),
+]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(math.ceil(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def git_commit() -> Optional[str]:
+    """Get the current commit hash, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(BENCHMARK_DIR), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_script(orchestrator, script: List[str]) -> List[Dict[str, Any]]:
+    """
+    Run one conversation in a fresh session.
+
+    Args:
+        orchestrator: The orchestrator instance
+        script: User messages in order
+
+    Returns:
+        One record per message with latency, task type and error
+    """
+    session_state: Dict[str, Any] = {}
+    records = []
+
+    for message in script:
+        start = time.perf_counter()
+        result = orchestrator.process_user_input(message, session_state)
+        elapsed = time.perf_counter() - start
+
+        records.append({
+            "latency": elapsed,
+            "task_type": (result.get("classification") or {}).get("task_type", "none"),
+            "error": result.get("error")
+        })
+
+    return records
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Start the fake server, run the workload and collect the results.
+
+    Args:
+        args: Parsed command-line options
+
+    Returns:
+        Benchmark results dictionary
+    """
+    server = FakeOpenAIServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.token_rate,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    ).start()
+
+    # Configuration is read at import, so point it at the server first
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-offline")
+    os.environ.setdefault("TRACE_EXPORT_PATH", "")
+    os.environ.setdefault("METRICS_PORT", "0")
+
+    from agents.orchestrator import orchestrator
+    from utils.llm_client import llm_client
+
+    llm_client.retry_delay = args.retry_delay
+
+    rng = random.Random(args.seed)
+    weights = [weight for weight, _ in WORKLOAD]
+    scripts = []
+    messages = 0
+    while messages < args.requests:
+        script = rng.choices([s for _, s in WORKLOAD], weights=weights)[0]
+        scripts.append(script)
+        messages += len(script)
+
+    # Warm-up (imports, connection pool) is not measured
+    run_script(orchestrator, WORKLOAD[0][1])
+    server.reset_stats()
+
+    start = time.perf_counter()
+    records: List[Dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for script_records in pool.map(lambda s: run_script(orchestrator, s), scripts):
+            records.extend(script_records)
+    wall_time = time.perf_counter() - start
+
+    server_stats = server.get_stats()
+    server.stop()
+
+    latencies = [r["latency"] for r in records]
+    errors = [r for r in records if r["error"]]
+
+    by_task_type: Dict[str, Dict[str, Any]] = {}
+    for task_type in sorted({r["task_type"] for r in records}):
+        task_latencies = [r["latency"] for r in records if r["task_type"] == task_type]
+        by_task_type[task_type] = {
+            "requests": len(task_latencies),
+            "p50_ms": percentile(task_latencies, 50) * 1000,
+            "p95_ms": percentile(task_latencies, 95) * 1000
+        }
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {
+            "requests": len(records),
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "token_rate": args.token_rate,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "retry_delay": args.retry_delay,
+            "seed": args.seed
+        },
+        "results": {
+            "wall_time_s": wall_time,
+            "throughput_rps": len(records) / wall_time if wall_time else None,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+            "mean_ms": sum(latencies) / len(latencies) * 1000,
+            "error_rate": len(errors) / len(records),
+            "llm_calls_per_request": server_stats["requests"] / len(records),
+            "prompt_tokens_per_request": server_stats["prompt_tokens"] / len(records),
+            "completion_tokens_per_request": server_stats["completion_tokens"] / len(records)
+        },
+        "by_task_type": by_task_type,
+        "server": server_stats
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """Print the results, with the change against a baseline run if given."""
+    print("=" * 60)
+    print(f"Pipeline Benchmark ({report['settings']['requests']} requests, "
+          f"commit {report['commit'] or 'unknown'})")
+    print("=" * 60)
+
+    for name, value in report["results"].items():
+        line = f"{name:.<36} {value:12.3f}"
+        if baseline and isinstance(baseline["results"].get(name), (int, float)) and baseline["results"][name]:
+            change = (value - baseline["results"][name]) / baseline["results"][name]
+            line += f"   ({change:+.1%} vs {baseline.get('commit') or 'baseline'})"
+        print(line)
+
+    print("\nBy task type:")
+    for task_type, stats in report["by_task_type"].items():
+        print(f"  {task_type:<22} {stats['requests']:5d} req   "
+              f"p50 {stats['p50_ms']:8.2f} ms   p95 {stats['p95_ms']:8.2f} ms")
+
+    print("\nLLM calls by agent:", report["server"]["by_agent"])
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Offline benchmark of the BABA pipeline")
+    parser.add_argument("--requests", type=int, default=200, help="number of user messages to process")
+    parser.add_argument("--concurrency", type=int, default=1, help="conversations run in parallel")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, 0..jitter seconds")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="fake tokens per second (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of calls answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of calls answered with 429")
+    parser.add_argument("--retry-delay", type=float, default=0.0, help="LLMClient retry delay in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    return parser.parse_args(argv)
+
+
+def main() -> int:
+    """Run the benchmark and save the results."""
+    args = parse_args()
+    report = run(args)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+
+    output = args.output
+    if output is None:
+        results_dir = os.path.join(BENCHMARK_DIR, "results")
+        os.makedirs(results_dir, exist_ok=True)
+        output = os.path.join(results_dir, f"{report['commit'] or 'local'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResults saved to {output}")
+
+    return 1 if report["results"]["error_rate"] > 0 and not (args.error_rate or args.rate_limit_rate) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
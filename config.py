@@ -15,15 +15,157 @@ class Config:
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. a local fake server for benchmarks
+
+    # LLM endpoint pool: ";"-separated endpoints, each comma-separated
+    # key=value pairs of url, key, model, weight and name, e.g.
+    # "url=https://api.openai.com/v1,key=sk-a,weight=2;url=http://127.0.0.1:8080/v1,key=none,model=llama3"
+    # Missing values fall back to the OPENAI_* settings above; empty means a
+    # single endpoint made of them
+    LLM_ENDPOINTS = [
+        {key.strip(): value.strip() for key, value in (item.split("=", 1) for item in entry.split(",") if "=" in item)}
+        for entry in os.getenv("LLM_ENDPOINTS", "").split(";") if entry.strip()
+    ]
+    # Consecutive failures that take an endpoint out of rotation, and for how long
+    LLM_ENDPOINT_EJECT_FAILURES = int(os.getenv("LLM_ENDPOINT_EJECT_FAILURES", "3"))
+    LLM_ENDPOINT_EJECT_SECONDS = float(os.getenv("LLM_ENDPOINT_EJECT_SECONDS", "30"))
+
+    # HTTP transport of the OpenAI clients (one connection pool per endpoint):
+    # connection limit, idle connections kept alive and for how long, HTTP/2
+    # (needs the h2 package), and connect / read / pool-wait timeouts in seconds
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP2 = os.getenv("HTTP2", "False").lower() == "true"
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+
+    # Request hedging: agent profiles whose slow calls get a duplicate once
+    # they run past the profile's observed p95 latency (empty disables it),
+    # the largest share of their calls that may be duplicated, the shortest
+    # wait before hedging, and the latencies needed before hedging starts
+    LLM_HEDGE_AGENTS = tuple(agent.strip() for agent in os.getenv("LLM_HEDGE_AGENTS", "classifier").split(",") if agent.strip())
+    LLM_HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", "0.05"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.1"))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+    # Classification micro-batching: seconds a classification waits for
+    # concurrent ones to share its LLM call, and the most inputs per call
+    # (1 disables batching). A classification with no other call in flight
+    # is sent alone right away.
+    CLASSIFIER_BATCH_WINDOW = float(os.getenv("CLASSIFIER_BATCH_WINDOW", "0.01"))
+    CLASSIFIER_BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "8"))
 
     # Application Settings
     APP_TITLE = os.getenv("APP_TITLE", "BABA - Bilingual Academic Bridge Agent")
     DEBUG_MODE = os.getenv("DEBUG_MODE", "False").lower() == "true"
 
     # Agent Settings
-    MAX_TOKENS = 1500
+    MAX_TOKENS = 1500  # Used when no per-agent token budget policy applies
     TEMPERATURE = 0.7
 
+    # Size max_tokens per agent from input length and observed outputs
+    ADAPTIVE_MAX_TOKENS = os.getenv("ADAPTIVE_MAX_TOKENS", "True").lower() == "true"
+
+    # Seconds one user input may take end to end (0 disables the deadline)
+    REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "120"))
+
+    # Conversation Context Settings
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000"))
+    CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "4"))
+    CONTEXT_SUMMARY_EVERY = int(os.getenv("CONTEXT_SUMMARY_EVERY", "6"))
+
+    # Structured Outputs (schema-constrained JSON) for models that support it
+    STRUCTURED_OUTPUTS = os.getenv("STRUCTURED_OUTPUTS", "True").lower() == "true"
+    STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+    # Prompt Variant Selection
+    PROMPT_EXPLORE_RATE = float(os.getenv("PROMPT_EXPLORE_RATE", "0.1"))  # Traffic share for untested variants
+    PROMPT_MIN_SAMPLES = int(os.getenv("PROMPT_MIN_SAMPLES", "30"))
+    PROMPT_MAX_FAILURE_RATE = float(os.getenv("PROMPT_MAX_FAILURE_RATE", "0.05"))
+    # Pin variants per agent, e.g. "classifier=compact,explainer=default"
+    PROMPT_VARIANTS = dict(
+        item.split("=", 1) for item in os.getenv("PROMPT_VARIANTS", "").split(",") if "=" in item
+    )
+
+    # Tracing: JSONL file finished traces are appended to (empty disables export)
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+    # Metrics endpoint (Prometheus text format at /metrics; port 0 disables it)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
+    # LLM scheduler: calls in flight at once (0 disables scheduling), calls in
+    # flight per session, tokens per minute per session (0 disables the quota),
+    # and the input size (estimated tokens) up to which a request is interactive
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_USER_CONCURRENCY = int(os.getenv("LLM_USER_CONCURRENCY", "2"))
+    LLM_USER_TOKENS_PER_MINUTE = int(os.getenv("LLM_USER_TOKENS_PER_MINUTE", "40000"))
+    INTERACTIVE_MAX_INPUT_TOKENS = int(os.getenv("INTERACTIVE_MAX_INPUT_TOKENS", "30"))
+
+    # Small talk: answer greetings, thanks and farewells from local templates
+    # instead of classifying them and calling the LLM
+    SMALL_TALK_FAST_PATH = os.getenv("SMALL_TALK_FAST_PATH", "True").lower() == "true"
+
+    # Follow-up prefetching: suggestions answered ahead per General Q&A answer
+    # (0 disables it), seconds a prefetched answer stays usable, tokens per
+    # minute all prefetching may spend, and its worker threads and backlog
+    PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "2"))
+    PREFETCH_TTL = int(os.getenv("PREFETCH_TTL", "600"))
+    PREFETCH_TOKENS_PER_MINUTE = int(os.getenv("PREFETCH_TOKENS_PER_MINUTE", "20000"))
+    PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+    PREFETCH_QUEUE_DEPTH = int(os.getenv("PREFETCH_QUEUE_DEPTH", "16"))
+
+    # LLM circuit breaker: recent calls considered, calls needed before it can
+    # open, share of failed or slow calls that opens it (0 disables it), what
+    # counts as slow (seconds plus the time to generate the call's completion
+    # tokens at the given rate, so long generations are not slow by length
+    # alone), and seconds between recovery probes while open
+    LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+    LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+    LLM_BREAKER_FAILURE_RATE = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+    LLM_BREAKER_SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "30"))
+    LLM_BREAKER_SLOW_TOKENS_PER_SECOND = float(os.getenv("LLM_BREAKER_SLOW_TOKENS_PER_SECOND", "20"))
+    LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "15"))
+
+    # Agent response cache (served when degraded): entries kept, seconds
+    # they are fresh, and seconds they may still be served stale
+    RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "500"))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_STALE_TTL = int(os.getenv("RESPONSE_CACHE_STALE_TTL", "86400"))
+
+    # Job queue: worker threads processing requests, jobs allowed to wait
+    # (more are shed), and seconds finished jobs stay retrievable
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "32"))
+    JOB_RETENTION = int(os.getenv("JOB_RETENTION", "600"))
+
+    # Headless API server (api_server.py): requests processed at once, requests
+    # allowed to wait for a slot and for how long, and idle session lifetime
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "8"))
+    API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "32"))
+    API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+    API_SESSION_TTL = int(os.getenv("API_SESSION_TTL", "3600"))
+
+    # Session store for conversations and session state: "sqlite" (a WAL-mode
+    # database file that survives restarts) or "memory", seconds an idle
+    # session is kept (0 keeps them), messages loaded per page (the latest
+    # page when a session is opened), and messages the memory store keeps
+    # per session
+    SESSION_STORE = os.getenv("SESSION_STORE", "sqlite")
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "baba_sessions.db")
+    SESSION_TTL = int(os.getenv("SESSION_TTL", "604800"))
+    SESSION_PAGE_SIZE = int(os.getenv("SESSION_PAGE_SIZE", "20"))
+    SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+
+    # LLM call cassettes: "off", "record" (store responses) or "replay" (serve
+    # stored responses offline and fail on unrecorded requests)
+    LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+    LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm_calls.json")
+
     # UI Settings
     PAGE_ICON = "🎓"
     LAYOUT = "wide"
@@ -31,6 +173,9 @@ class Config:
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
+        if cls.LLM_CASSETTE_MODE == "replay":
+            # Replayed calls never reach the API
+            return True
         if not cls.OPENAI_API_KEY or cls.OPENAI_API_KEY == "your_openai_api_key_here":
             raise ValueError(
                 "OPENAI_API_KEY not set! Please add your API key to the .env file."
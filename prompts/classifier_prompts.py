@@ -48,13 +48,13 @@ Classification Priority:
 - If asking for a quiz/test → "quiz_generation"
 - Otherwise (advice, how-to, greetings, general chat) → "general_question"
 
-You must respond ONLY with valid JSON in this exact format:
-{
-    "task_type": "explanation" or "writing_improvement" or "quiz_generation" or "general_question",
-    "confidence": 0.0 to 1.0,
-    "detected_language": "ar" or "en" or "mixed",
-    "reasoning": "brief explanation of classification"
-}
+You must respond ONLY with minified JSON (no spaces or line breaks) using these keys:
+t = task type: "explanation", "writing_improvement", "quiz_generation" or "general_question"
+cf = confidence, 0.0 to 1.0
+l = detected language: "ar", "en" or "mixed"
+r = brief reasoning for the classification
+
+Example: {"t":"explanation","cf":0.9,"l":"en","r":"Asks what a concept means"}
 
 Be confident in your classification. If the input is ambiguous, choose the most likely option based on context."""
 
@@ -62,4 +62,28 @@ CLASSIFIER_USER_PROMPT_TEMPLATE = """Classify the following user input:
 
 Input: {user_input}
 
-Respond with JSON only."""
+Respond with minified JSON only."""
+
+# Compact variant: same labels and output keys, a single example per label
+CLASSIFIER_SYSTEM_PROMPT_COMPACT = """Classify a student's message for BABA, a bilingual (Arabic-English) academic assistant.
+
+Labels:
+explanation - wants a specific academic concept explained ("What is critical thinking?", "ما هو التفكير النقدي؟")
+writing_improvement - gives text to check, improve or rewrite
+quiz_generation - asks for a quiz/test/exam, or says yes/ok/sure/نعم to a quiz offer
+general_question - advice, how-to, greetings or chat ("How do I organize my time?", "مرحبا")
+
+Reply with minified JSON only: {"t":label,"cf":0.0-1.0,"l":"ar"|"en"|"mixed","r":brief reason}"""
+
+# Batched classification: appended to the system prompt of either variant
+# when several concurrent inputs are classified in one call
+CLASSIFIER_BATCH_INSTRUCTIONS = """
+
+Several inputs may be sent at once as a numbered list. Classify each input on its own, then reply with minified JSON only: {"rs":[...]} with one object per input, in the same order, using the keys above plus i = the input's number.
+Example: {"rs":[{"i":1,"t":"explanation","cf":0.9,"l":"en","r":"Asks what a concept means"},{"i":2,"t":"general_question","cf":0.8,"l":"ar","r":"Greeting"}]}"""
+
+CLASSIFIER_BATCH_USER_PROMPT_TEMPLATE = """Classify each of the following {count} user inputs:
+
+{inputs}
+
+Respond with minified JSON only."""
@@ -0,0 +1,22 @@
+"""
+Conversation Context Prompts.
+
+Prompts for compressing older conversation turns into a rolling summary.
+"""
+
+CONTEXT_SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a tutoring conversation between a bilingual (Arabic-English) student and BABA, an academic assistant.
+
+Guidelines:
+- Keep the topics, concepts and questions the student asked about
+- Keep facts the student shared about themselves (course, goals, difficulties)
+- Keep what BABA explained or recommended, in a few words per point
+- Drop greetings, small talk and repeated information
+- Write in English, in at most 120 words, as plain text"""
+
+CONTEXT_SUMMARY_USER_PROMPT_TEMPLATE = """Current summary:
+{summary}
+
+New conversation turns to fold into the summary:
+{turns}
+
+Write the updated summary."""
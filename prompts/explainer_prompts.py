@@ -14,18 +14,18 @@ Guidelines:
 - Use proper academic terminology
 - Be encouraging and supportive
 
-You must respond ONLY with valid JSON in this exact format:
-{
-    "english_explanation": "Clear academic explanation in English",
-    "arabic_explanation": "الشرح الأكاديمي الواضح بالعربية",
-    "gulf_example": "Specific example relevant to Kuwait/Gulf context",
-    "key_terms": ["term1", "term2"],
-    "suggested_next_step": "What the student should do next"
-}"""
+You must respond ONLY with minified JSON (no spaces or line breaks) using these keys:
+en = clear academic explanation in English
+ar = equivalent academic explanation in Arabic
+ex = specific example relevant to Kuwait/Gulf context
+kt = list of key terms
+nx = what the student should do next
+
+Example: {"en":"...","ar":"...","ex":"...","kt":["term1","term2"],"nx":"..."}"""
 
 EXPLAINER_USER_PROMPT_TEMPLATE = """Explain the following concept or term to a university student:
 
 Concept: {user_input}
 
 Provide a bilingual academic explanation with a Gulf-region example.
-Respond with JSON only."""
+Respond with minified JSON only."""
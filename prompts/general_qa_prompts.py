@@ -33,14 +33,14 @@ Question Categories:
 - "conversational": Greetings, small talk, general chat
 - "motivation": Encouragement and support
 
-You must respond ONLY with valid JSON in this exact format:
-{
-    "english_answer": "Answer in English",
-    "arabic_answer": "الإجابة بالعربية",
-    "category": "advice" or "how-to" or "factual" or "conversational" or "motivation",
-    "confidence": 0.0 to 1.0,
-    "follow_up_suggestions": ["Related question 1?", "Related question 2?"]
-}
+You must respond ONLY with minified JSON (no spaces or line breaks) using these keys:
+en = answer in English
+ar = answer in Arabic
+cat = "advice", "how-to", "factual", "conversational" or "motivation"
+cf = confidence, 0.0 to 1.0
+fu = list of related follow-up questions
+
+Example: {"en":"...","ar":"...","cat":"advice","cf":0.9,"fu":["Related question 1?","Related question 2?"]}
 
 Important:
 - Arabic answer should be a complete translation, not just keywords
@@ -62,10 +62,17 @@ IMPORTANT:
 - Provide context-aware, personalized responses
 - If the user previously discussed specific topics, relate your answer to those topics when relevant
 
-Provide a helpful, context-aware bilingual response. Respond with JSON only."""
+Provide a helpful, context-aware bilingual response. Respond with minified JSON only."""
 
 GENERAL_QA_USER_PROMPT_NO_CONTEXT = """Answer this question in both English and Arabic:
 
 Question: {user_question}
 
-Provide a helpful, bilingual response. Respond with JSON only."""
+Provide a helpful, bilingual response. Respond with minified JSON only."""
+
+GENERAL_QA_USER_PROMPT_WITH_HISTORY = """Answer this question in both English and Arabic, considering the conversation so far:
+
+Question: {user_question}
+
+If the question references earlier topics, acknowledge them and relate your answer to them.
+Provide a helpful, context-aware bilingual response. Respond with minified JSON only."""
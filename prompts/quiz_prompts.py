@@ -15,25 +15,20 @@ Guidelines:
 - Ensure one clearly correct answer per question
 - Include distractors that test common misconceptions
 
-You must respond ONLY with valid JSON in this exact format:
-{
-    "questions": [
-        {
-            "question_en": "Question in English?",
-            "question_ar": "السؤال بالعربية؟",
-            "options": ["Option A", "Option B", "Option C"],
-            "options_ar": ["الخيار أ", "الخيار ب", "الخيار ج"],
-            "correct_answer": 0,
-            "explanation": "Why this is correct"
-        }
-    ]
-}
-
-The correct_answer is the index (0-based) of the correct option."""
+You must respond ONLY with minified JSON (no spaces or line breaks) using these keys:
+qs = list of questions, each with:
+  q = question in English
+  qa = question in Arabic
+  o = list of options in English
+  oa = list of options in Arabic
+  c = index (0-based) of the correct option
+  e = why this is correct
+
+Example: {"qs":[{"q":"Question?","qa":"السؤال؟","o":["A","B","C"],"oa":["أ","ب","ج"],"c":0,"e":"..."}]}"""
 
 QUIZ_USER_PROMPT_TEMPLATE = """Generate a short bilingual quiz based on this explanation:
 
 {explanation_content}
 
 Create 2 multiple-choice questions to test understanding.
-Respond with JSON only."""
+Respond with minified JSON only."""
@@ -0,0 +1,243 @@
+"""
+Prompt Registry.
+
+Versions every agent prompt, precomputes its token cost at import, and
+tracks latency and validation-failure rates per variant so that the
+cheapest variant that still passes the validators is the one served.
+"""
+
+import hashlib
+import random
+import threading
+from typing import Dict, Any, List, Optional
+from config import config
+from utils.token_estimator import token_estimator
+
+
+class PromptTemplate:
+    """A versioned system prompt plus its user prompt templates."""
+
+    def __init__(
+        self,
+        agent: str,
+        variant: str,
+        version: str,
+        system_prompt: str,
+        user_templates: Dict[str, str]
+    ):
+        """
+        Initialize a prompt template.
+
+        Args:
+            agent: Agent profile name
+            variant: Variant name (e.g. "default", "compact")
+            version: Version label of this variant
+            system_prompt: The system prompt text
+            user_templates: Named user prompt templates; "default" is required
+        """
+        self.agent = agent
+        self.variant = variant
+        self.version = version
+        self.system_prompt = system_prompt
+        self.user_templates = user_templates
+        self.fingerprint = hashlib.sha1(
+            (system_prompt + "".join(user_templates.values())).encode("utf-8")
+        ).hexdigest()[:8]
+
+        # Token cost, computed once
+        self.system_tokens = token_estimator.estimate(system_prompt)
+        self.user_template_tokens = {
+            name: token_estimator.estimate(template.split("{")[0])
+            for name, template in user_templates.items()
+        }
+
+        # Usage statistics
+        self.calls = 0
+        self.failures = 0
+        self.total_latency = 0.0
+
+    def user(self, name: str = "default") -> str:
+        """
+        Get a user prompt template by name.
+
+        Args:
+            name: Template name
+
+        Returns:
+            The template string
+        """
+        return self.user_templates[name]
+
+    @property
+    def failure_rate(self) -> float:
+        """Validation-failure rate observed so far."""
+        return self.failures / self.calls if self.calls else 0.0
+
+    @property
+    def average_latency(self) -> float:
+        """Average latency in seconds observed so far."""
+        return self.total_latency / self.calls if self.calls else 0.0
+
+
+class PromptRegistry:
+    """Registry of prompt variants per agent with cost-aware selection."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.templates: Dict[str, List[PromptTemplate]] = {}
+        self.lock = threading.Lock()
+
+    def register(
+        self,
+        agent: str,
+        system_prompt: str,
+        user_templates: Dict[str, str],
+        variant: str = "default",
+        version: str = "1"
+    ) -> PromptTemplate:
+        """
+        Register a prompt variant for an agent.
+
+        Args:
+            agent: Agent profile name
+            system_prompt: The system prompt text
+            user_templates: Named user prompt templates; "default" is required
+            variant: Variant name; the "default" variant is the baseline
+            version: Version label of this variant
+
+        Returns:
+            The registered PromptTemplate
+        """
+        template = PromptTemplate(agent, variant, version, system_prompt, user_templates)
+
+        with self.lock:
+            variants = [t for t in self.templates.get(agent, []) if t.variant != variant]
+            variants.append(template)
+            self.templates[agent] = variants
+
+        return template
+
+    def select(self, agent: str) -> PromptTemplate:
+        """
+        Choose the prompt variant to use for a request.
+
+        Variants with fewer than PROMPT_MIN_SAMPLES calls are tried on a
+        PROMPT_EXPLORE_RATE share of traffic. Among the variants with
+        enough samples, the one with the fewest system prompt tokens whose
+        failure rate stays within PROMPT_MAX_FAILURE_RATE wins; the default
+        variant is served otherwise.
+
+        Args:
+            agent: Agent profile name
+
+        Returns:
+            The selected PromptTemplate
+        """
+        with self.lock:
+            variants = self.templates[agent]
+
+            forced = config.PROMPT_VARIANTS.get(agent)
+            if forced:
+                for template in variants:
+                    if template.variant == forced:
+                        return template
+
+            default = next((t for t in variants if t.variant == "default"), variants[0])
+
+            untested = [t for t in variants if t is not default and t.calls < config.PROMPT_MIN_SAMPLES]
+            if untested and random.random() < config.PROMPT_EXPLORE_RATE:
+                return random.choice(untested)
+
+            proven = [
+                t for t in variants
+                if t.calls >= config.PROMPT_MIN_SAMPLES and t.failure_rate <= config.PROMPT_MAX_FAILURE_RATE
+            ]
+            if not proven:
+                return default
+
+            return min(proven, key=lambda t: t.system_tokens)
+
+    def record(self, template: PromptTemplate, latency: float, valid: bool) -> None:
+        """
+        Record the outcome of a call made with a template.
+
+        Args:
+            template: The template that was used
+            latency: Seconds the LLM call took
+            valid: Whether the first response passed validation
+        """
+        with self.lock:
+            template.calls += 1
+            template.total_latency += latency
+            if not valid:
+                template.failures += 1
+
+    def get_report(self, agent: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get token cost and usage statistics for every variant.
+
+        Args:
+            agent: Optional agent profile name; all agents when omitted
+
+        Returns:
+            Dictionary of agent -> list of variant statistics
+        """
+        with self.lock:
+            agents = [agent] if agent else list(self.templates.keys())
+            return {
+                name: [
+                    {
+                        "variant": t.variant,
+                        "version": t.version,
+                        "fingerprint": t.fingerprint,
+                        "system_tokens": t.system_tokens,
+                        "user_template_tokens": t.user_template_tokens,
+                        "calls": t.calls,
+                        "failure_rate": t.failure_rate,
+                        "average_latency": t.average_latency
+                    }
+                    for t in self.templates.get(name, [])
+                ]
+                for name in agents
+            }
+
+
+# Global instance
+prompt_registry = PromptRegistry()
+
+
+# Register the prompts of every agent at import
+from prompts.classifier_prompts import (  # noqa: E402
+    CLASSIFIER_SYSTEM_PROMPT,
+    CLASSIFIER_SYSTEM_PROMPT_COMPACT,
+    CLASSIFIER_USER_PROMPT_TEMPLATE,
+    CLASSIFIER_BATCH_USER_PROMPT_TEMPLATE
+)
+from prompts.explainer_prompts import EXPLAINER_SYSTEM_PROMPT, EXPLAINER_USER_PROMPT_TEMPLATE  # noqa: E402
+from prompts.writer_prompts import WRITER_SYSTEM_PROMPT, WRITER_USER_PROMPT_TEMPLATE  # noqa: E402
+from prompts.quiz_prompts import QUIZ_SYSTEM_PROMPT, QUIZ_USER_PROMPT_TEMPLATE  # noqa: E402
+from prompts.general_qa_prompts import (  # noqa: E402
+    GENERAL_QA_SYSTEM_PROMPT,
+    GENERAL_QA_USER_PROMPT_TEMPLATE,
+    GENERAL_QA_USER_PROMPT_NO_CONTEXT,
+    GENERAL_QA_USER_PROMPT_WITH_HISTORY
+)
+
+prompt_registry.register("classifier", CLASSIFIER_SYSTEM_PROMPT, {
+    "default": CLASSIFIER_USER_PROMPT_TEMPLATE,
+    "batch": CLASSIFIER_BATCH_USER_PROMPT_TEMPLATE
+})
+prompt_registry.register(
+    "classifier",
+    CLASSIFIER_SYSTEM_PROMPT_COMPACT,
+    {"default": CLASSIFIER_USER_PROMPT_TEMPLATE, "batch": CLASSIFIER_BATCH_USER_PROMPT_TEMPLATE},
+    variant="compact"
+)
+prompt_registry.register("explainer", EXPLAINER_SYSTEM_PROMPT, {"default": EXPLAINER_USER_PROMPT_TEMPLATE})
+prompt_registry.register("writer", WRITER_SYSTEM_PROMPT, {"default": WRITER_USER_PROMPT_TEMPLATE})
+prompt_registry.register("quiz", QUIZ_SYSTEM_PROMPT, {"default": QUIZ_USER_PROMPT_TEMPLATE})
+prompt_registry.register("general_qa", GENERAL_QA_SYSTEM_PROMPT, {
+    "default": GENERAL_QA_USER_PROMPT_NO_CONTEXT,
+    "context": GENERAL_QA_USER_PROMPT_TEMPLATE,
+    "history": GENERAL_QA_USER_PROMPT_WITH_HISTORY
+})
@@ -3,9 +3,23 @@ BABA Agent Testing Script
 
 Run this script to test individual agents with sample inputs.
 This helps verify that each agent is working correctly.
+
+    python test_agents.py            # live API calls
+    python test_agents.py --record   # live API calls, saved to the cassette
+    python test_agents.py --replay   # offline, from the recorded cassette
 """
 
+import os
 import sys
+
+# Cassette mode must be set before the configuration is loaded
+CASSETTE_MODE = "record" if "--record" in sys.argv else "replay" if "--replay" in sys.argv else None
+if CASSETTE_MODE:
+    os.environ["LLM_CASSETTE_MODE"] = CASSETTE_MODE
+    os.environ["PROMPT_EXPLORE_RATE"] = "0"  # Same prompt variants on every run
+    if CASSETTE_MODE == "replay":
+        os.environ.setdefault("OPENAI_API_KEY", "cassette-replay")
+
 from config import config
 
 def test_task_classifier():
@@ -174,14 +188,19 @@ def main():
         print("See QUICKSTART.md for setup instructions.")
         return 1
 
-    print("\nThis will test all agents with sample inputs.")
-    print("Each test may take 5-15 seconds due to API calls.")
-    print("\nNote: These tests will use your OpenAI API credits.")
-
-    response = input("\nProceed with testing? (y/n): ")
-    if response.lower() != 'y':
-        print("Testing cancelled.")
-        return 0
+    if CASSETTE_MODE == "replay":
+        print(f"\nReplaying recorded LLM calls from {config.LLM_CASSETTE_PATH} (no API calls).")
+    else:
+        print("\nThis will test all agents with sample inputs.")
+        print("Each test may take 5-15 seconds due to API calls.")
+        print("\nNote: These tests will use your OpenAI API credits.")
+        if CASSETTE_MODE == "record":
+            print(f"Responses will be recorded to {config.LLM_CASSETTE_PATH}.")
+
+        response = input("\nProceed with testing? (y/n): ")
+        if response.lower() != 'y':
+            print("Testing cancelled.")
+            return 0
 
     # Run all tests
     results = {
@@ -6,7 +6,7 @@ Provides functions for detecting, validating, and processing Arabic text.
 
 import re
 from langdetect import detect, LangDetectException
-from typing import Tuple
+from typing import Tuple, List, Optional
 
 
 class ArabicUtils:
@@ -15,6 +15,21 @@ class ArabicUtils:
     # Arabic Unicode ranges
     ARABIC_RANGE = r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]'
 
+    # Normalization: letter variants folded to one form, diacritics
+    # (tashkeel) and tatweel removed
+    NORMALIZATION_MAP = {
+        "\u0623": "\u0627",  # أ -> ا
+        "\u0625": "\u0627",  # إ -> ا
+        "\u0622": "\u0627",  # آ -> ا
+        "\u0649": "\u064A",  # ى -> ي
+        "\u0629": "\u0647",  # ة -> ه
+    }
+    REMOVED_CHARS = [chr(c) for c in range(0x064B, 0x0653)] + ["\u0670", "\u0640"]
+    NORMALIZATION_TABLE = str.maketrans({
+        **NORMALIZATION_MAP,
+        **{char: None for char in REMOVED_CHARS}
+    })
+
     @staticmethod
     def contains_arabic(text: str) -> bool:
         """
@@ -112,6 +127,49 @@ class ArabicUtils:
 
         return text
 
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize text for matching.
+
+        Lowercases Latin text, folds Arabic letter variants (alef forms,
+        alef maqsura, ta marbuta) and removes diacritics and tatweel.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Normalized text
+        """
+        return text.translate(ArabicUtils.NORMALIZATION_TABLE).lower()
+
+    @staticmethod
+    def normalize_with_offsets(text: str) -> Tuple[str, Optional[List[int]]]:
+        """
+        Normalize text for matching, keeping a map back to the original.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Tuple of (normalized_text, offsets) where offsets[i] is the index
+            in the original text of normalized character i, or None when
+            both texts line up one to one
+        """
+        normalized = ArabicUtils.normalize(text)
+        if len(normalized) == len(text):
+            return normalized, None
+
+        chars = []
+        offsets = []
+
+        for index, char in enumerate(text):
+            for lowered in char.translate(ArabicUtils.NORMALIZATION_TABLE).lower():
+                chars.append(lowered)
+                offsets.append(index)
+
+        return "".join(chars), offsets
+
     @staticmethod
     def extract_arabic_percentage(text: str) -> float:
         """
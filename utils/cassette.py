@@ -0,0 +1,162 @@
+"""
+LLM Call Cassettes.
+
+Record/replay layer for LLMClient. In record mode every chat completion
+is stored in a cassette file under a key derived from the request; in
+replay mode responses are served from the cassette without touching the
+API, and a request that was never recorded fails immediately.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+from config import config
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode for a request that is not in the cassette."""
+
+
+class Cassette:
+    """A file of recorded LLM requests and their responses."""
+
+    MODES = ("off", "record", "replay")
+
+    def __init__(self, path: str = None, mode: str = None):
+        """
+        Initialize the cassette.
+
+        Args:
+            path: Cassette file (defaults to Config.LLM_CASSETTE_PATH)
+            mode: "off", "record" or "replay" (defaults to Config.LLM_CASSETTE_MODE)
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        self.lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.path = ""
+        self.mode = "off"
+        self.use(path or config.LLM_CASSETTE_PATH, mode or config.LLM_CASSETTE_MODE)
+
+    def use(self, path: str, mode: str) -> None:
+        """
+        Switch cassette file and mode, loading any existing recordings.
+
+        Args:
+            path: Cassette file
+            mode: "off", "record" or "replay"
+
+        Raises:
+            ValueError: If the mode is unknown
+            FileNotFoundError: In replay mode, if the file does not exist
+        """
+        mode = (mode or "off").lower()
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(self.MODES)})")
+
+        entries = {}
+        if mode != "off":
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    entries = json.load(f).get("entries", {})
+            elif mode == "replay":
+                raise FileNotFoundError(f"Cassette not found: {path} (record it first)")
+
+        with self.lock:
+            self.path = path
+            self.mode = mode
+            self.entries = entries
+
+    @staticmethod
+    def request_key(request: Dict[str, Any]) -> str:
+        """
+        Derive the cassette key of a chat completion request.
+
+        max_tokens is left out: it is sized adaptively from earlier
+        outputs, so it differs between otherwise identical runs.
+
+        Args:
+            request: The keyword arguments sent to chat.completions.create
+
+        Returns:
+            Hex SHA-256 of the canonical request
+        """
+        canonical = json.dumps(
+            {
+                "model": request.get("model"),
+                "messages": request.get("messages"),
+                "temperature": request.get("temperature"),
+                "response_format": request.get("response_format")
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def replay(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the recorded response for a request.
+
+        Args:
+            request: The keyword arguments sent to chat.completions.create
+
+        Returns:
+            Dictionary with content, finish_reason, prompt_tokens and
+            completion_tokens
+
+        Raises:
+            CassetteMissError: If the request was never recorded
+        """
+        key = self.request_key(request)
+        with self.lock:
+            entry = self.entries.get(key)
+
+        if entry is None:
+            messages = request.get("messages") or [{}]
+            raise CassetteMissError(
+                f"No recorded response in {self.path} for request {key[:12]} "
+                f"(last message: {str(messages[-1].get('content', ''))[:80]!r}); re-record the cassette"
+            )
+
+        return entry["response"]
+
+    def record(self, request: Dict[str, Any], response: Dict[str, Any], agent: Optional[str] = None) -> None:
+        """
+        Store a response and rewrite the cassette file.
+
+        Args:
+            request: The keyword arguments sent to chat.completions.create
+            response: Dictionary with content, finish_reason, prompt_tokens
+                and completion_tokens
+            agent: Agent profile name, kept for readability of the file
+        """
+        key = self.request_key(request)
+
+        with self.lock:
+            self.entries[key] = {
+                "agent": agent or "unknown",
+                "request": {
+                    "model": request.get("model"),
+                    "messages": request.get("messages"),
+                    "temperature": request.get("temperature")
+                },
+                "response": response
+            }
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # Write to a temporary file first so an interrupted run keeps the old cassette
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "entries": self.entries}, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+# Global instance
+cassette = Cassette()
@@ -0,0 +1,168 @@
+"""
+Circuit Breaker.
+
+Watches the outcome and latency of recent LLM calls. When too many of
+them fail or are too slow the circuit opens: calls fail immediately
+instead of waiting through retries, and the orchestrator switches to
+degraded mode. A background probe closes the circuit again once the API
+answers normally.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+from config import config
+from utils.metrics import llm_circuit_state, llm_circuit_transitions_total
+
+
+# Gauge values of the circuit states
+STATE_VALUES = {"closed": 0, "open": 1, "half_open": 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Opens after a high share of failed or slow calls, closes after a successful probe."""
+
+    def __init__(
+        self,
+        probe: Optional[Callable[[], None]] = None,
+        window: int = None,
+        min_calls: int = None,
+        failure_rate: float = None,
+        slow_seconds: float = None,
+        slow_tokens_per_second: float = None,
+        cooldown: float = None
+    ):
+        """
+        Initialize a closed circuit.
+
+        Args:
+            probe: Function making a cheap test call; raises on failure
+            window: Number of recent calls considered (defaults to Config.LLM_BREAKER_WINDOW)
+            min_calls: Calls needed before the circuit can open
+                (defaults to Config.LLM_BREAKER_MIN_CALLS)
+            failure_rate: Share of failed or slow calls that opens the
+                circuit (defaults to Config.LLM_BREAKER_FAILURE_RATE; 0 disables it)
+            slow_seconds: Calls slower than this, plus the time to generate
+                their tokens, count as failed (defaults to Config.LLM_BREAKER_SLOW_SECONDS)
+            slow_tokens_per_second: Generation rate the allowance for a
+                call's tokens assumes (defaults to
+                Config.LLM_BREAKER_SLOW_TOKENS_PER_SECOND)
+            cooldown: Seconds between recovery probes (defaults to Config.LLM_BREAKER_COOLDOWN)
+        """
+        self.probe = probe
+        self.window = window or config.LLM_BREAKER_WINDOW
+        self.min_calls = min_calls or config.LLM_BREAKER_MIN_CALLS
+        self.failure_rate = config.LLM_BREAKER_FAILURE_RATE if failure_rate is None else failure_rate
+        self.slow_seconds = slow_seconds or config.LLM_BREAKER_SLOW_SECONDS
+        self.slow_tokens_per_second = slow_tokens_per_second or config.LLM_BREAKER_SLOW_TOKENS_PER_SECOND
+        self.cooldown = cooldown or config.LLM_BREAKER_COOLDOWN
+
+        self.state = "closed"
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.outcomes: deque = deque(maxlen=self.window)  # True = failed or slow
+        self.lock = threading.Lock()
+        llm_circuit_state.set(STATE_VALUES["closed"])
+
+    def is_open(self) -> bool:
+        """Whether calls are currently short-circuited (open or probing)."""
+        return self.state != "closed"
+
+    def check(self) -> None:
+        """
+        Refuse a call while the circuit is open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if self.state != "closed":
+            raise CircuitOpenError(f"LLM service unavailable ({self.last_error or 'circuit open'})")
+
+    def record(self, success: bool, latency: float = 0.0, error: Optional[str] = None, tokens: int = 0) -> None:
+        """
+        Record the outcome of a call and open the circuit if needed.
+
+        Args:
+            success: Whether the call returned a response
+            latency: Seconds the call took
+            error: Error message of a failed call
+            tokens: Completion tokens the call generated; a long generation
+                is allowed the time to produce them before it counts as slow
+        """
+        bad = not success or latency > self.slow_seconds + tokens / self.slow_tokens_per_second
+
+        with self.lock:
+            if self.state != "closed":
+                return
+
+            self.outcomes.append(bad)
+            if bad:
+                self.last_error = error or f"slow response ({latency:.1f}s)"
+
+            calls = len(self.outcomes)
+            if not self.failure_rate or calls < self.min_calls:
+                return
+            if sum(self.outcomes) / calls < self.failure_rate:
+                return
+
+            self._set_state("open")
+            self.opened_at = time.time()
+
+        threading.Thread(target=self._probe_until_closed, name="llm-circuit-probe", daemon=True).start()
+
+    def _probe_until_closed(self) -> None:
+        """Background loop: probe every cooldown seconds until a probe succeeds."""
+        while True:
+            time.sleep(self.cooldown)
+
+            with self.lock:
+                self._set_state("half_open")
+
+            try:
+                start = time.time()
+                if self.probe is not None:
+                    self.probe()
+                if time.time() - start > self.slow_seconds:
+                    raise TimeoutError(f"probe took {time.time() - start:.1f}s")
+            except Exception as e:
+                with self.lock:
+                    self.last_error = str(e)
+                    self._set_state("open")
+                continue
+
+            with self.lock:
+                self.outcomes.clear()
+                self.last_error = None
+                self.opened_at = None
+                self._set_state("closed")
+            return
+
+    def _set_state(self, state: str) -> None:
+        """Change state and update the metrics (called with the lock held)."""
+        if state != self.state:
+            llm_circuit_transitions_total.inc(state=state)
+        self.state = state
+        llm_circuit_state.set(STATE_VALUES[state])
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Get the circuit's state.
+
+        Returns:
+            Dictionary with state, opened_at, last_error and the failed
+            share of the recent calls
+        """
+        with self.lock:
+            calls = len(self.outcomes)
+            return {
+                "state": self.state,
+                "opened_at": self.opened_at,
+                "last_error": self.last_error,
+                "recent_calls": calls,
+                "recent_failure_rate": sum(self.outcomes) / calls if calls else 0.0
+            }
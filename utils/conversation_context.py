@@ -0,0 +1,342 @@
+"""
+Conversation Context Manager.
+
+Keeps the full multi-turn history of a session and builds token-budgeted
+chat context from it: the most relevant turns are sent verbatim, and
+older turns are compressed into a rolling summary that is refreshed
+incrementally every few turns. Refreshes run on a background worker at
+"prefetch" priority, so no reply waits for a summary.
+"""
+
+import queue
+import re
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from config import config
+from utils.llm_client import llm_client
+from utils.token_estimator import token_estimator
+from utils.request_context import RequestContext, current_context
+from prompts.context_prompts import (
+    CONTEXT_SUMMARY_SYSTEM_PROMPT,
+    CONTEXT_SUMMARY_USER_PROMPT_TEMPLATE
+)
+
+
+# Summary refreshes allowed to wait; a refresh that finds the queue full is
+# retried after a later turn
+SUMMARY_QUEUE_DEPTH = 64
+
+
+class ConversationTurn:
+    """A single user or assistant message."""
+
+    def __init__(self, role: str, content: str, index: int):
+        """
+        Initialize a turn.
+
+        Args:
+            role: "user" or "assistant"
+            content: Message text
+            index: Position of the turn in the conversation
+        """
+        self.role = role
+        self.content = content
+        self.index = index
+        self.tokens = ConversationContextManager.estimate_tokens(content)
+        self.words = ConversationContextManager.content_words(content)
+
+
+class ConversationMemory:
+    """Full history and rolling summary of one session."""
+
+    def __init__(self):
+        """Initialize an empty conversation."""
+        self.turns: List[ConversationTurn] = []
+        self.summary = ""
+        self.summarized_upto = 0  # Turns before this index are in the summary
+        self.refreshing = False  # A summary refresh is queued or running
+        # Guards summary and summarized_upto, which the summary worker
+        # replaces together while requests read them
+        self.lock = threading.Lock()
+
+    def summary_state(self) -> Tuple[str, int]:
+        """The summary and the index of the first turn not in it, read together."""
+        with self.lock:
+            return self.summary, self.summarized_upto
+
+
+class ConversationContextManager:
+    """Builds bounded, relevance-ranked context from conversation history."""
+
+    SESSION_KEY = "conversation_memory"
+    WORD_PATTERN = re.compile(r'\w{3,}')
+
+    def __init__(
+        self,
+        token_budget: int = None,
+        recent_turns: int = None,
+        summary_every: int = None
+    ):
+        """
+        Initialize the context manager.
+
+        Args:
+            token_budget: Maximum tokens of history sent with a request
+            recent_turns: Number of latest turns never folded into the summary
+            summary_every: Refresh the summary once this many turns are
+                waiting to be folded into it
+        """
+        self.token_budget = token_budget or config.CONTEXT_TOKEN_BUDGET
+        self.recent_turns = recent_turns or config.CONTEXT_RECENT_TURNS
+        self.summary_every = summary_every or config.CONTEXT_SUMMARY_EVERY
+        self.summary_queue: "queue.Queue[Tuple[ConversationMemory, str, str, int, Optional[str]]]" = queue.Queue(
+            maxsize=SUMMARY_QUEUE_DEPTH
+        )
+        self.worker: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Estimate the number of tokens in a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Estimated token count (script-aware, see utils.token_estimator)
+        """
+        return token_estimator.estimate(text)
+
+    @staticmethod
+    def content_words(text: str) -> set:
+        """
+        Get the set of content words used for relevance scoring.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Lowercased words of three or more characters
+        """
+        return set(ConversationContextManager.WORD_PATTERN.findall(text.lower()))
+
+    def get_memory(self, session_state: Optional[Dict[str, Any]]) -> ConversationMemory:
+        """
+        Get (or create) the conversation memory stored in a session.
+
+        Args:
+            session_state: Session state dictionary, or None for a one-off request
+
+        Returns:
+            The session's ConversationMemory
+        """
+        if session_state is None:
+            return ConversationMemory()
+
+        if self.SESSION_KEY not in session_state:
+            session_state[self.SESSION_KEY] = ConversationMemory()
+
+        return session_state[self.SESSION_KEY]
+
+    def export_memory(self, memory: ConversationMemory, max_turns: int = None) -> Dict[str, Any]:
+        """
+        Convert a conversation memory into JSON-serializable data for storage.
+
+        Args:
+            memory: The session's conversation memory
+            max_turns: Most recent turns kept verbatim (defaults to
+                Config.SESSION_PAGE_SIZE); older ones survive in the summary
+
+        Returns:
+            Dictionary with the summary and the kept turns
+        """
+        max_turns = max_turns or config.SESSION_PAGE_SIZE
+        summary, summarized_upto = memory.summary_state()
+        kept = memory.turns[-max_turns:]
+        dropped = len(memory.turns) - len(kept)
+        return {
+            "summary": summary,
+            "summarized_upto": max(0, summarized_upto - dropped),
+            "turns": [[turn.role, turn.content] for turn in kept]
+        }
+
+    def import_memory(self, data: Optional[Dict[str, Any]]) -> ConversationMemory:
+        """
+        Rebuild a conversation memory from export_memory() data.
+
+        Args:
+            data: Stored data, or None
+
+        Returns:
+            The restored ConversationMemory (empty without data)
+        """
+        memory = ConversationMemory()
+        if not data:
+            return memory
+
+        memory.summary = data.get("summary", "")
+        memory.summarized_upto = data.get("summarized_upto", 0)
+        for role, content in data.get("turns", []):
+            memory.turns.append(ConversationTurn(role, content, len(memory.turns)))
+        return memory
+
+    def add_turn(self, memory: ConversationMemory, role: str, content: str) -> None:
+        """
+        Append a turn and queue a refresh of the rolling summary if it is due.
+
+        Args:
+            memory: The session's conversation memory
+            role: "user" or "assistant"
+            content: Message text
+        """
+        if not content:
+            return
+
+        memory.turns.append(ConversationTurn(role, content, len(memory.turns)))
+        if memory.refreshing:
+            # Turn indices must stay put until the running refresh lands
+            return
+
+        # Bound the session's footprint: the oldest turns go once they are
+        # in the summary
+        with memory.lock:
+            drop = min(len(memory.turns) - config.SESSION_MAX_MESSAGES, memory.summarized_upto)
+            if drop > 0:
+                memory.turns = memory.turns[drop:]
+                for turn in memory.turns:
+                    turn.index -= drop
+                memory.summarized_upto -= drop
+
+        self._schedule_refresh(memory)
+
+    def build_messages(self, memory: ConversationMemory, question: str) -> List[Dict[str, str]]:
+        """
+        Select the history to send with a question, within the token budget.
+
+        The latest exchange is always preferred, then the remaining turns
+        are ranked by word overlap with the question and by recency. The
+        selected turns are returned in chronological order, after the
+        rolling summary (if any).
+
+        Args:
+            memory: The session's conversation memory
+            question: The current user question
+
+        Returns:
+            Chat messages (role/content dictionaries) to place between the
+            system prompt and the current question
+        """
+        budget = self.token_budget
+        messages = []
+        summary, summarized_upto = memory.summary_state()
+
+        if summary:
+            summary_message = f"Summary of the earlier conversation: {summary}"
+            budget -= self.estimate_tokens(summary_message)
+            messages.append({"role": "system", "content": summary_message})
+
+        question_words = self.content_words(question)
+        total = len(memory.turns)
+
+        def score(turn: ConversationTurn) -> float:
+            overlap = len(question_words & turn.words) / (len(question_words) or 1)
+            recency = 1.0 / (total - turn.index)
+            return overlap + recency
+
+        latest = memory.turns[-2:]
+        older = sorted(memory.turns[:-2], key=score, reverse=True)
+
+        selected = []
+        for turn in latest[::-1] + older:
+            # Turns already in the summary are only repeated if relevant
+            if turn.index < summarized_upto and not (question_words & turn.words):
+                continue
+
+            if turn.tokens <= budget:
+                selected.append(turn)
+                budget -= turn.tokens
+
+        for turn in sorted(selected, key=lambda t: t.index):
+            messages.append({"role": turn.role, "content": turn.content})
+
+        return messages
+
+    def _schedule_refresh(self, memory: ConversationMemory) -> None:
+        """
+        Queue folding older turns into the rolling summary once enough are waiting.
+
+        Args:
+            memory: The session's conversation memory
+        """
+        summary, summarized_upto = memory.summary_state()
+        foldable_end = len(memory.turns) - self.recent_turns
+        if foldable_end - summarized_upto < self.summary_every:
+            return
+
+        pending = memory.turns[summarized_upto:foldable_end]
+        turns_text = "\n".join(f"{turn.role}: {turn.content}" for turn in pending)
+        context = current_context()
+        session_id = context.session_id if context else None
+
+        memory.refreshing = True
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self._work, name="context-summary-worker", daemon=True)
+                self.worker.start()
+        try:
+            self.summary_queue.put_nowait((memory, summary, turns_text, foldable_end, session_id))
+        except queue.Full:
+            memory.refreshing = False
+
+    def _work(self) -> None:
+        """Worker loop: run queued summary refreshes one after another."""
+        while True:
+            memory, summary, turns_text, foldable_end, session_id = self.summary_queue.get()
+            try:
+                self._refresh_summary(memory, summary, turns_text, foldable_end, session_id)
+            finally:
+                memory.refreshing = False
+                self.summary_queue.task_done()
+
+    def _refresh_summary(
+        self,
+        memory: ConversationMemory,
+        summary: str,
+        turns_text: str,
+        foldable_end: int,
+        session_id: Optional[str]
+    ) -> None:
+        """
+        Fold turns into the rolling summary, in the session's name at prefetch priority.
+
+        Args:
+            memory: The session's conversation memory
+            summary: The summary the turns are folded into
+            turns_text: The turns to fold, one "role: content" line each
+            foldable_end: Index of the first turn not folded
+            session_id: Session charged for the call (random when None)
+        """
+        context = RequestContext(session_id=session_id, priority="prefetch")
+        try:
+            with context.activate():
+                new_summary = llm_client.generate_completion(
+                    system_prompt=CONTEXT_SUMMARY_SYSTEM_PROMPT,
+                    user_prompt=CONTEXT_SUMMARY_USER_PROMPT_TEMPLATE.format(
+                        summary=summary or "(none yet)",
+                        turns=turns_text
+                    ),
+                    temperature=0.3,
+                    max_tokens=250,
+                    agent="context_summary"
+                )
+            with memory.lock:
+                memory.summary = new_summary
+                memory.summarized_upto = foldable_end
+        except Exception:
+            # The summary is an optimization - keep the previous one and retry later
+            pass
+
+
+# Global instance
+conversation_context = ConversationContextManager()
@@ -0,0 +1,261 @@
+"""
+LLM Endpoint Pool.
+
+Spreads LLM calls over several OpenAI-compatible endpoints (API key,
+base URL and model; local servers included) so that one key's rate
+limit no longer caps the deployment. Calls go to the healthy endpoint
+with the fewest outstanding requests relative to its weight; endpoints
+that fail repeatedly are taken out of rotation for a while, and a failed
+call can be retried on a different endpoint right away.
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional
+from urllib.parse import urlparse
+from openai import OpenAI, APIConnectionError, APIStatusError, RateLimitError
+from config import config
+from utils.http_transport import sync_http_client
+from utils.metrics import (
+    llm_endpoint_requests_total,
+    llm_endpoint_outstanding,
+    llm_endpoint_healthy,
+    llm_endpoint_ejections_total
+)
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """
+    Check whether a failed call counts against the endpoint.
+
+    Only connection errors and timeouts, rate limiting and server errors
+    say something about the endpoint. A bad request, an oversized prompt,
+    a rejected key or a cancelled request would fail the same way on any
+    endpoint and must not take healthy ones out of rotation.
+
+    Args:
+        error: The exception the call raised
+
+    Returns:
+        True for APIConnectionError (including APITimeoutError),
+        RateLimitError and 5xx APIStatusError
+    """
+    if isinstance(error, (APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+class Endpoint:
+    """One OpenAI-compatible endpoint and its health."""
+
+    def __init__(self, name: str, api_key: Optional[str], base_url: Optional[str], model: str, weight: float = 1.0):
+        """
+        Initialize an endpoint and its client.
+
+        The pool retries and fails over itself, so the client never retries
+        one endpoint on its own.
+
+        Args:
+            name: Display and metrics name
+            api_key: API key for the endpoint
+            base_url: Base URL (None for the OpenAI API)
+            model: Model to request from this endpoint
+            weight: Share of traffic relative to the other endpoints
+        """
+        self.name = name
+        self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=sync_http_client(name))
+        self.model = model
+        self.weight = weight if weight > 0 else 1.0
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.latency: Optional[float] = None  # Moving average of successful calls
+        self.last_used = 0
+
+    @property
+    def supports_structured_outputs(self) -> bool:
+        """Whether the endpoint's model accepts json_schema response formats."""
+        return self.model.startswith(config.STRUCTURED_OUTPUT_MODELS)
+
+    def is_available(self, now: float) -> bool:
+        """Whether the endpoint is in rotation (not ejected, or its ejection has ended)."""
+        return self.ejected_until is None or now >= self.ejected_until
+
+
+class EndpointPool:
+    """Weighted least-outstanding-requests routing with ejection of failing endpoints."""
+
+    def __init__(self, endpoints: List[Endpoint], eject_failures: int = None, eject_seconds: float = None):
+        """
+        Initialize the pool.
+
+        Args:
+            endpoints: Endpoints to route between (at least one)
+            eject_failures: Consecutive failures that eject an endpoint
+                (defaults to Config.LLM_ENDPOINT_EJECT_FAILURES)
+            eject_seconds: Seconds an ejected endpoint stays out of rotation
+                (defaults to Config.LLM_ENDPOINT_EJECT_SECONDS)
+
+        Raises:
+            ValueError: If no endpoints are given
+        """
+        if not endpoints:
+            raise ValueError("An endpoint pool needs at least one endpoint")
+
+        self.endpoints = endpoints
+        self.eject_failures = eject_failures or config.LLM_ENDPOINT_EJECT_FAILURES
+        self.eject_seconds = eject_seconds or config.LLM_ENDPOINT_EJECT_SECONDS
+        self.lock = threading.Lock()
+        self.sequence = itertools.count(1)
+
+        for endpoint in endpoints:
+            llm_endpoint_healthy.set(1, endpoint=endpoint.name)
+
+    @classmethod
+    def from_config(cls) -> "EndpointPool":
+        """
+        Build the pool from Config.LLM_ENDPOINTS.
+
+        Returns:
+            The configured pool; a single endpoint from the OPENAI_* settings
+            when no endpoints are configured
+        """
+        specs = config.LLM_ENDPOINTS or [{}]
+        endpoints = []
+
+        for index, spec in enumerate(specs):
+            base_url = spec.get("url") or config.OPENAI_BASE_URL
+            model = spec.get("model") or config.OPENAI_MODEL
+            name = spec.get("name") or (
+                f"{urlparse(base_url).netloc or base_url}/{model}" if base_url else f"openai/{model}"
+            )
+            if any(endpoint.name == name for endpoint in endpoints):
+                name = f"{name}#{index + 1}"
+
+            api_key = spec.get("key") or config.OPENAI_API_KEY
+            endpoints.append(Endpoint(name, api_key, base_url, model, float(spec.get("weight", 1))))
+
+        return cls(endpoints)
+
+    def acquire(self, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """
+        Pick the endpoint for a call and count it as outstanding.
+
+        Among available endpoints not in exclude, the one with the lowest
+        (outstanding + 1) / weight wins, least recently used first on ties.
+        When every candidate is ejected the one returning soonest is used,
+        and when all endpoints are excluded any may be picked again.
+
+        Args:
+            exclude: Endpoints already tried for this call
+
+        Returns:
+            The chosen Endpoint; pass it to release()
+        """
+        excluded = set(exclude)
+
+        with self.lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint not in excluded] or self.endpoints
+            available = [endpoint for endpoint in candidates if endpoint.is_available(now)]
+            if not available:
+                available = [min(candidates, key=lambda endpoint: endpoint.ejected_until)]
+
+            chosen = min(available, key=lambda e: ((e.outstanding + 1) / e.weight, e.last_used))
+            chosen.outstanding += 1
+            chosen.last_used = next(self.sequence)
+
+        llm_endpoint_outstanding.inc(endpoint=chosen.name)
+        return chosen
+
+    def release(
+        self,
+        endpoint: Endpoint,
+        success: Optional[bool],
+        latency: float = 0.0,
+        error: Optional[str] = None
+    ) -> None:
+        """
+        Record the outcome of a call, ejecting the endpoint if it keeps failing.
+
+        Args:
+            endpoint: Endpoint returned by acquire()
+            success: Whether the call returned a response; None for a call
+                that failed for reasons that are not the endpoint's (see
+                is_endpoint_failure), which leaves its health unchanged
+            latency: Seconds the call took
+            error: Error message of a failed call
+        """
+        ejected = False
+        with self.lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+
+            if success is None:
+                pass
+            elif success:
+                endpoint.consecutive_failures = 0
+                endpoint.ejected_until = None
+                endpoint.latency = latency if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * latency
+            else:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                endpoint.last_error = error
+                # A failure right after an ejection ends ejects it again
+                ejected = endpoint.consecutive_failures >= self.eject_failures
+                if ejected:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+
+        llm_endpoint_outstanding.dec(endpoint=endpoint.name)
+        outcome = "rejected" if success is None else "ok" if success else "error"
+        llm_endpoint_requests_total.inc(endpoint=endpoint.name, outcome=outcome)
+        if success:
+            llm_endpoint_healthy.set(1, endpoint=endpoint.name)
+        elif ejected:
+            llm_endpoint_healthy.set(0, endpoint=endpoint.name)
+            llm_endpoint_ejections_total.inc(endpoint=endpoint.name)
+
+    def has_alternative(self, exclude: Iterable[Endpoint]) -> bool:
+        """
+        Check whether a call could fail over to an untried endpoint.
+
+        Args:
+            exclude: Endpoints already tried
+
+        Returns:
+            True if some available endpoint is not in exclude
+        """
+        excluded = set(exclude)
+        with self.lock:
+            now = time.monotonic()
+            return any(endpoint.is_available(now) for endpoint in self.endpoints if endpoint not in excluded)
+
+    def get_report(self) -> List[Dict[str, Any]]:
+        """
+        Get the state of each endpoint.
+
+        Returns:
+            One dictionary per endpoint with name, model, weight, health,
+            outstanding calls, request and failure counts, average latency
+            and the last error
+        """
+        with self.lock:
+            now = time.monotonic()
+            return [
+                {
+                    "name": endpoint.name,
+                    "model": endpoint.model,
+                    "weight": endpoint.weight,
+                    "healthy": endpoint.is_available(now),
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                    "latency": endpoint.latency,
+                    "last_error": endpoint.last_error
+                }
+                for endpoint in self.endpoints
+            ]
@@ -0,0 +1,148 @@
+"""
+Field-Level Recovery for Invalid Agent Results.
+
+When an agent result fails validation, keeps the valid parts and asks
+the model again only for the invalid fields (or quiz questions), using
+the previous answer as conversation context, then merges the patch.
+"""
+
+import json
+from typing import Dict, Any, List, Optional
+from pydantic import ValidationError
+from utils.llm_client import llm_client
+from utils.schemas import coerce_result
+from utils.validators import validators
+from utils.wire_schema import WIRE_SCHEMAS
+from utils.tracing import traced
+
+
+class FieldRecovery:
+    """Re-asks for invalid fields instead of regenerating the whole result."""
+
+    def __init__(self):
+        """Initialize the recovery helper."""
+        self.tokens_per_field = 300
+        self.tokens_per_question = 400
+
+    @traced("field_recovery")
+    def recover(
+        self,
+        agent: str,
+        result: Dict[str, Any],
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = None,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Patch the invalid fields of an agent result.
+
+        Args:
+            agent: Agent profile name
+            result: The (partially) invalid result, using full key names
+            system_prompt: System prompt of the original request
+            user_prompt: User prompt of the original request
+            temperature: Sampling temperature for the follow-up request
+            history: Conversation turns sent between the system prompt and
+                the user prompt in the original request, if any
+
+        Returns:
+            The merged result (callers must validate it again)
+        """
+        invalid = validators.find_invalid_fields(agent, result)
+        if not invalid:
+            return result
+
+        schema = WIRE_SCHEMAS[agent]
+        previous_answer = json.dumps(schema.compact(result), ensure_ascii=False, separators=(",", ":"))
+
+        question_indices = [self._question_index(field) for field in invalid if field.startswith("questions[")]
+
+        if question_indices:
+            instruction = self._question_instruction(question_indices)
+            max_tokens = self.tokens_per_question * len(question_indices)
+        else:
+            keys = [schema.reverse_keys.get(field, field) for field in invalid]
+            instruction = (
+                f"Some fields of your previous answer were missing or invalid: {', '.join(keys)}. "
+                f"Respond with minified JSON containing ONLY these keys, with corrected, complete values."
+            )
+            max_tokens = self.tokens_per_field * len(keys)
+
+        messages = (
+            [{"role": "system", "content": system_prompt}]
+            + list(history or [])
+            + [
+                {"role": "user", "content": user_prompt},
+                {"role": "assistant", "content": previous_answer},
+                {"role": "user", "content": instruction}
+            ]
+        )
+
+        response_text = llm_client.generate_with_history(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format="json_object",
+            agent=agent
+        )
+        patch = llm_client.parse_agent_json(response_text, agent)
+
+        if question_indices:
+            merged = self._merge_questions(result, question_indices, patch.get("questions", []))
+        else:
+            merged = {**result, **{field: patch[field] for field in invalid if field in patch}}
+
+        try:
+            return coerce_result(agent, merged)
+        except ValidationError:
+            return merged
+
+    def _question_instruction(self, indices: List[int]) -> str:
+        """Build the follow-up instruction for invalid quiz questions."""
+        numbers = ", ".join(str(i + 1) for i in indices)
+        return (
+            f"Question(s) {numbers} of your previous answer were invalid (missing fields, "
+            f"fewer than 2 options, or \"c\" not a valid option index). "
+            f"Respond with minified JSON {{\"qs\":[...]}} containing ONLY {len(indices)} corrected "
+            f"replacement question(s), in the same order."
+        )
+
+    def _question_index(self, field: str) -> int:
+        """Parse the index from a "questions[i]" field name."""
+        return int(field[len("questions["):-1])
+
+    def _merge_questions(
+        self,
+        result: Dict[str, Any],
+        indices: List[int],
+        replacements: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Replace invalid questions, dropping any that are still invalid.
+
+        Args:
+            result: Original quiz result
+            indices: Indices of the invalid questions
+            replacements: Replacement questions, in order
+
+        Returns:
+            Merged quiz result
+        """
+        questions = list(result["questions"])
+
+        for index, replacement in zip(indices, replacements):
+            questions[index] = replacement
+
+        valid_questions = [
+            question for i, question in enumerate(questions)
+            if validators.validate_quiz_question(question, i)[0]
+        ]
+
+        # Keep the still-invalid questions only if nothing valid is left,
+        # so that the caller reports the validation error
+        return {**result, "questions": valid_questions or questions}
+
+
+# Global instance
+field_recovery = FieldRecovery()
@@ -0,0 +1,115 @@
+"""
+Request Hedging.
+
+Decides when a slow LLM call gets a duplicate ("hedge"). For the agent
+profiles that are hedged, the latency of recent successful calls is
+tracked; a call still running after that agent's observed p95 is sent a
+second time (to another endpoint when the pool has one) and whichever
+answer arrives first is used. Hedges are capped at a fraction of the
+hedged traffic to bound the extra cost.
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+from config import config
+
+
+# Successful call latencies kept per agent for the p95
+WINDOW = 200
+
+# Most hedges that can be saved up while traffic is quiet
+MAX_CREDIT = 5.0
+
+
+class Hedger:
+    """Per-agent latency tracking and a rate cap on duplicate calls."""
+
+    def __init__(
+        self,
+        agents: tuple = None,
+        max_rate: float = None,
+        min_delay: float = None,
+        min_samples: int = None
+    ):
+        """
+        Initialize the hedger.
+
+        Args:
+            agents: Agent profiles whose calls may be hedged (defaults to
+                Config.LLM_HEDGE_AGENTS; empty disables hedging)
+            max_rate: Largest share of hedged-agent calls that get a
+                duplicate (defaults to Config.LLM_HEDGE_MAX_RATE)
+            min_delay: Shortest wait before hedging, in seconds (defaults to
+                Config.LLM_HEDGE_MIN_DELAY)
+            min_samples: Latencies needed before an agent is hedged
+                (defaults to Config.LLM_HEDGE_MIN_SAMPLES)
+        """
+        self.agents = tuple(config.LLM_HEDGE_AGENTS if agents is None else agents)
+        self.max_rate = config.LLM_HEDGE_MAX_RATE if max_rate is None else max_rate
+        self.min_delay = config.LLM_HEDGE_MIN_DELAY if min_delay is None else min_delay
+        self.min_samples = min_samples or config.LLM_HEDGE_MIN_SAMPLES
+        self.latencies: Dict[str, deque] = {}
+        self.credit = 1.0
+        self.lock = threading.Lock()
+
+    def delay_for(self, agent: Optional[str]) -> Optional[float]:
+        """
+        Get how long a call may run before it is hedged.
+
+        Every hedged-agent call passing through here also earns max_rate
+        of a hedge for the rate cap.
+
+        Args:
+            agent: Agent profile of the call
+
+        Returns:
+            Seconds to wait before sending a duplicate (the agent's p95,
+            at least min_delay), or None if the call is not hedged
+        """
+        if agent not in self.agents or not self.max_rate:
+            return None
+
+        with self.lock:
+            self.credit = min(MAX_CREDIT, self.credit + self.max_rate)
+            latencies = self.latencies.get(agent)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+
+        p95 = ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+        return max(p95, self.min_delay)
+
+    def allow(self) -> bool:
+        """
+        Take one hedge from the rate cap.
+
+        Returns:
+            True if a duplicate may be sent now
+        """
+        with self.lock:
+            if self.credit < 1.0:
+                return False
+            self.credit -= 1.0
+            return True
+
+    def record(self, agent: Optional[str], latency: float) -> None:
+        """
+        Record the latency of a successful call.
+
+        Args:
+            agent: Agent profile of the call
+            latency: Seconds the call took
+        """
+        if agent not in self.agents:
+            return
+        with self.lock:
+            latencies = self.latencies.get(agent)
+            if latencies is None:
+                latencies = self.latencies[agent] = deque(maxlen=WINDOW)
+            latencies.append(latency)
+
+
+# Global instance
+hedger = Hedger()
@@ -0,0 +1,238 @@
+"""
+HTTP Transport for the OpenAI Clients.
+
+Builds the HTTP clients the OpenAI SDK sends requests with, so that the
+connection pool size, keep-alive, HTTP/2 and timeouts come from Config
+instead of the SDK defaults. Clients are built through the SDK's own
+DefaultHttpxClient, with the Limits and Timeout types the SDK exports,
+so this module works with whichever HTTP library the installed SDK uses.
+
+Every endpoint gets its own pool. Its transport is wrapped in a counter
+that sees each connection checkout (a request is sent) and return (its
+response is closed), which gives the active and idle connection gauges
+and the count of requests that had to wait for a connection, using only
+the HTTP library's public transport interface.
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable, List, Optional
+from openai import DefaultHttpxClient, Timeout, DEFAULT_CONNECTION_LIMITS
+from config import config
+from utils.metrics import http_pool_connections, http_pool_waits_total
+
+
+# The SDK's connection limits type (httpx.Limits for the HTTP library it ships with)
+Limits = type(DEFAULT_CONNECTION_LIMITS)
+
+# The HTTP library the SDK ships with, for its public transport types
+_http = importlib.import_module(Limits.__module__.partition(".")[0])
+
+# Counters of every pool built, for reports
+_counters: List["PoolCounter"] = []
+
+
+def build_limits() -> Limits:
+    """Connection pool limits from Config."""
+    return Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def build_timeout(limit: Optional[float] = None) -> Timeout:
+    """
+    Timeouts from Config, optionally capped.
+
+    Args:
+        limit: Optional seconds no phase may exceed (e.g. the time left to
+            a request's deadline)
+
+    Returns:
+        Connect, read, write and pool timeouts
+    """
+    def capped(seconds: float) -> float:
+        return min(seconds, limit) if limit is not None else seconds
+
+    return Timeout(
+        connect=capped(config.HTTP_CONNECT_TIMEOUT),
+        read=capped(config.HTTP_READ_TIMEOUT),
+        write=capped(config.HTTP_READ_TIMEOUT),
+        pool=capped(config.HTTP_POOL_TIMEOUT)
+    )
+
+
+def http2_enabled() -> bool:
+    """
+    Whether to negotiate HTTP/2.
+
+    Raises:
+        ImportError: If Config.HTTP2 is set but the h2 package is missing
+    """
+    if not config.HTTP2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        raise ImportError("HTTP2=True needs the h2 package: pip install h2")
+    return True
+
+
+class PoolCounter:
+    """
+    Tracks a connection pool from the checkouts and returns it sees.
+
+    Requests beyond the connection limit wait for a returned connection.
+    A returned connection nobody waits for stays idle as the pool keeps
+    it: only after a response, up to the keep-alive limit and until it
+    expires. With HTTP/2 several requests share a connection, so the
+    counts are of requests rather than connections.
+    """
+
+    def __init__(self, name: str, limits: Limits):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Pool name used as the metrics label (the endpoint name)
+            limits: The pool's connection limits
+        """
+        self.name = name
+        self.max_connections = limits.max_connections
+        self.max_keepalive = limits.max_keepalive_connections
+        self.keepalive_expiry = limits.keepalive_expiry
+        self.requests = 0  # Sent and not closed, including those waiting for a connection
+        self.idle: deque = deque()  # Return times of idle connections, oldest first
+        self.lock = threading.Lock()
+
+    def checkout(self) -> None:
+        """Count a request taking a connection, reusing an idle one if any."""
+        with self.lock:
+            self._expire(time.monotonic())
+            if self.idle:
+                self.idle.pop()
+            elif self.requests >= self.max_connections:
+                http_pool_waits_total.inc(pool=self.name)
+            self.requests += 1
+            self._publish()
+
+    def checkin(self, reusable: bool) -> None:
+        """
+        Count a request giving its connection back.
+
+        Args:
+            reusable: Whether a response was received, so the pool may keep
+                the connection alive
+        """
+        with self.lock:
+            self.requests -= 1
+            # A waiting request takes the connection over
+            waiting = self.requests >= self.max_connections
+            if reusable and not waiting and len(self.idle) < self.max_keepalive:
+                self.idle.append(time.monotonic())
+            self._publish()
+
+    def report(self) -> Dict[str, Any]:
+        """Current active and idle connections, the limit and the waits counted."""
+        with self.lock:
+            self._expire(time.monotonic())
+            self._publish()
+            return {
+                "name": self.name,
+                "active": min(self.requests, self.max_connections),
+                "idle": len(self.idle),
+                "max_connections": self.max_connections,
+                "waits": int(http_pool_waits_total.get(pool=self.name))
+            }
+
+    def _expire(self, now: float) -> None:
+        """Forget idle connections past the keep-alive expiry (the caller holds the lock)."""
+        while self.idle and now - self.idle[0] > self.keepalive_expiry:
+            self.idle.popleft()
+
+    def _publish(self) -> None:
+        """Update the gauges (the caller holds the lock)."""
+        http_pool_connections.set(min(self.requests, self.max_connections), pool=self.name, state="active")
+        http_pool_connections.set(len(self.idle), pool=self.name, state="idle")
+
+
+class CountingStream(_http.SyncByteStream):
+    """Response body stream that returns its connection to the counter once closed."""
+
+    def __init__(self, stream: Any, on_close: Callable[[bool], None]):
+        """
+        Initialize the stream.
+
+        Args:
+            stream: The transport's response stream
+            on_close: PoolCounter.checkin, called once on close
+        """
+        self.stream = stream
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            if self.on_close is not None:
+                on_close, self.on_close = self.on_close, None
+                on_close(True)
+
+
+class CountingTransport(_http.BaseTransport):
+    """Transport that reports its pool's checkouts and returns to a PoolCounter."""
+
+    def __init__(self, name: str):
+        """
+        Initialize the transport with the pool settings from Config.
+
+        Args:
+            name: Pool name used as the metrics label
+        """
+        limits = build_limits()
+        self.transport = _http.HTTPTransport(limits=limits, http2=http2_enabled())
+        self.counter = PoolCounter(name, limits)
+        _counters.append(self.counter)
+
+    def handle_request(self, request: Any) -> Any:
+        self.counter.checkout()
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            self.counter.checkin(False)
+            raise
+        response.stream = CountingStream(response.stream, self.counter.checkin)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def sync_http_client(name: str) -> DefaultHttpxClient:
+    """
+    Build the HTTP client for a sync OpenAI client.
+
+    Args:
+        name: Pool name used as the metrics label (the endpoint name)
+
+    Returns:
+        The SDK's default HTTP client with the configured, counted pool,
+        HTTP/2 and timeouts
+    """
+    return DefaultHttpxClient(transport=CountingTransport(name), timeout=build_timeout())
+
+
+def get_pool_report() -> List[Dict[str, Any]]:
+    """
+    Get the current state of every connection pool.
+
+    Returns:
+        One dictionary per pool with name, active and idle connections,
+        the connection limit and the waits counted
+    """
+    return [counter.report() for counter in _counters]
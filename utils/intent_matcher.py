@@ -0,0 +1,269 @@
+"""
+Intent Phrase Matcher.
+
+A single precompiled multilingual phrase engine for the keyword checks
+used by the fallback classifier and the quiz flow. All phrases are
+compiled once at import into one alternation, so every matched intent
+and span is found in a single pass over Arabic-normalized text.
+"""
+
+import re
+from typing import Dict, Any, Iterable, List, Set
+from utils.arabic_utils import ArabicUtils
+
+
+# Phrases per intent. The same phrase may belong to several intents.
+INTENT_PHRASES = {
+    "quiz_keyword": ["quiz", "test", "exam", "اختبار", "امتحان"],
+    "affirmation": ["yes", "yeah", "ok", "sure", "نعم", "أجل", "موافق"],
+    "quiz_topic": [
+        "generate a quiz on the topic",
+        "generate quiz on the topic",
+        "create a quiz on the topic",
+        "create quiz on the topic",
+        "make a quiz on the topic",
+        "make quiz on the topic",
+        "quiz on the topic",
+        "test on the topic",
+        "generate a quiz on",
+        "generate quiz on",
+        "create a quiz on",
+        "create quiz on",
+        "make a quiz on",
+        "make quiz on",
+        "quiz on",
+        "quiz about",
+        "test on",
+        "test about",
+        "generate quiz",
+        "create quiz",
+        "make quiz",
+        "اختبار عن",
+        "اختبار حول",
+    ],
+    "explanation": ["what is", "what are", "explain the concept", "define", "ما هو", "ما هي"],
+    "general": [
+        "how to", "how can", "how do", "advice", "help me", "hello", "hi", "thanks",
+        "كيف", "نصيحة", "مرحبا", "شكرا"
+    ],
+    "greeting": [
+        "hello", "hi", "hey", "good morning", "good afternoon", "good evening",
+        "مرحبا", "السلام", "السلام عليكم", "أهلا", "صباح الخير", "مساء الخير"
+    ],
+    "thanks": [
+        "thanks", "thank you", "thx", "many thanks", "appreciate it",
+        "شكرا", "شكرا جزيلا", "جزاك الله خيرا", "ممتن"
+    ],
+    "farewell": [
+        "bye", "goodbye", "good night", "see you", "see you later", "take care",
+        "مع السلامة", "وداعا", "إلى اللقاء", "تصبح على خير"
+    ],
+    "wellbeing": ["how are you", "how are you doing", "كيف حالك", "كيفك"],
+    "topic_stopword": ["generate", "create", "make", "quiz", "test", "exam", "the", "a", "an"],
+}
+
+# Phrases that only count when they are the whole message
+EXACT_PHRASES = {
+    "affirmation": ["y"],
+}
+
+
+class IntentMatch:
+    """A phrase found in the input text."""
+
+    __slots__ = ("phrase", "intents", "start", "end")
+
+    def __init__(self, phrase: str, intents: frozenset, start: int, end: int):
+        """
+        Initialize a match.
+
+        Args:
+            phrase: The normalized phrase that matched
+            intents: All intents of the phrase, including those of shorter
+                phrases it contains
+            start: Start index in the original text
+            end: End index (exclusive) in the original text
+        """
+        self.phrase = phrase
+        self.intents = intents
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return f"IntentMatch({self.phrase!r}, {sorted(self.intents)}, {self.start}, {self.end})"
+
+
+class IntentMatcher:
+    """Matches all intent phrases in one pass using a compiled alternation."""
+
+    EDGE_PUNCTUATION = " \t\n.,!?؟،؛:;\"'()"
+
+    def __init__(
+        self,
+        phrases: Dict[str, List[str]],
+        exact_phrases: Dict[str, List[str]] = None
+    ):
+        """
+        Build the matcher.
+
+        Latin phrases only match on word boundaries ("hi" does not match
+        "this"). Arabic phrases match anywhere, so words with attached
+        prefixes such as "ال" or "و" still match.
+
+        Args:
+            phrases: Mapping of intent -> phrases to find anywhere in the text
+            exact_phrases: Mapping of intent -> phrases that only count as an
+                exact (whole message) match
+        """
+        phrase_intents: Dict[str, Set[str]] = {}
+        for intent, intent_phrases in phrases.items():
+            for phrase in intent_phrases:
+                phrase_intents.setdefault(ArabicUtils.normalize(phrase), set()).add(intent)
+
+        # Latin phrases share one word-boundary check (they all start and end
+        # with a letter, so \b is enough); both groups are
+        # factored into a trie so the regex never tries phrases one by one
+        ordered = sorted(phrase_intents, key=len, reverse=True)
+        latin = [phrase for phrase in ordered if not ArabicUtils.contains_arabic(phrase)]
+        arabic = [phrase for phrase in ordered if ArabicUtils.contains_arabic(phrase)]
+        self.pattern = re.compile(
+            r'\b' + self._trie_pattern(latin) + r'\b|' + self._trie_pattern(arabic)
+        )
+
+        # A long phrase also carries the intents of the phrases it contains
+        # ("quiz on" is also a "quiz_keyword"), since matches do not overlap
+        self.phrase_intents = {}
+        for phrase in ordered:
+            intents = set(phrase_intents[phrase])
+            for inner in ordered:
+                if inner != phrase and len(inner) < len(phrase) and re.search(self._phrase_pattern(inner), phrase):
+                    intents |= phrase_intents[inner]
+            self.phrase_intents[phrase] = frozenset(intents)
+
+        self.exact_phrases: Dict[str, Set[str]] = {}
+        for intent, intent_phrases in list(phrases.items()) + list((exact_phrases or {}).items()):
+            self.exact_phrases.setdefault(intent, set()).update(
+                ArabicUtils.normalize(phrase) for phrase in intent_phrases
+            )
+
+    @staticmethod
+    def _trie_pattern(phrases: List[str]) -> str:
+        """
+        Build a regex matching any of the phrases, factored by common prefix.
+
+        Optional suffixes are greedy, so the longest phrase at a position
+        wins, falling back to shorter ones if a boundary check fails.
+
+        Args:
+            phrases: Normalized phrases
+
+        Returns:
+            Regex source for a non-capturing group
+        """
+        trie: Dict[str, Any] = {}
+        for phrase in phrases:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict[str, Any]) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            return "(?:" + body + ")?" if "" in node else body
+
+        return "(?:" + build(trie) + ")"
+
+    @staticmethod
+    def _phrase_pattern(phrase: str) -> str:
+        """Build the regex for one normalized phrase."""
+        escaped = re.escape(phrase)
+        if ArabicUtils.contains_arabic(phrase):
+            return escaped
+        return r'(?<!\w)' + escaped + r'(?!\w)'
+
+    def scan(self, text: str) -> List[IntentMatch]:
+        """
+        Find all phrase matches in a single pass.
+
+        Args:
+            text: Input text (any case, Arabic diacritics allowed)
+
+        Returns:
+            Non-overlapping matches, left to right, with spans in the
+            original text
+        """
+        normalized, offsets = ArabicUtils.normalize_with_offsets(text)
+
+        matches = []
+        for match in self.pattern.finditer(normalized):
+            phrase = match.group()
+            if offsets is None:
+                start, end = match.span()
+            else:
+                start = offsets[match.start()]
+                end = offsets[match.end() - 1] + 1
+            matches.append(IntentMatch(phrase, self.phrase_intents[phrase], start, end))
+
+        return matches
+
+    def intents(self, text: str) -> Set[str]:
+        """
+        Get every intent matched anywhere in the text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Set of intent names
+        """
+        found = set()
+        for match in self.scan(text):
+            found |= match.intents
+        return found
+
+    def matches_exactly(self, text: str, intents: Iterable[str]) -> bool:
+        """
+        Check whether the whole message is a single phrase of some intents.
+
+        Surrounding whitespace and punctuation are ignored ("Yes!" matches).
+
+        Args:
+            text: Input text
+            intents: Intent names to check
+
+        Returns:
+            True if the message is exactly one phrase of the given intents
+        """
+        normalized = ArabicUtils.normalize(text).strip(self.EDGE_PUNCTUATION)
+        return any(normalized in self.exact_phrases.get(intent, ()) for intent in intents)
+
+    @staticmethod
+    def remove_spans(text: str, matches: Iterable[IntentMatch]) -> str:
+        """
+        Replace the spans of the given matches with spaces.
+
+        Args:
+            text: The original text that was scanned
+            matches: Matches whose spans should be removed
+
+        Returns:
+            Text with the matched spans replaced by a space
+        """
+        parts = []
+        position = 0
+
+        for match in matches:
+            parts.append(text[position:match.start])
+            parts.append(" ")
+            position = match.end
+
+        parts.append(text[position:])
+        return "".join(parts)
+
+
+# Global instance, built once at import
+intent_matcher = IntentMatcher(INTENT_PHRASES, EXACT_PHRASES)
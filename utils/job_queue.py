@@ -0,0 +1,257 @@
+"""
+Request Job Queue.
+
+Runs requests on a fixed pool of worker threads instead of the caller's
+thread. Submitting returns a Job with an ID whose status and pipeline
+steps can be polled while it runs; the queue depth is bounded so excess
+load is shed at submission, and a newer job for the same key (usually
+the session) cancels the one it supersedes. Jobs with the same key never
+run at the same time: a job starts only once the one it superseded has
+stopped, since both work on the same session state.
+"""
+
+import queue
+import secrets
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+from config import config
+from utils.request_context import RequestContext
+from utils.metrics import job_queue_depth, jobs_total, job_wait_seconds
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its maximum depth."""
+
+
+class Job:
+    """A request waiting for or running on a worker."""
+
+    def __init__(self, func: Callable[..., Any], args: tuple, context: RequestContext, key: Optional[str] = None):
+        """
+        Initialize a job.
+
+        Args:
+            func: Function to run; called as func(*args, context=context)
+            args: Positional arguments for func
+            context: Request context of the job (its progress callback is
+                wrapped to record the job's steps)
+            key: Optional key; a newer job with the same key cancels this one
+        """
+        self.job_id = secrets.token_hex(8)
+        self.func = func
+        self.args = args
+        self.context = context
+        self.key = key
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.step = "queued"
+        self.steps: List[Dict[str, Any]] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.previous: Optional["Job"] = None  # Unfinished job with the same key, run first
+
+        # Record every pipeline step, then pass it on to the caller's callback
+        caller_callback = context.on_progress
+
+        def on_progress(step: str, details: Dict[str, Any]):
+            with self.lock:
+                self.step = step
+                self.steps.append({"step": step, "details": details, "time": time.time()})
+            if caller_callback is not None:
+                caller_callback(step, details)
+
+        context.on_progress = on_progress
+
+    def cancel(self) -> None:
+        """Cancel the job: a queued job is skipped, a running one stops at its next check."""
+        self.context.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the job to finish.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if the job has finished
+        """
+        return self.finished.wait(timeout)
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self.lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+        jobs_total.inc(status=status)
+        self.finished.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the job's current state.
+
+        Returns:
+            Dictionary with job_id, status, step, steps, error and timings
+            (the result is read from job.result once finished)
+        """
+        with self.lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "step": self.step,
+                "steps": list(self.steps),
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+
+
+class JobQueue:
+    """Bounded FIFO of jobs served by a pool of worker threads."""
+
+    def __init__(self, workers: int = None, max_depth: int = None, retention: int = None):
+        """
+        Initialize the queue (workers start with the first job).
+
+        Args:
+            workers: Worker threads (defaults to Config.JOB_WORKERS)
+            max_depth: Jobs allowed to wait (defaults to Config.JOB_QUEUE_DEPTH)
+            retention: Seconds a finished job stays retrievable by ID
+                (defaults to Config.JOB_RETENTION)
+        """
+        self.workers = workers or config.JOB_WORKERS
+        self.max_depth = max_depth or config.JOB_QUEUE_DEPTH
+        self.retention = retention or config.JOB_RETENTION
+        self.queue: "queue.Queue[Job]" = queue.Queue(maxsize=self.max_depth)
+        self.jobs: Dict[str, Job] = {}
+        self.latest_by_key: Dict[str, Job] = {}
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args,
+        context: Optional[RequestContext] = None,
+        key: Optional[str] = None
+    ) -> Job:
+        """
+        Queue a call to run on a worker.
+
+        Args:
+            func: Function to run; called as func(*args, context=context)
+            *args: Positional arguments for func
+            context: Request context (a fresh one when omitted)
+            key: Optional key, e.g. the session ID; the previous unfinished
+                job with the same key is cancelled
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If max_depth jobs are already waiting
+        """
+        job = Job(func, args, context or RequestContext(), key)
+
+        with self.lock:
+            self._start_workers()
+            self._prune()
+
+            try:
+                self.queue.put_nowait(job)
+            except queue.Full:
+                jobs_total.inc(status="rejected")
+                raise QueueFullError(f"Job queue is full ({self.max_depth} waiting), try again shortly")
+
+            self.jobs[job.job_id] = job
+            if key is not None:
+                previous = self.latest_by_key.get(key)
+                if previous is not None and not previous.finished.is_set():
+                    previous.cancel()
+                    job.previous = previous
+                self.latest_by_key[key] = job
+
+        job_queue_depth.set(self.queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID (None if unknown or no longer retained)."""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job by ID.
+
+        Returns:
+            False if the job is unknown or already finished
+        """
+        job = self.get(job_id)
+        if job is None or job.finished.is_set():
+            return False
+        job.cancel()
+        return True
+
+    def _start_workers(self) -> None:
+        """Start the worker threads on first use (called with the lock held)."""
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self.threads)}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the retention period (called with the lock held)."""
+        cutoff = time.time() - self.retention
+        for job_id in [jid for jid, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            job = self.jobs.pop(job_id)
+            if job.key is not None and self.latest_by_key.get(job.key) is job:
+                del self.latest_by_key[job.key]
+
+    def _work(self) -> None:
+        """Worker loop: run jobs in submission order."""
+        while True:
+            job = self.queue.get()
+            job_queue_depth.set(self.queue.qsize())
+
+            try:
+                if job.previous is not None:
+                    # The superseded job was queued first, so it is already
+                    # on a worker and stops at its next check
+                    job.previous.finished.wait()
+                    job.previous = None
+
+                if job.context.cancelled:
+                    # Superseded or cancelled while waiting
+                    job._finish("cancelled", error="Request cancelled")
+                    continue
+
+                with job.lock:
+                    job.status = "running"
+                    job.started_at = time.time()
+                job_wait_seconds.observe(job.started_at - job.submitted_at)
+
+                result = job.func(*job.args, context=job.context)
+
+                if job.context.cancelled:
+                    job._finish("cancelled", result, "Request cancelled")
+                elif isinstance(result, dict) and result.get("error"):
+                    job._finish("failed", result, result["error"])
+                else:
+                    job._finish("done", result)
+
+            except Exception as e:
+                job._finish("failed", error=str(e))
+
+            finally:
+                self.queue.task_done()
+
+
+# Global instance
+job_queue = JobQueue()
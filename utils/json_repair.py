@@ -0,0 +1,129 @@
+"""
+JSON Repair Utilities.
+
+Fixes common defects in model-generated JSON locally, so a response with
+a trailing comma or a truncated array does not cost another LLM call.
+"""
+
+import json
+import re
+from typing import Dict, Any
+
+
+class JSONRepair:
+    """Best-effort repair of malformed JSON text."""
+
+    TRAILING_COMMA = re.compile(r',\s*([}\]])')
+
+    @staticmethod
+    def strip_code_fences(text: str) -> str:
+        """
+        Extract the JSON body from markdown code fences or surrounding prose.
+
+        Args:
+            text: Raw response text
+
+        Returns:
+            Text starting at the first opening brace
+        """
+        if "```json" in text:
+            text = text.split("```json", 1)[1]
+            text = text.split("```", 1)[0]
+        elif "```" in text:
+            text = text.split("```", 1)[1]
+            text = text.split("```", 1)[0]
+
+        start = text.find("{")
+        if start > 0:
+            text = text[start:]
+
+        return text.strip()
+
+    @staticmethod
+    def close_truncated(text: str) -> str:
+        """
+        Close strings, arrays and objects left open by a truncated response.
+
+        Args:
+            text: JSON text that may end mid-value
+
+        Returns:
+            JSON text with all open structures closed
+        """
+        stack = []
+        in_string = False
+        escaped = False
+
+        for i, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                continue
+
+            if char == '"':
+                in_string = True
+            elif char in "{[":
+                stack.append("}" if char == "{" else "]")
+            elif char in "}]" and stack:
+                stack.pop()
+                if not stack:
+                    # Drop anything after the top-level value (extra prose)
+                    return text[:i + 1]
+
+        if in_string:
+            if escaped:
+                text = text[:-1]
+            text += '"'
+
+        text = text.rstrip()
+
+        # Drop a dangling object key that has no value yet
+        if stack and stack[-1] == "}":
+            text = re.sub(r'([{,])\s*"[^"]*"\s*:?\s*$', r'\1', text)
+
+        text = re.sub(r'[,:]\s*$', '', text)
+
+        return text + "".join(reversed(stack))
+
+    @classmethod
+    def repair(cls, text: str) -> str:
+        """
+        Apply all repairs to a JSON text.
+
+        Args:
+            text: Raw response text
+
+        Returns:
+            Repaired JSON text (not guaranteed to parse)
+        """
+        text = cls.strip_code_fences(text)
+        text = cls.close_truncated(text)
+        text = cls.TRAILING_COMMA.sub(r'\1', text)
+        return text
+
+    @classmethod
+    def loads(cls, text: str) -> Dict[str, Any]:
+        """
+        Parse JSON text, repairing it first if it does not parse as-is.
+
+        Args:
+            text: Raw response text
+
+        Returns:
+            Parsed JSON value
+
+        Raises:
+            json.JSONDecodeError: If the text cannot be repaired
+        """
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return json.loads(cls.repair(text))
+
+
+# Global instance
+json_repair = JSONRepair()
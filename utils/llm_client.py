@@ -2,25 +2,56 @@
 LLM Client Wrapper for OpenAI API.
 
 Provides a unified interface for interacting with OpenAI's API,
-including error handling, retries, and response parsing.
+including error handling, retries, endpoint failover and response parsing.
 """
 
 import json
+import threading
 import time
-from typing import Dict, Any, Optional, List
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, List, Tuple
 from config import config
+from openai import APIStatusError
+from pydantic import ValidationError
+from utils.json_repair import json_repair
+from utils.schemas import AGENT_SCHEMAS, coerce_result, get_json_schema
+from utils.wire_schema import WIRE_SCHEMAS, wire_stats
+from utils.token_estimator import token_estimator, token_budgets
+from utils.tracing import tracer
+from utils.cassette import cassette, CassetteMissError
+from utils.request_context import current_context, RequestCancelledError
+from utils.scheduler import llm_scheduler, Ticket
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.endpoint_pool import EndpointPool, Endpoint, is_endpoint_failure
+from utils.hedging import hedger
+from utils.http_transport import build_timeout
+from utils.metrics import (
+    llm_request_seconds,
+    llm_requests_total,
+    llm_retries_total,
+    llm_tokens_total,
+    llm_truncations_total,
+    llm_in_flight,
+    llm_failovers_total,
+    llm_hedges_total
+)
 
 
 class LLMClient:
     """Wrapper class for OpenAI API interactions."""
 
     def __init__(self):
-        """Initialize the OpenAI client."""
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
-        self.model = config.OPENAI_MODEL
+        """Initialize the endpoint pool (see Config.LLM_ENDPOINTS)."""
+        self.pool = EndpointPool.from_config()
+        self.model = self.pool.endpoints[0].model  # Primary model; cassettes are keyed by it
         self.max_retries = 3
         self.retry_delay = 2  # seconds
+        self.breaker = CircuitBreaker(probe=self._probe)
+        # Threads running hedged calls; every running call, an abandoned one
+        # included, holds a scheduler slot, so this never runs short
+        self.hedge_executor = ThreadPoolExecutor(
+            max_workers=2 * (config.LLM_MAX_CONCURRENCY or 16), thread_name_prefix="llm-hedge"
+        )
 
     def generate_completion(
         self,
@@ -28,7 +59,8 @@ class LLMClient:
         user_prompt: str,
         temperature: float = None,
         max_tokens: int = None,
-        response_format: Optional[str] = None
+        response_format: Optional[Any] = None,
+        agent: Optional[str] = None
     ) -> str:
         """
         Generate a completion from OpenAI API.
@@ -37,8 +69,11 @@ class LLMClient:
             system_prompt: System message defining agent behavior
             user_prompt: User message with the actual request
             temperature: Sampling temperature (0-2)
-            max_tokens: Maximum tokens in response
-            response_format: Optional format specification ("json_object" for JSON)
+            max_tokens: Maximum tokens in response; when omitted it is sized
+                from the input by the agent's token budget policy
+            response_format: Optional format specification ("json_object" for JSON,
+                or a full response_format dictionary such as a json_schema)
+            agent: Optional agent profile name
 
         Returns:
             Generated text response
@@ -46,43 +81,20 @@ class LLMClient:
         Raises:
             Exception: If API call fails after retries
         """
-        temperature = temperature if temperature is not None else config.TEMPERATURE
-        max_tokens = max_tokens if max_tokens is not None else config.MAX_TOKENS
-
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
 
-        for attempt in range(self.max_retries):
-            try:
-                kwargs = {
-                    "model": self.model,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
-
-                if response_format == "json_object":
-                    kwargs["response_format"] = {"type": "json_object"}
-
-                response = self.client.chat.completions.create(**kwargs)
-
-                return response.choices[0].message.content.strip()
-
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-                    continue
-                else:
-                    raise Exception(f"API call failed after {self.max_retries} attempts: {str(e)}")
+        return self._chat(messages, temperature, max_tokens, response_format, agent)
 
     def generate_json_completion(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = None,
-        max_tokens: int = None
+        max_tokens: int = None,
+        agent: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate a JSON-formatted completion from OpenAI API.
@@ -92,6 +104,9 @@ class LLMClient:
             user_prompt: User message with the actual request
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens in response
+            agent: Optional agent profile name; when it has a result schema
+                the response is schema-constrained (where supported),
+                repaired, coerced and expanded to the full key names
 
         Returns:
             Parsed JSON response as dictionary
@@ -104,31 +119,130 @@ class LLMClient:
             user_prompt=user_prompt,
             temperature=temperature,
             max_tokens=max_tokens,
-            response_format="json_object"
+            response_format=self._json_response_format(agent),
+            agent=agent
         )
 
-        try:
-            return json.loads(response_text)
-        except json.JSONDecodeError as e:
-            # Fallback: try to extract JSON from response
+        return self.parse_agent_json(response_text, agent)
+
+    def generate_json_with_history(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = None,
+        max_tokens: int = None,
+        agent: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a JSON-formatted completion with conversation history.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            agent: Optional agent profile name (see generate_json_completion)
+
+        Returns:
+            Parsed JSON response as dictionary
+        """
+        response_text = self.generate_with_history(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=self._json_response_format(agent),
+            agent=agent
+        )
+
+        return self.parse_agent_json(response_text, agent)
+
+    def parse_agent_json(self, response_text: str, agent: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Parse, repair and coerce a JSON response for an agent.
+
+        Args:
+            response_text: Raw response text
+            agent: Optional agent profile name
+
+        Returns:
+            Result dictionary using the full key names
+
+        Raises:
+            Exception: If JSON parsing fails even after repair
+        """
+        with tracer.span("json.parse", **{"json.agent": agent or "unknown", "json.chars": len(response_text)}) as span:
+            result = self._parse_json(response_text)
+
+            if agent not in AGENT_SCHEMAS:
+                return result
+
+            # Coerce types against the agent's schema; if that is not possible,
+            # still expand the compact keys so the validators report the problem
             try:
-                # Sometimes the model returns JSON wrapped in markdown code blocks
-                if "```json" in response_text:
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                    return json.loads(json_str)
-                elif "```" in response_text:
-                    json_str = response_text.split("```")[1].split("```")[0].strip()
-                    return json.loads(json_str)
-                else:
-                    raise e
-            except Exception:
-                raise Exception(f"Failed to parse JSON response: {response_text[:200]}...")
+                result = coerce_result(agent, result)
+            except ValidationError:
+                span.set_attribute("json.coerced", False)
+                result = WIRE_SCHEMAS[agent].expand(result)
+
+            wire_stats.record(agent, response_text, result)
+
+            return result
+
+    def _json_response_format(self, agent: Optional[str]) -> Any:
+        """
+        Choose the response format for a JSON request.
+
+        Args:
+            agent: Optional agent profile name
+
+        Returns:
+            A json_schema response format when some endpoint's model supports
+            structured outputs and the agent has a schema, otherwise
+            "json_object" (endpoints without support get "json_object" per call)
+        """
+        if not config.STRUCTURED_OUTPUTS or agent not in AGENT_SCHEMAS:
+            return "json_object"
+
+        if not any(endpoint.supports_structured_outputs for endpoint in self.pool.endpoints):
+            return "json_object"
+
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": f"{agent}_result",
+                "schema": get_json_schema(agent),
+                "strict": False
+            }
+        }
+
+    def _parse_json(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse a JSON response, repairing common defects locally.
+
+        Args:
+            response_text: Raw response text
+
+        Returns:
+            Parsed JSON response as dictionary
+
+        Raises:
+            Exception: If JSON parsing fails
+        """
+        try:
+            result = json_repair.loads(response_text)
+        except json.JSONDecodeError:
+            raise Exception(f"Failed to parse JSON response: {response_text[:200]}...")
+
+        if not isinstance(result, dict):
+            raise Exception(f"Expected a JSON object, got: {response_text[:200]}...")
+
+        return result
 
     def generate_with_history(
         self,
         messages: List[Dict[str, str]],
         temperature: float = None,
-        max_tokens: int = None
+        max_tokens: int = None,
+        response_format: Optional[Any] = None,
+        agent: Optional[str] = None
     ) -> str:
         """
         Generate a completion with conversation history.
@@ -136,31 +250,405 @@ class LLMClient:
         Args:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Sampling temperature (0-2)
-            max_tokens: Maximum tokens in response
+            max_tokens: Maximum tokens in response (see generate_completion)
+            response_format: Optional format specification (see generate_completion)
+            agent: Optional agent profile name
 
         Returns:
             Generated text response
         """
+        return self._chat(messages, temperature, max_tokens, response_format, agent)
+
+    def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = None,
+        max_tokens: int = None,
+        response_format: Optional[Any] = None,
+        agent: Optional[str] = None
+    ) -> str:
+        """
+        Send a chat completion request with retries.
+
+        Each attempt waits for a slot from the LLM scheduler, by the
+        current request's priority class and session, and goes to an
+        endpoint of the pool. A failed attempt is retried at once on an
+        endpoint not tried yet; only when none is left does it wait
+        retry_delay. A request the API rejects (a 4xx other than 429) is
+        not retried, since it would fail the same way on every attempt.
+        While the circuit breaker is open calls fail immediately with
+        CircuitOpenError; the breaker records each request once, by its
+        final outcome, and only failures that are the endpoints' (see
+        is_endpoint_failure) count against it. Inside a request context the
+        call is bounded by the request's deadline and stops once the
+        request is cancelled.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response (see generate_completion)
+            response_format: Optional format specification (see generate_completion)
+            agent: Optional agent profile name
+
+        Returns:
+            Generated text response
+
+        Raises:
+            RequestCancelledError: If the current request was cancelled or
+                ran past its deadline before a call
+            CircuitOpenError: If the circuit breaker is open
+            Exception: If API call fails after retries
+        """
         temperature = temperature if temperature is not None else config.TEMPERATURE
-        max_tokens = max_tokens if max_tokens is not None else config.MAX_TOKENS
 
-        for attempt in range(self.max_retries):
+        # The last user message carries the actual input to size the budget from
+        user_messages = [m for m in messages if m["role"] == "user"]
+        input_tokens = token_estimator.estimate(user_messages[-1]["content"]) if user_messages else 0
+
+        if max_tokens is None:
+            max_tokens = token_budgets.max_tokens_for(agent, input_tokens)
+
+        kwargs = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        if response_format == "json_object":
+            kwargs["response_format"] = {"type": "json_object"}
+        elif isinstance(response_format, dict):
+            kwargs["response_format"] = response_format
+
+        agent_label = agent or "unknown"
+        context = current_context()
+        # Shared calls (micro-batches) are nobody's in particular: no per-user limits
+        user = None if context and context.shared else (context.session_id if context else "anonymous")
+        priority = (context.priority if context else None) or "standard"
+        estimated_tokens = token_estimator.estimate_messages(messages) + max_tokens
+        tried: set = set()  # Endpoints that failed since the last retry delay
+        start_time = time.time()
+        llm_in_flight.inc()
+
+        with tracer.span("llm.chat", **{
+            "llm.agent": agent_label,
+            "llm.model": self.model,
+            "llm.max_tokens": max_tokens
+        }) as chat_span:
+            for attempt in range(self.max_retries):
+                try:
+                    if context is not None:
+                        context.check()
+                    self.breaker.check()
+
+                    with tracer.span("llm.attempt", **{"llm.attempt": attempt + 1}):
+                        with llm_scheduler.slot(user, priority, estimated_tokens) as ticket:
+                            call_start = time.time()
+                            response = self._create(kwargs, agent, context.remaining() if context else None, tried, ticket)
+                            ticket.tokens = response["prompt_tokens"] + response["completion_tokens"]
+                    self.breaker.record(True, time.time() - call_start, tokens=response["completion_tokens"])
+
+                    content = response["content"]
+                    finish_reason = response["finish_reason"]
+                    prompt_tokens = response["prompt_tokens"]
+                    completion_tokens = response["completion_tokens"]
+                    token_budgets.record(agent, input_tokens, completion_tokens, max_tokens, finish_reason)
+
+                    chat_span.set_attribute("llm.attempts", attempt + 1)
+                    chat_span.set_attribute("llm.prompt_tokens", prompt_tokens)
+                    chat_span.set_attribute("llm.completion_tokens", completion_tokens)
+                    chat_span.set_attribute("llm.finish_reason", finish_reason)
+
+                    llm_in_flight.dec()
+                    llm_request_seconds.observe(time.time() - start_time, agent=agent_label)
+                    llm_requests_total.inc(agent=agent_label, outcome="ok")
+                    llm_tokens_total.inc(prompt_tokens, agent=agent_label, kind="prompt")
+                    llm_tokens_total.inc(completion_tokens, agent=agent_label, kind="completion")
+                    if finish_reason == "length":
+                        llm_truncations_total.inc(agent=agent_label)
+
+                    return content
+
+                except (CassetteMissError, RequestCancelledError, CircuitOpenError):
+                    # Replaying an unrecorded request is a test setup error, a
+                    # stopped request must not be retried, and while the circuit
+                    # is open failing fast is the point
+                    llm_in_flight.dec()
+                    llm_requests_total.inc(agent=agent_label, outcome="error")
+                    raise
+
+                except Exception as e:
+                    attempts = attempt + 1
+                    stopped = context is not None and context.stop_reason()
+                    if stopped or (isinstance(e, APIStatusError) and not is_endpoint_failure(e)):
+                        # The deadline passed during the call, or the request
+                        # itself was rejected; don't retry
+                        attempt = self.max_retries - 1
+
+                    if attempt < self.max_retries - 1:
+                        llm_retries_total.inc(agent=agent_label)
+                        if self.pool.has_alternative(tried):
+                            # Fail over to another endpoint instead of waiting
+                            llm_failovers_total.inc(agent=agent_label)
+                        else:
+                            time.sleep(self.retry_delay)
+                            tried.clear()
+                        continue
+                    else:
+                        if is_endpoint_failure(e) and not stopped:
+                            self.breaker.record(False, time.time() - start_time, str(e))
+                        chat_span.set_attribute("llm.attempts", attempts)
+                        llm_in_flight.dec()
+                        llm_request_seconds.observe(time.time() - start_time, agent=agent_label)
+                        llm_requests_total.inc(agent=agent_label, outcome="error")
+                        raise Exception(f"API call failed after {attempts} attempt(s): {str(e)}")
+
+    def _create(
+        self,
+        kwargs: Dict[str, Any],
+        agent: Optional[str],
+        timeout: Optional[float] = None,
+        tried: Optional[set] = None,
+        ticket: Optional[Ticket] = None
+    ) -> Dict[str, Any]:
+        """
+        Perform one chat completion request, or replay it from the cassette.
+
+        The request goes to the pool's next endpoint, with its model. For
+        hedged agent profiles a duplicate is sent when the call runs past
+        the profile's p95 latency (see utils.hedging), and the first
+        answer is used.
+
+        Args:
+            kwargs: Keyword arguments for chat.completions.create (cassettes
+                are keyed by these, with the primary model)
+            agent: Optional agent profile name
+            timeout: Optional seconds left for the request (the time to the
+                request's deadline)
+            tried: Optional set of endpoints already tried; the chosen
+                endpoint is avoided if possible and added to it
+            ticket: Scheduler ticket the call runs under; a duplicate is
+                only sent with a slot of its own (without one, no hedging)
+
+        Returns:
+            Dictionary with content, finish_reason, prompt_tokens and
+            completion_tokens
+
+        Raises:
+            CassetteMissError: In replay mode, for an unrecorded request
+        """
+        if cassette.mode == "replay":
+            return cassette.replay(kwargs)
+
+        tried = tried if tried is not None else set()
+        endpoint = self.pool.acquire(exclude=tried)
+        tried.add(endpoint)
+
+        delay = hedger.delay_for(agent) if ticket is not None else None
+        if delay is None:
+            response = self._call_endpoint(endpoint, kwargs, agent, timeout)
+        else:
+            response, endpoint = self._hedged_call(endpoint, kwargs, agent, timeout, tried, delay, ticket)
+
+        span = tracer.current_span()
+        if span is not None:
+            span.set_attribute("llm.endpoint", endpoint.name)
+
+        choice = response.choices[0]
+        content = choice.message.content.strip()
+        usage = getattr(response, "usage", None)
+
+        result = {
+            "content": content,
+            "finish_reason": getattr(choice, "finish_reason", None),
+            "prompt_tokens": getattr(usage, "prompt_tokens", None) or token_estimator.estimate_messages(kwargs["messages"]),
+            "completion_tokens": getattr(usage, "completion_tokens", None) or token_estimator.estimate(content)
+        }
+
+        if cassette.mode == "record":
+            cassette.record(kwargs, result, agent)
+
+        return result
+
+    def _call_endpoint(
+        self,
+        endpoint: Endpoint,
+        kwargs: Dict[str, Any],
+        agent: Optional[str],
+        timeout: Optional[float]
+    ) -> Any:
+        """
+        Send one request to an endpoint acquired from the pool and release it.
+
+        Only failures that are the endpoint's (see is_endpoint_failure)
+        count against its health; the circuit breaker is fed by _chat, once
+        per request.
+
+        Args:
+            endpoint: Endpoint returned by pool.acquire()
+            kwargs: Keyword arguments for chat.completions.create
+            agent: Optional agent profile name
+            timeout: Optional seconds left for the request
+
+        Returns:
+            The API response
+        """
+        request = self._endpoint_request(kwargs, endpoint)
+
+        call_start = time.time()
+        try:
+            if timeout is not None:
+                response = endpoint.client.chat.completions.create(**request, timeout=build_timeout(max(timeout, 1.0)))
+            else:
+                response = endpoint.client.chat.completions.create(**request)
+        except Exception as e:
+            latency = time.time() - call_start
+            self.pool.release(endpoint, False if is_endpoint_failure(e) else None, latency, str(e))
+            raise
+        latency = time.time() - call_start
+        self.pool.release(endpoint, True, latency)
+        hedger.record(agent, latency)
+
+        return response
+
+    def _hedged_call(
+        self,
+        endpoint: Endpoint,
+        kwargs: Dict[str, Any],
+        agent: Optional[str],
+        timeout: Optional[float],
+        tried: set,
+        delay: float,
+        ticket: Ticket
+    ) -> Tuple[Any, Endpoint]:
+        """
+        Send a request and, if it is still running after delay, a duplicate.
+
+        The duplicate goes to another endpoint when one is available and
+        is only sent while the hedging rate cap allows and the scheduler
+        has a free slot for it. The first successful answer is returned;
+        the other call is abandoned (its result is discarded when it
+        arrives), since a running HTTP request cannot be withdrawn. The
+        duplicate's slot is held until both calls have ended, so the
+        abandoned call still counts against LLM_MAX_CONCURRENCY and the
+        user's quota after the caller has given its own slot back.
+
+        Args:
+            endpoint: Endpoint returned by pool.acquire() for the first call
+            kwargs: Keyword arguments for chat.completions.create
+            agent: Optional agent profile name
+            timeout: Optional seconds left for the request
+            tried: Endpoints already tried for this call
+            delay: Seconds to wait before hedging
+            ticket: Scheduler ticket of the call
+
+        Returns:
+            Tuple of (API response, endpoint that answered)
+        """
+        primary = self.hedge_executor.submit(self._call_endpoint, endpoint, kwargs, agent, timeout)
+        try:
+            return primary.result(timeout=delay), endpoint
+        except FutureTimeoutError:
+            pass
+
+        if not hedger.allow():
+            return primary.result(), endpoint
+
+        backup_ticket = llm_scheduler.try_acquire(ticket)
+        if backup_ticket is None:
+            llm_hedges_total.inc(agent=agent or "unknown", outcome="no_slot")
+            return primary.result(), endpoint
+
+        backup_endpoint = self.pool.acquire(exclude=tried)
+        tried.add(backup_endpoint)
+        backup_timeout = timeout - delay if timeout is not None else None
+        backup = self.hedge_executor.submit(self._call_endpoint, backup_endpoint, kwargs, agent, backup_timeout)
+        llm_hedges_total.inc(agent=agent or "unknown", outcome="sent")
+
+        # Give the duplicate's slot back when the second of the two calls ends
+        running = [2]
+        running_lock = threading.Lock()
+
+        def call_ended(future):
+            with running_lock:
+                running[0] -= 1
+                last = not running[0]
+            if last:
+                llm_scheduler.release(backup_ticket)
+
+        primary.add_done_callback(call_ended)
+        backup.add_done_callback(call_ended)
+
+        endpoints = {primary: endpoint, backup: backup_endpoint}
+        pending = set(endpoints)
+        error = None
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is backup:
+                    llm_hedges_total.inc(agent=agent or "unknown", outcome="won")
+                return response, endpoints[future]
+
+        raise error
+
+    @staticmethod
+    def _endpoint_request(kwargs: Dict[str, Any], endpoint: Endpoint) -> Dict[str, Any]:
+        """
+        Adapt request arguments to an endpoint.
+
+        Args:
+            kwargs: Keyword arguments for chat.completions.create
+            endpoint: Endpoint the request goes to
+
+        Returns:
+            The arguments with the endpoint's model, and a json_object
+            response format if its model has no structured outputs
+        """
+        request = dict(kwargs, model=endpoint.model)
+        response_format = request.get("response_format")
+        if response_format and response_format.get("type") == "json_schema" and not endpoint.supports_structured_outputs:
+            request["response_format"] = {"type": "json_object"}
+        return request
+
+    def _probe(self) -> None:
+        """
+        Make the cheapest possible call, for the circuit breaker's recovery probe.
+
+        Each endpoint is tried in turn until one answers.
+
+        Raises:
+            Exception: If no endpoint answers
+        """
+        tried: set = set()
+        error = None
+
+        for _ in self.pool.endpoints:
+            endpoint = self.pool.acquire(exclude=tried)
+            tried.add(endpoint)
+
+            call_start = time.time()
             try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                client = endpoint.client.with_options(timeout=config.LLM_BREAKER_SLOW_SECONDS)
+                client.chat.completions.create(
+                    model=endpoint.model,
+                    messages=[{"role": "user", "content": "ping"}],
+                    max_tokens=1
                 )
+            except Exception as e:
+                self.pool.release(endpoint, False if is_endpoint_failure(e) else None, time.time() - call_start, str(e))
+                error = e
+                continue
 
-                return response.choices[0].message.content.strip()
+            self.pool.release(endpoint, True, time.time() - call_start)
+            return
 
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_delay)
-                    continue
-                else:
-                    raise Exception(f"API call failed after {self.max_retries} attempts: {str(e)}")
+        raise error
 
 
 # Global LLM client instance
@@ -3,16 +3,44 @@ Message History Utility.
 
 Manages persistent storage of recent user messages using browser localStorage.
 Maintains the last 5 user messages across sessions.
+
+The history lives in the session state passed in by the caller, so the
+same instance can serve any number of sessions. The browser copy is kept
+in sync by one zero-height component mounted once per session: it returns
+the stored history when it loads, and every rerun hands it only the
+operations (append / clear) recorded since, which it writes to
+localStorage after a short pause instead of on every message.
 """
 
-import json
-from typing import List
-import streamlit as st
+import os
+import secrets
+from typing import Dict, List, MutableMapping, Any, Optional
 import streamlit.components.v1 as components
 
 
+# Milliseconds the browser waits for more changes before writing localStorage
+WRITE_DEBOUNCE_MS = 300
+
+# Static frontend of the sync component (plain HTML, no build step)
+_sync_component = components.declare_component(
+    "message_history_sync",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "message_history_frontend")
+)
+
+
+def _apply_ops(messages: List[str], ops: List[Dict[str, Any]], max_messages: int) -> List[str]:
+    """Apply history operations to a list of messages, as the browser does."""
+    messages = list(messages)
+    for op in ops:
+        if op["op"] == "clear":
+            messages = []
+        else:
+            messages.append(op["text"])
+    return messages[-max_messages:]
+
+
 class MessageHistory:
-    """Manages persistent message history using browser localStorage via JavaScript."""
+    """Manages persistent message history, synced with browser localStorage."""
 
     def __init__(self, max_messages: int = 5):
         """
@@ -23,135 +51,127 @@ class MessageHistory:
         """
         self.max_messages = max_messages
         self.storage_key = "baba_recent_messages"
+        self.session_key = "message_history_cache"
+        self.ops_key = "message_history_ops"
+        self.seq_key = "message_history_seq"
+        self.token_key = "message_history_session"
+        self.loaded_key = "message_history_loaded"
 
-    def _get_localStorage_component(self, mode: str, value: str = None) -> str:
+    def get_recent_messages(self, session_state: MutableMapping[str, Any]) -> List[str]:
         """
-        Generate JavaScript code for localStorage operations.
+        Retrieve recent user messages of a session.
 
         Args:
-            mode: 'get', 'set', or 'clear'
-            value: Value to set (for 'set' mode)
-
-        Returns:
-            JavaScript code as string
-        """
-        if mode == "get":
-            return f"""
-            <script>
-                var messages = localStorage.getItem('{self.storage_key}');
-                var streamlit = window.parent.document.querySelector('iframe').contentWindow;
-                streamlit.postMessage({{
-                    type: 'streamlit:setComponentValue',
-                    value: messages
-                }}, '*');
-            </script>
-            """
-        elif mode == "set":
-            value_json = json.dumps(value)
-            return f"""
-            <script>
-                localStorage.setItem('{self.storage_key}', '{value_json}');
-            </script>
-            """
-        elif mode == "clear":
-            return f"""
-            <script>
-                localStorage.removeItem('{self.storage_key}');
-            </script>
-            """
-
-    def get_recent_messages(self) -> List[str]:
-        """
-        Retrieve recent user messages from localStorage.
+            session_state: The session's state
 
         Returns:
             List of recent user message strings (up to max_messages)
         """
         try:
-            # Use session state as cache
-            if 'message_history_cache' not in st.session_state:
-                st.session_state.message_history_cache = []
-
-            return st.session_state.message_history_cache[-self.max_messages:]
+            return list(session_state.get(self.session_key, []))[-self.max_messages:]
 
         except Exception as e:
             # If there's any error, return empty list
             return []
 
-    def add_message(self, message: str) -> None:
+    def add_message(self, session_state: MutableMapping[str, Any], message: str) -> List[str]:
         """
-        Add a new user message to history.
+        Add a new user message to a session's history.
 
         Args:
+            session_state: The session's state
             message: The user message to add
-        """
-        try:
-            # Get existing messages from session state cache
-            if 'message_history_cache' not in st.session_state:
-                st.session_state.message_history_cache = []
-
-            messages = st.session_state.message_history_cache
 
-            # Add new message
-            messages.append(message)
+        Returns:
+            The session's recent messages after adding
+        """
+        # Keep only the last N messages; a new list, so readers never see a partial update
+        messages = (list(session_state.get(self.session_key, [])) + [message])[-self.max_messages:]
+        session_state[self.session_key] = messages
+        self._record(session_state, {"op": "append", "text": message})
+        return messages
 
-            # Keep only the last N messages
-            messages = messages[-self.max_messages:]
+    def clear_history(self, session_state: MutableMapping[str, Any]) -> None:
+        """
+        Clear a session's message history, in the session and (on the next
+        sync) in the browser.
 
-            # Update session state
-            st.session_state.message_history_cache = messages
+        Args:
+            session_state: The session's state
+        """
+        session_state[self.session_key] = []
+        self._record(session_state, {"op": "clear"})
 
-            # Save to localStorage (non-blocking)
-            messages_json = json.dumps(messages)
-            self._save_to_localStorage(messages_json)
+    def _record(self, session_state: MutableMapping[str, Any], op: Dict[str, Any]) -> None:
+        """
+        Queue an operation for the browser.
 
-        except Exception as e:
-            # Fail silently - message history is not critical
-            pass
+        Operations are numbered per session so the browser applies each one
+        once. The queue never outgrows what can still change the stored
+        history: the last max_messages appends, and a clear only while
+        fewer appends than that follow it.
 
-    def _save_to_localStorage(self, value: str) -> None:
+        Args:
+            session_state: The session's state
+            op: The operation ("append" with its text, or "clear")
+        """
+        op["seq"] = session_state.get(self.seq_key, 0) + 1
+        session_state[self.seq_key] = op["seq"]
+
+        ops = list(session_state.get(self.ops_key, []))
+        if op["op"] == "clear":
+            ops = []
+        ops.append(op)
+        appends = [index for index, queued in enumerate(ops) if queued["op"] == "append"]
+        if len(appends) >= self.max_messages:
+            ops = ops[appends[-self.max_messages]:]
+        session_state[self.ops_key] = ops
+
+    def sync_browser(self, session_state: MutableMapping[str, Any]) -> None:
         """
-        Save data to browser localStorage (non-blocking).
+        Render the browser sync component (call once per run, in the same
+        place every run, so the same component stays mounted).
+
+        The first time the browser reports its stored history, the session's
+        history becomes the stored messages plus anything recorded since.
 
         Args:
-            value: JSON string to save
+            session_state: The session's state
         """
-        try:
-            html_code = f"""
-            <script>
-                localStorage.setItem('{self.storage_key}', '{value}');
-            </script>
-            """
-            components.html(html_code, height=0, width=0)
-        except Exception:
-            pass
-
-    def clear_history(self) -> None:
-        """Clear all message history."""
-        try:
-            # Clear session state
-            if 'message_history_cache' in st.session_state:
-                st.session_state.message_history_cache = []
-
-            # Clear localStorage
-            html_code = f"""
-            <script>
-                localStorage.removeItem('{self.storage_key}');
-            </script>
-            """
-            components.html(html_code, height=0, width=0)
-
-        except Exception:
-            pass
-
-    def get_context_summary(self) -> str:
+        if self.token_key not in session_state:
+            session_state[self.token_key] = secrets.token_hex(8)
+
+        stored: Optional[Dict[str, Any]] = _sync_component(
+            storage_key=self.storage_key,
+            session=session_state[self.token_key],
+            max_messages=self.max_messages,
+            debounce_ms=WRITE_DEBOUNCE_MS,
+            ops=session_state.get(self.ops_key, []),
+            key="message_history_sync",
+            default=None
+        )
+
+        if stored is None or session_state.get(self.loaded_key):
+            return
+        session_state[self.loaded_key] = True
+
+        # Replay what the browser had not applied yet, as it will
+        unseen = [op for op in session_state.get(self.ops_key, []) if op["seq"] > stored.get("seq", 0)]
+        messages = [message for message in stored.get("messages", []) if isinstance(message, str)]
+        session_state[self.session_key] = _apply_ops(messages, unseen, self.max_messages)
+        session_state[self.ops_key] = unseen
+
+    def get_context_summary(self, session_state: MutableMapping[str, Any]) -> str:
         """
         Get a formatted summary of recent messages for context.
 
+        Args:
+            session_state: The session's state
+
         Returns:
             Formatted string with recent messages
         """
-        messages = self.get_recent_messages()
+        messages = self.get_recent_messages(session_state)
 
         if not messages:
             return "No recent message history."
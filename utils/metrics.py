@@ -0,0 +1,443 @@
+"""
+In-Process Metrics.
+
+A small thread-safe metrics registry (counters, gauges and fixed-bucket
+histograms) rendered in the Prometheus text exposition format, plus a
+local HTTP endpoint that serves it next to the Streamlit app.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Tuple
+from config import config
+
+
+# Latency buckets in seconds (LLM calls take from ~0.3s to tens of seconds)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+class Metric:
+    """Base class for a named metric with labels."""
+
+    TYPE = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        """
+        Initialize a metric.
+
+        Args:
+            name: Metric name, e.g. "baba_llm_requests_total"
+            help_text: One-line description
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """Build the sample key from label values (missing labels are "")."""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _label_text(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        """Format a label set as {a="x",b="y"}."""
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{self._escape(value)}"' for name, value in pairs) + "}"
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        """Escape a label value for the text format."""
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    def render(self) -> List[str]:
+        """Render the metric as Prometheus text lines."""
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.TYPE}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+        """
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Get the current value for a label set."""
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        """Get the sum over all label sets."""
+        with self.lock:
+            return sum(self.values.values())
+
+    def samples(self) -> Dict[Tuple[str, ...], float]:
+        """Get a copy of all values keyed by label values."""
+        with self.lock:
+            return dict(self.values)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self.samples().items()):
+            lines.append(f"{self.name}{self._label_text(key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge to a value."""
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """
+        Initialize a histogram.
+
+        Args:
+            name: Metric name
+            help_text: One-line description
+            labelnames: Names of the labels every sample carries
+            buckets: Sorted upper bounds; +Inf is added automatically
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value (seconds for latencies)
+            **labels: Label values
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        """Get the number of observations for a label set."""
+        with self.lock:
+            entry = self.values.get(self._key(labels))
+            return entry[2] if entry else 0
+
+    def label_sets(self) -> List[Tuple[str, ...]]:
+        """Get all label value tuples observed so far."""
+        with self.lock:
+            return sorted(self.values.keys())
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+
+        Args:
+            q: Quantile between 0 and 1
+            **labels: Label values
+
+        Returns:
+            The estimate, or None without observations
+        """
+        with self.lock:
+            entry = self.values.get(self._key(labels))
+            if not entry or not entry[2]:
+                return None
+            counts = list(entry[0])
+            total = entry[2]
+
+        rank = q * total
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    # Beyond the largest bucket: report its upper bound
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self.lock:
+            snapshot = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self.values.items()}
+
+        for key, (counts, total_sum, count) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{self._label_text(key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {total_sum:g}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them for scraping."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labelnames: Tuple[str, ...], **kwargs) -> Any:
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.TYPE}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves the registry on /metrics from a background thread."""
+
+    def __init__(self, registry: MetricsRegistry):
+        """
+        Initialize the server (not started).
+
+        Args:
+            registry: Registry to expose
+        """
+        self.registry = registry
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.lock = threading.Lock()
+
+    def start(self, host: str = None, port: int = None) -> bool:
+        """
+        Start serving, once per process.
+
+        Args:
+            host: Interface to bind (defaults to Config.METRICS_HOST)
+            port: Port to bind (defaults to Config.METRICS_PORT; 0 disables)
+
+        Returns:
+            True if the endpoint is running
+        """
+        host = host or config.METRICS_HOST
+        port = config.METRICS_PORT if port is None else port
+
+        with self.lock:
+            if self.server is not None:
+                return True
+            if not port:
+                return False
+
+            registry = self.registry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    # Keep scrapes out of the app's console
+                    pass
+
+            try:
+                self.server = ThreadingHTTPServer((host, port), Handler)
+            except OSError:
+                # Port taken (e.g. a second app instance); metrics stay in-process
+                return False
+
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+            return True
+
+    def stop(self) -> None:
+        """Stop serving."""
+        with self.lock:
+            if self.server is not None:
+                self.server.shutdown()
+                self.server.server_close()
+                self.server = None
+
+
+# Global instances
+metrics = MetricsRegistry()
+metrics_server = MetricsServer(metrics)
+
+# LLM client metrics
+llm_request_seconds = metrics.histogram(
+    "baba_llm_request_seconds", "LLM call latency including retries", ("agent",)
+)
+llm_requests_total = metrics.counter("baba_llm_requests_total", "LLM calls by outcome", ("agent", "outcome"))
+llm_retries_total = metrics.counter("baba_llm_retries_total", "LLM call attempts that were retried", ("agent",))
+llm_tokens_total = metrics.counter("baba_llm_tokens_total", "Tokens used by LLM calls", ("agent", "kind"))
+llm_truncations_total = metrics.counter(
+    "baba_llm_truncations_total", "LLM responses cut off at max_tokens", ("agent",)
+)
+llm_in_flight = metrics.gauge("baba_llm_in_flight", "LLM calls currently waiting for a response")
+
+# Endpoint pool metrics, labelled by endpoint name
+llm_endpoint_requests_total = metrics.counter(
+    "baba_llm_endpoint_requests_total", "LLM calls per endpoint by outcome (ok / error / rejected: failed, but not because of the endpoint)", ("endpoint", "outcome")
+)
+llm_endpoint_outstanding = metrics.gauge("baba_llm_endpoint_outstanding", "LLM calls in flight per endpoint", ("endpoint",))
+llm_endpoint_healthy = metrics.gauge("baba_llm_endpoint_healthy", "Whether an endpoint is in rotation (1) or ejected (0)", ("endpoint",))
+llm_endpoint_ejections_total = metrics.counter(
+    "baba_llm_endpoint_ejections_total", "Times an endpoint was taken out of rotation", ("endpoint",)
+)
+llm_failovers_total = metrics.counter("baba_llm_failovers_total", "Failed LLM calls retried on another endpoint", ("agent",))
+llm_hedges_total = metrics.counter(
+    "baba_llm_hedges_total", "Duplicate LLM calls for slow calls: sent, answered first (won), or not sent for lack of a scheduler slot (no_slot)", ("agent", "outcome")
+)
+
+# HTTP connection pools of the OpenAI clients, labelled by pool (endpoint),
+# counted at the transport (see utils/http_transport.py)
+http_pool_connections = metrics.gauge(
+    "baba_http_pool_connections", "HTTP connections per pool by state (active / idle)", ("pool", "state")
+)
+http_pool_waits_total = metrics.counter(
+    "baba_http_pool_waits_total", "HTTP requests sent while every connection of their pool was in use", ("pool",)
+)
+
+# Micro-batching: inputs per batched LLM call, and how each input was
+# answered (in a batch, alone, or alone after its batch failed for it)
+llm_batch_size = metrics.histogram(
+    "baba_llm_batch_size", "Inputs per micro-batched LLM call", ("batcher",), buckets=(1, 2, 4, 8, 16, 32)
+)
+llm_batched_items_total = metrics.counter(
+    "baba_llm_batched_items_total", "Micro-batcher inputs by how they were answered", ("batcher", "outcome")
+)
+
+# Circuit breaker: 0 closed, 1 open, 2 half-open (probing)
+llm_circuit_state = metrics.gauge("baba_llm_circuit_state", "LLM circuit breaker state (0 closed, 1 open, 2 probing)")
+llm_circuit_transitions_total = metrics.counter(
+    "baba_llm_circuit_transitions_total", "LLM circuit breaker state changes", ("state",)
+)
+degraded_responses_total = metrics.counter(
+    "baba_degraded_responses_total", "Responses served in degraded mode by source", ("source",)
+)
+
+# LLM scheduler metrics, labelled by priority class
+llm_queue_wait_seconds = metrics.histogram(
+    "baba_llm_queue_wait_seconds", "Time LLM calls waited for a scheduler slot", ("priority",)
+)
+llm_queued_calls = metrics.gauge("baba_llm_queued_calls", "LLM calls waiting for a scheduler slot", ("priority",))
+llm_quota_waits_total = metrics.counter(
+    "baba_llm_quota_waits_total", "LLM calls held back by their user's token quota", ("priority",)
+)
+
+# Orchestrator metrics
+requests_total = metrics.counter("baba_requests_total", "Processed user inputs", ("task_type",))
+request_errors_total = metrics.counter("baba_request_errors_total", "User inputs that ended in an error", ("task_type",))
+request_seconds = metrics.histogram(
+    "baba_request_seconds", "End-to-end processing time of a user input", ("task_type",)
+)
+small_talk_responses_total = metrics.counter(
+    "baba_small_talk_responses_total", "Greetings, thanks and farewells answered without the LLM", ("intent",)
+)
+
+# Follow-up prefetching: outcomes of scheduled prefetches, tokens spent on
+# them and prefetched answers actually served
+prefetch_requests_total = metrics.counter(
+    "baba_prefetch_requests_total", "Follow-up prefetches by outcome", ("outcome",)
+)
+prefetch_tokens_total = metrics.counter("baba_prefetch_tokens_total", "Tokens spent on follow-up prefetches")
+prefetch_hits_total = metrics.counter("baba_prefetch_hits_total", "User inputs answered from a prefetched follow-up")
+
+# API server metrics
+api_active_requests = metrics.gauge("baba_api_active_requests", "API requests being processed")
+api_queued_requests = metrics.gauge("baba_api_queued_requests", "API requests waiting for a processing slot")
+api_rejected_total = metrics.counter(
+    "baba_api_rejected_total", "API requests turned away because the queue was full or timed out", ("reason",)
+)
+
+# Job queue metrics
+job_queue_depth = metrics.gauge("baba_job_queue_depth", "Jobs waiting for a worker")
+jobs_total = metrics.counter("baba_jobs_total", "Finished or rejected jobs by status", ("status",))
+job_wait_seconds = metrics.histogram("baba_job_wait_seconds", "Time jobs spent queued before a worker took them")
+
+# Cache metrics, labelled by cache name and "hit" / "miss"
+cache_requests_total = metrics.counter("baba_cache_requests_total", "Cache lookups", ("cache", "result"))
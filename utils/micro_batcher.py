@@ -0,0 +1,231 @@
+"""
+Micro-Batcher.
+
+Lets calls that arrive close together from different requests share one
+LLM call. The first caller of a batch waits a few milliseconds (or until
+the batch is full) for others to join, runs the batch for all of them and
+hands every waiting caller its own result; a caller whose item the batch
+could not answer makes its own single call. When nothing else is in
+flight a call is sent alone right away, so light traffic pays no delay.
+
+The batch runs under a context of its own, not the first caller's: it
+ends at the earliest deadline among its callers, takes the most urgent
+priority among them and, serving several sessions, is held to no single
+session's limits. Cancelling one caller therefore never fails the batch
+for the others.
+"""
+
+import threading
+from typing import Dict, Any, Callable, List, Optional
+from config import config
+from utils.request_context import RequestContext, current_context
+from utils.scheduler import PRIORITIES
+from utils.metrics import llm_batch_size, llm_batched_items_total
+
+
+# Seconds between checks of a waiting caller's own deadline and cancel flag
+WAIT_CHECK_INTERVAL = 0.05
+
+
+class BatchEntry:
+    """One caller's item in a batch."""
+
+    def __init__(self, item: Any):
+        """
+        Initialize an entry.
+
+        Args:
+            item: The caller's input
+        """
+        self.item = item
+        self.context = current_context()
+        self.result: Optional[Any] = None  # None when the batch did not answer it
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Collects concurrent calls into batches run by their first caller."""
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], List[Optional[Any]]],
+        run_one: Callable[[Any], Any],
+        window: float = None,
+        max_size: int = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            name: Batcher name used as the metrics label
+            run_batch: Answers several items at once; returns one result per
+                item, in order, with None for items it could not answer
+            run_one: Answers a single item (may raise)
+            window: Seconds a batch waits for more items (defaults to
+                Config.CLASSIFIER_BATCH_WINDOW)
+            max_size: Most items per batch (defaults to
+                Config.CLASSIFIER_BATCH_SIZE; 1 disables batching)
+        """
+        self.name = name
+        self.run_batch = run_batch
+        self.run_one = run_one
+        self.window = config.CLASSIFIER_BATCH_WINDOW if window is None else window
+        self.max_size = max_size or config.CLASSIFIER_BATCH_SIZE
+        self.lock = threading.Lock()
+        self.batch_closed = threading.Condition(self.lock)
+        self.pending: Optional[List[BatchEntry]] = None  # Batch still taking items
+        self.in_flight = 0
+        self.outcomes = {"batched": 0, "single": 0, "fallback": 0}
+        self.batches = 0
+        self.batched_inputs = 0
+
+    def submit(self, item: Any) -> Any:
+        """
+        Get the result for an item, batched with concurrent submissions.
+
+        Args:
+            item: The input to answer
+
+        Returns:
+            The item's result
+
+        Raises:
+            RequestCancelledError: If the caller's request is cancelled or
+                passes its deadline while waiting for the batch
+            Exception: Whatever run_one raises when the item is answered alone
+        """
+        if self.max_size < 2:
+            return self._run_one(item, "single")
+
+        entry = BatchEntry(item)
+
+        with self.lock:
+            if self.pending is None and self.in_flight == 0:
+                # Nothing to share a call with
+                leader = None
+            elif self.pending is None:
+                self.pending = [entry]
+                leader = True
+            else:
+                self.pending.append(entry)
+                leader = False
+                if len(self.pending) >= self.max_size:
+                    self.pending = None
+                    self.batch_closed.notify_all()
+
+        if leader is None:
+            return self._run_one(item, "single")
+
+        if leader:
+            if not self._lead(entry):
+                # Nobody joined in time
+                return self._run_one(item, "single")
+        else:
+            self._wait(entry)
+
+        if entry.result is not None:
+            return entry.result
+        if entry.context is not None:
+            # A caller that stopped meanwhile needs no answer of its own
+            entry.context.check()
+        return self._run_one(item, "fallback")
+
+    def _lead(self, entry: BatchEntry) -> bool:
+        """
+        Collect the batch started by entry, then run it for every caller.
+
+        Returns:
+            False if no other item joined (nothing was run)
+        """
+        with self.lock:
+            batch = self.pending
+            self.batch_closed.wait_for(lambda: self.pending is not batch, timeout=self.window)
+            if self.pending is batch:
+                self.pending = None
+            if len(batch) == 1:
+                return False
+            self.in_flight += 1
+
+        try:
+            try:
+                with self._batch_context(batch).activate():
+                    results = list(self.run_batch([member.item for member in batch]))
+            except Exception:
+                # Every caller still waiting falls back to its own call, in its own context
+                results = []
+            results += [None] * (len(batch) - len(results))
+
+            answered = sum(1 for result in results if result is not None)
+            llm_batch_size.observe(len(batch), batcher=self.name)
+            llm_batched_items_total.inc(answered, batcher=self.name, outcome="batched")
+            with self.lock:
+                self.batches += 1
+                self.batched_inputs += len(batch)
+                self.outcomes["batched"] += answered
+
+            for member, result in zip(batch, results):
+                member.result = result
+            return True
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            for member in batch:
+                member.done.set()
+
+    def _batch_context(self, batch: List[BatchEntry]) -> RequestContext:
+        """
+        Build the context the batch call runs in.
+
+        Args:
+            batch: The batch's entries
+
+        Returns:
+            A shared context with the earliest deadline and the most urgent
+            priority of the callers' contexts
+        """
+        contexts = [member.context for member in batch if member.context is not None]
+        remaining = [context.remaining() for context in contexts if context.remaining() is not None]
+        priorities = [context.priority for context in contexts if context.priority in PRIORITIES]
+        return RequestContext(
+            session_id=f"batch.{self.name}",
+            # A timeout of 0 means no deadline, so an expired one becomes the smallest positive value
+            timeout=max(min(remaining), 1e-3) if remaining else 0,
+            priority=min(priorities, key=PRIORITIES.index) if priorities else None,
+            shared=True
+        )
+
+    @staticmethod
+    def _wait(entry: BatchEntry) -> None:
+        """Wait for the batch to finish, honouring the caller's own request context."""
+        context = entry.context
+        while not entry.done.wait(WAIT_CHECK_INTERVAL if context is not None else None):
+            context.check()
+
+    def _run_one(self, item: Any, outcome: str) -> Any:
+        """Answer an item with its own call, counted as in flight."""
+        with self.lock:
+            self.in_flight += 1
+            self.outcomes[outcome] += 1
+        llm_batched_items_total.inc(batcher=self.name, outcome=outcome)
+        try:
+            return self.run_one(item)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Get batching statistics.
+
+        Returns:
+            Dictionary with inputs answered per outcome (batched, single, or
+            fallback when a batch did not answer them), batches run and the
+            average inputs per batch
+        """
+        with self.lock:
+            return {
+                "outcomes": dict(self.outcomes),
+                "batches": self.batches,
+                "average_batch_size": self.batched_inputs / self.batches if self.batches else None
+            }
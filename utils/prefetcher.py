@@ -0,0 +1,292 @@
+"""
+Follow-Up Prefetcher.
+
+Answers likely next questions (the follow-up suggestions shown under a
+General Q&A answer) in the background at "prefetch" priority and keeps
+the answers in the response cache for a short time, scoped to the
+session, so that choosing a suggestion returns instantly. All
+prefetching shares one token budget, and a session's newer batch
+replaces its older one.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from config import config
+from utils.request_context import RequestContext
+from utils.response_cache import response_cache
+from utils.scheduler import TokenBucket
+from utils.tracing import tracer
+from utils.metrics import prefetch_requests_total, prefetch_tokens_total, prefetch_hits_total
+
+
+class PrefetchBatch:
+    """Follow-ups of one answer, prefetched one after another."""
+
+    def __init__(self, kind: str, session_id: str, items: List[Tuple[str, Callable[[], Any]]]):
+        """
+        Initialize a batch.
+
+        Args:
+            kind: Result kind, e.g. "general_qa"
+            session_id: Session the follow-ups were suggested to
+            items: (follow-up text, function producing its answer) pairs
+        """
+        self.kind = kind
+        self.session_id = session_id
+        self.items = items
+        self.context: Optional[RequestContext] = None  # Of the follow-up being answered
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether a newer batch of the session replaced this one."""
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stop the batch, including the follow-up being answered."""
+        self._cancelled.set()
+        context = self.context
+        if context is not None:
+            context.cancel()
+
+    def start_item(self) -> RequestContext:
+        """
+        Create the context of the next follow-up, as a worker starts it.
+
+        The deadline runs from here rather than from scheduling, so time
+        spent waiting in the queue behind more urgent work does not count.
+
+        Returns:
+            The follow-up's request context
+        """
+        context = RequestContext(session_id=self.session_id, priority="prefetch")
+        self.context = context
+        if self.cancelled:
+            context.cancel()
+        return context
+
+
+class Prefetcher:
+    """Background worker pool producing speculative answers under a token budget."""
+
+    def __init__(
+        self,
+        workers: int = None,
+        max_depth: int = None,
+        ttl: int = None,
+        tokens_per_minute: int = None
+    ):
+        """
+        Initialize the prefetcher (workers start with the first batch).
+
+        Args:
+            workers: Worker threads (defaults to Config.PREFETCH_WORKERS)
+            max_depth: Batches allowed to wait (defaults to Config.PREFETCH_QUEUE_DEPTH)
+            ttl: Seconds a prefetched answer stays usable (defaults to Config.PREFETCH_TTL)
+            tokens_per_minute: Tokens all prefetching may spend (defaults to
+                Config.PREFETCH_TOKENS_PER_MINUTE; 0 means no limit)
+        """
+        self.workers = workers or config.PREFETCH_WORKERS
+        self.max_depth = max_depth or config.PREFETCH_QUEUE_DEPTH
+        self.ttl = ttl or config.PREFETCH_TTL
+        tokens_per_minute = config.PREFETCH_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.budget = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.queue: "queue.Queue[PrefetchBatch]" = queue.Queue(maxsize=self.max_depth)
+        self.latest_by_session: Dict[str, PrefetchBatch] = {}
+        # Cache keys of follow-ups queued in the last TTL, with their expiry,
+        # so lookups of inputs never prefetched skip the cache entirely
+        self.scheduled: "OrderedDict[str, float]" = OrderedDict()
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.outcomes: Dict[str, int] = {}
+        self.tokens = 0
+        self.hits = 0
+
+    @staticmethod
+    def _cache_kind(kind: str) -> str:
+        """Cache kind of prefetched results, kept apart from regular ones."""
+        return f"prefetch.{kind}"
+
+    @staticmethod
+    def _cache_text(session_id: str, text: str) -> str:
+        """Cache input of a prefetched result; answers depend on the session's history."""
+        return f"{session_id} {text}"
+
+    def schedule(self, kind: str, session_id: str, items: List[Tuple[str, Callable[[], Any]]]) -> int:
+        """
+        Queue follow-ups to be answered in the background.
+
+        Follow-ups already prefetched for the session are skipped, and the
+        session's previous unfinished batch is cancelled.
+
+        Args:
+            kind: Result kind, e.g. "general_qa"
+            session_id: Session the follow-ups were suggested to
+            items: (follow-up text, function producing its answer) pairs;
+                the functions run on a worker thread
+
+        Returns:
+            Number of follow-ups queued
+        """
+        pending = []
+        for text, produce in items:
+            if response_cache.contains(self._cache_kind(kind), self._cache_text(session_id, text)):
+                self._count("skipped_cached")
+            else:
+                pending.append((text, produce))
+        if not pending:
+            return 0
+
+        batch = PrefetchBatch(kind, session_id, pending)
+
+        with self.lock:
+            self._start_workers()
+            try:
+                self.queue.put_nowait(batch)
+            except queue.Full:
+                self._count("skipped_busy", len(pending))
+                return 0
+
+            previous = self.latest_by_session.get(session_id)
+            if previous is not None:
+                previous.cancel()
+            self.latest_by_session[session_id] = batch
+
+            expires = time.monotonic() + self.ttl
+            for text, _ in pending:
+                key = self._scheduled_key(kind, session_id, text)
+                self.scheduled.pop(key, None)
+                self.scheduled[key] = expires
+
+        return len(pending)
+
+    def lookup(self, kind: str, session_id: str, text: str) -> Optional[Any]:
+        """
+        Get the prefetched answer to a follow-up.
+
+        Only inputs a prefetch was queued for are looked up in the cache,
+        so its hit and miss counts are those of prefetched follow-ups.
+
+        Args:
+            kind: Result kind
+            session_id: The asking session
+            text: The user's input
+
+        Returns:
+            The prefetched result, or None
+        """
+        with self.lock:
+            now = time.monotonic()
+            while self.scheduled and next(iter(self.scheduled.values())) <= now:
+                self.scheduled.popitem(last=False)
+            if self._scheduled_key(kind, session_id, text) not in self.scheduled:
+                return None
+
+        entry = response_cache.get(self._cache_kind(kind), self._cache_text(session_id, text))
+        if entry is None:
+            return None
+
+        with self.lock:
+            self.hits += 1
+        prefetch_hits_total.inc()
+        return entry.value
+
+    def _scheduled_key(self, kind: str, session_id: str, text: str) -> str:
+        """Key of a follow-up in self.scheduled, normalized like the cache's."""
+        return response_cache.make_key(self._cache_kind(kind), self._cache_text(session_id, text))
+
+    def _start_workers(self) -> None:
+        """Start the worker threads on first use (called with the lock held)."""
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"prefetch-worker-{len(self.threads)}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def _work(self) -> None:
+        """Worker loop: answer each batch's follow-ups in order."""
+        while True:
+            batch = self.queue.get()
+            try:
+                for index, (text, produce) in enumerate(batch.items):
+                    if batch.cancelled:
+                        self._count("cancelled", len(batch.items) - index)
+                        break
+                    if not self._within_budget():
+                        self._count("skipped_budget", len(batch.items) - index)
+                        break
+                    self._prefetch(batch, text, produce)
+            finally:
+                with self.lock:
+                    if self.latest_by_session.get(batch.session_id) is batch:
+                        del self.latest_by_session[batch.session_id]
+                self.queue.task_done()
+
+    def _prefetch(self, batch: PrefetchBatch, text: str, produce: Callable[[], Any]) -> None:
+        """Produce and cache one answer, charging its tokens to the budget."""
+        context = batch.start_item()
+        trace = None
+        try:
+            with context.activate(), tracer.start_trace("prefetch", **{
+                "session.id": batch.session_id,
+                "prefetch.kind": batch.kind
+            }) as trace:
+                value = produce()
+        except Exception:
+            self._count("cancelled" if context.stop_reason() else "failed")
+            return
+        finally:
+            # Unset if the context or trace could not be opened
+            if trace is not None:
+                summary = trace.summary()
+                self._charge(summary["prompt_tokens"] + summary["completion_tokens"])
+
+        response_cache.put(self._cache_kind(batch.kind), self._cache_text(batch.session_id, text), value, ttl=self.ttl)
+        self._count("done")
+
+    def _within_budget(self) -> bool:
+        """Whether the token budget has anything left."""
+        if self.budget is None:
+            return True
+        with self.lock:
+            self.budget.refill(time.monotonic())
+            return self.budget.tokens > 0
+
+    def _charge(self, tokens: int) -> None:
+        """Record the tokens one prefetch used."""
+        with self.lock:
+            self.tokens += tokens
+            if self.budget is not None:
+                self.budget.tokens -= tokens
+        prefetch_tokens_total.inc(tokens)
+
+    def _count(self, outcome: str, amount: int = 1) -> None:
+        """Record prefetch outcomes."""
+        with self.lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + amount
+        prefetch_requests_total.inc(amount, outcome=outcome)
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Get prefetching statistics.
+
+        Returns:
+            Dictionary with outcome counts, answers prefetched, hits, hit
+            rate (hits per prefetched answer), tokens spent and tokens per hit
+        """
+        with self.lock:
+            done = self.outcomes.get("done", 0)
+            return {
+                "outcomes": dict(self.outcomes),
+                "prefetched": done,
+                "hits": self.hits,
+                "hit_rate": self.hits / done if done else 0.0,
+                "tokens": self.tokens,
+                "tokens_per_hit": self.tokens / self.hits if self.hits else None
+            }
+
+
+# Global instance
+prefetcher = Prefetcher()
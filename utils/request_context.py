@@ -0,0 +1,151 @@
+"""
+Request Context.
+
+Everything one processed user input needs that is specific to it: the
+session it belongs to, the conversation history, a deadline, the trace,
+a progress callback and a cancel flag. The orchestrator passes it
+explicitly through the pipeline and also activates it for the current
+thread / context so that shared components such as the LLM client can
+honour the deadline and cancellation without extra arguments.
+"""
+
+import contextvars
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, MutableMapping, Optional
+from config import config
+
+
+# Request being processed in the current thread / context
+_current_context: contextvars.ContextVar = contextvars.ContextVar("request_context", default=None)
+
+
+class RequestCancelledError(Exception):
+    """Raised when a request was cancelled or ran past its deadline."""
+
+
+class RequestContext:
+    """Per-request state passed through the pipeline."""
+
+    def __init__(
+        self,
+        session_state: Optional[MutableMapping[str, Any]] = None,
+        session_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        priority: Optional[str] = None,
+        shared: bool = False
+    ):
+        """
+        Initialize a request context.
+
+        Args:
+            session_state: The session's state (a fresh dictionary for a
+                one-off request)
+            session_id: Identifier of the session (random when omitted)
+            timeout: Seconds the request may take (defaults to
+                Config.REQUEST_TIMEOUT; 0 means no deadline)
+            on_progress: Optional callback receiving (step, details) as the
+                pipeline advances
+            priority: Scheduling class of the request's LLM calls
+                ("interactive", "standard", "prefetch" or "batch"); when
+                omitted the orchestrator picks one from the input size
+            shared: Whether the request's LLM calls serve several sessions
+                at once (a micro-batch); such calls are not held to any one
+                session's concurrency limit or token quota
+        """
+        self.request_id = secrets.token_hex(8)
+        self.session_id = session_id or secrets.token_hex(8)
+        self.session_state = session_state if session_state is not None else {}
+        self.history = None  # Conversation memory, set by the orchestrator
+        self.trace = None  # Trace of the request, set by the orchestrator
+        self.on_progress = on_progress
+        self.priority = priority
+        self.shared = shared
+        self.started_at = time.monotonic()
+
+        timeout = config.REQUEST_TIMEOUT if timeout is None else timeout
+        self.deadline = self.started_at + timeout if timeout else None
+
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the request to stop at its next check (safe from any thread)."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() was called."""
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Get the time left before the deadline.
+
+        Returns:
+            Seconds left (never negative), or None without a deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def stop_reason(self) -> Optional[str]:
+        """
+        Get why the request has to stop, if it has to.
+
+        Returns:
+            "Request cancelled", "Request deadline exceeded" or None
+        """
+        if self.cancelled:
+            return "Request cancelled"
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "Request deadline exceeded"
+        return None
+
+    def check(self) -> None:
+        """
+        Stop the request if it was cancelled or is past its deadline.
+
+        Raises:
+            RequestCancelledError: If the request has to stop
+        """
+        reason = self.stop_reason()
+        if reason:
+            raise RequestCancelledError(reason)
+
+    def report(self, step: str, **details) -> None:
+        """
+        Report pipeline progress to the callback, if any.
+
+        Args:
+            step: Name of the step reached, e.g. "classified"
+            **details: Step details
+        """
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress(step, details)
+        except Exception:
+            # A failing progress display must not fail the request
+            pass
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the current request for the duration of the block.
+
+        Yields:
+            This context
+        """
+        token = _current_context.set(self)
+        try:
+            yield self
+        finally:
+            _current_context.reset(token)
+
+
+def current_context() -> Optional[RequestContext]:
+    """Get the request being processed in this thread / context, if any."""
+    return _current_context.get()
@@ -0,0 +1,156 @@
+"""
+Agent Response Cache.
+
+Keeps recent agent results (explanations, quizzes, answers) keyed by
+the normalized input that produced them. Entries are fresh for a while
+and then stale; stale entries are still served in degraded mode, where
+fast slightly old content beats a request that times out.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from config import config
+from utils.metrics import cache_requests_total
+
+
+# Punctuation ignored when matching inputs (Latin and Arabic)
+NORMALIZE_PATTERN = re.compile(r"[^\w\s]+", re.UNICODE)
+
+
+class CachedResponse:
+    """A cached agent result with its freshness."""
+
+    def __init__(self, value: Any, stored_at: float, ttl: Optional[float] = None):
+        """
+        Initialize a cache entry.
+
+        Args:
+            value: The agent result
+            stored_at: Time the result was produced
+            ttl: Seconds the entry lives, with no stale period (None uses
+                the cache's fresh and stale lifetimes)
+        """
+        self.value = value
+        self.stored_at = stored_at
+        self.ttl = ttl
+
+    def age(self) -> float:
+        """Seconds since the result was produced."""
+        return time.time() - self.stored_at
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of agent results with fresh and stale lifetimes."""
+
+    def __init__(self, max_entries: int = None, fresh_ttl: int = None, stale_ttl: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Entries kept (defaults to Config.RESPONSE_CACHE_SIZE)
+            fresh_ttl: Seconds an entry is fresh (defaults to Config.RESPONSE_CACHE_TTL)
+            stale_ttl: Seconds an entry may be served stale (defaults to
+                Config.RESPONSE_CACHE_STALE_TTL)
+        """
+        self.max_entries = max_entries or config.RESPONSE_CACHE_SIZE
+        self.fresh_ttl = fresh_ttl or config.RESPONSE_CACHE_TTL
+        self.stale_ttl = stale_ttl or config.RESPONSE_CACHE_STALE_TTL
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(kind: str, text: str) -> str:
+        """
+        Build the cache key of an input.
+
+        Case, punctuation and extra whitespace are ignored, so "What is
+        critical thinking?" and "what is critical thinking" share a key.
+
+        Args:
+            kind: Result kind, e.g. "explanation" or "quiz"
+            text: The input the result was produced from
+
+        Returns:
+            The cache key
+        """
+        normalized = " ".join(NORMALIZE_PATTERN.sub(" ", (text or "").lower()).split())
+        return f"{kind}:{normalized}"
+
+    def get(self, kind: str, text: str, allow_stale: bool = False) -> Optional[CachedResponse]:
+        """
+        Look up a result.
+
+        Args:
+            kind: Result kind
+            text: The input
+            allow_stale: Also return entries past their fresh lifetime
+
+        Returns:
+            The cached entry, or None
+        """
+        key = self.make_key(kind, text)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                age = entry.age()
+                if age > (entry.ttl or self.stale_ttl):
+                    del self.entries[key]
+                    entry = None
+                elif age > (entry.ttl or self.fresh_ttl) and not allow_stale:
+                    entry = None
+                else:
+                    self.entries.move_to_end(key)
+
+        cache_requests_total.inc(cache=f"responses.{kind}", result="hit" if entry else "miss")
+        return entry
+
+    def contains(self, kind: str, text: str) -> bool:
+        """
+        Check for a fresh entry without counting a lookup.
+
+        Args:
+            kind: Result kind
+            text: The input
+
+        Returns:
+            True if a fresh result is cached
+        """
+        with self.lock:
+            entry = self.entries.get(self.make_key(kind, text))
+            return entry is not None and entry.age() <= (entry.ttl or self.fresh_ttl)
+
+    def put(self, kind: str, text: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a result, evicting the least recently used entry when full.
+
+        Args:
+            kind: Result kind
+            text: The input the result was produced from
+            value: The agent result
+            ttl: Seconds the entry lives, with no stale period (defaults to
+                the cache's fresh and stale lifetimes)
+        """
+        key = self.make_key(kind, text)
+
+        with self.lock:
+            self.entries[key] = CachedResponse(value, time.time(), ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get the number of entries per kind."""
+        with self.lock:
+            kinds: Dict[str, int] = {}
+            for key in self.entries:
+                kind = key.split(":", 1)[0]
+                kinds[kind] = kinds.get(kind, 0) + 1
+            return {"entries": len(self.entries), "by_kind": kinds}
+
+
+# Global instance
+response_cache = ResponseCache()
@@ -0,0 +1,321 @@
+"""
+LLM Call Scheduler.
+
+Admission control in front of LLMClient. A bounded number of LLM calls
+run at once; the rest wait and are admitted by priority class
+(interactive, standard, prefetch, batch), preferring users with fewer
+calls in flight so that one session cannot starve the others. Each user
+also has a concurrency limit and a token bucket quota; calls shared by
+several sessions (user None) are held to neither.
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from config import config
+from utils.request_context import current_context, RequestCancelledError
+from utils.metrics import llm_queue_wait_seconds, llm_queued_calls, llm_quota_waits_total
+
+
+# Priority classes, most urgent first
+PRIORITIES = ("interactive", "standard", "prefetch", "batch")
+
+# A waiting call moves up one class per this many seconds, so batch work
+# still runs under sustained interactive load
+AGING_SECONDS = 10.0
+
+# Waiters re-check cancellation and quota refills at least this often
+POLL_SECONDS = 0.25
+
+
+class Ticket:
+    """A call waiting for or holding an LLM slot."""
+
+    def __init__(self, user: Optional[str], priority: str, tokens: int, sequence: int):
+        """
+        Initialize a ticket.
+
+        Args:
+            user: User (session) the call is made for; None for a call
+                shared by several sessions
+            priority: Priority class (see PRIORITIES)
+            tokens: Estimated tokens the call will use
+            sequence: Arrival order, breaking ties
+        """
+        self.user = user
+        self.priority = priority
+        self.rank = PRIORITIES.index(priority)
+        self.tokens = tokens
+        self.sequence = sequence
+        self.charged = 0  # Tokens taken from the user's quota at admission
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.quota_waited = False
+
+    def effective_rank(self, now: float) -> float:
+        """Priority rank lowered by the time spent waiting."""
+        return max(0.0, self.rank - (now - self.enqueued_at) / AGING_SECONDS)
+
+
+class TokenBucket:
+    """Per-user token quota refilled continuously."""
+
+    def __init__(self, capacity: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            capacity: Tokens per minute (also the largest burst)
+        """
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the tokens earned since the last update."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.capacity / 60.0)
+        self.updated_at = now
+
+    def allows(self, tokens: int) -> bool:
+        """Whether a call of this size may start (a full bucket admits any size)."""
+        return self.tokens >= tokens or self.tokens >= self.capacity
+
+
+class LLMScheduler:
+    """Grants LLM call slots by priority, per-user fairness and quotas."""
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        user_concurrency: int = None,
+        user_tokens_per_minute: int = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: LLM calls in flight at once (defaults to
+                Config.LLM_MAX_CONCURRENCY; 0 disables scheduling)
+            user_concurrency: Calls in flight per user (defaults to
+                Config.LLM_USER_CONCURRENCY)
+            user_tokens_per_minute: Token quota per user (defaults to
+                Config.LLM_USER_TOKENS_PER_MINUTE; 0 disables the quota)
+        """
+        self.max_concurrency = config.LLM_MAX_CONCURRENCY if max_concurrency is None else max_concurrency
+        self.user_concurrency = user_concurrency or config.LLM_USER_CONCURRENCY
+        self.user_tokens_per_minute = (
+            config.LLM_USER_TOKENS_PER_MINUTE if user_tokens_per_minute is None else user_tokens_per_minute
+        )
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+        self.waiting: List[Ticket] = []
+        self.active = 0
+        self.active_by_user: Dict[str, int] = {}
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    @contextmanager
+    def slot(self, user: Optional[str], priority: str = "standard", tokens: int = 0):
+        """
+        Hold an LLM slot for the duration of the block.
+
+        Args:
+            user: User (session) the call is made for; None for a call
+                shared by several sessions
+            priority: Priority class (see PRIORITIES)
+            tokens: Estimated tokens the call will use (prompt + max_tokens)
+
+        Yields:
+            The admitted Ticket (set ticket.tokens to the actual usage
+            before leaving the block to correct the quota)
+
+        Raises:
+            RequestCancelledError: If the current request is cancelled or
+                reaches its deadline while waiting
+        """
+        ticket = self.acquire(user, priority, tokens)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def acquire(self, user: Optional[str], priority: str = "standard", tokens: int = 0) -> Ticket:
+        """
+        Wait for an LLM slot.
+
+        Args:
+            user: User (session) the call is made for; None for a call
+                shared by several sessions
+            priority: Priority class (see PRIORITIES)
+            tokens: Estimated tokens the call will use
+
+        Returns:
+            The admitted Ticket; pass it to release()
+
+        Raises:
+            ValueError: If the priority class is unknown
+            RequestCancelledError: If the current request is cancelled or
+                reaches its deadline while waiting
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority} (expected one of {', '.join(PRIORITIES)})")
+
+        context = current_context()
+
+        with self.condition:
+            ticket = Ticket(user, priority, tokens, next(self.sequence))
+
+            if not self.max_concurrency:
+                self._admit(ticket, time.monotonic())
+                return ticket
+
+            self.waiting.append(ticket)
+            llm_queued_calls.inc(priority=priority)
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._next_ticket(now) is ticket:
+                        self._admit(ticket, now)
+                        return ticket
+
+                    if context is not None and context.stop_reason():
+                        raise RequestCancelledError(context.stop_reason())
+
+                    timeout = POLL_SECONDS
+                    if context is not None and context.remaining() is not None:
+                        timeout = min(timeout, context.remaining())
+                    self.condition.wait(timeout)
+            finally:
+                self.waiting.remove(ticket)
+                llm_queued_calls.dec(priority=priority)
+                # Another waiter may now be first in line
+                self.condition.notify_all()
+
+    def try_acquire(self, ticket: Ticket) -> Optional[Ticket]:
+        """
+        Take an extra slot for a duplicate of an admitted call, without waiting.
+
+        The duplicate (a hedge) is the same call as the ticket's, so it is
+        not held to the user's concurrency limit, but it needs a free slot
+        that no waiting call could take now and room in the user's quota
+        for its tokens. While it runs it counts like any admitted call.
+
+        Args:
+            ticket: The admitted ticket of the call being duplicated
+
+        Returns:
+            The duplicate's Ticket (pass it to release()), or None if no slot
+            or quota is free right now
+        """
+        with self.condition:
+            now = time.monotonic()
+            if self.max_concurrency and (self.active >= self.max_concurrency or self._next_ticket(now) is not None):
+                return None
+
+            bucket = self._bucket(ticket.user, now)
+            if bucket is not None and not bucket.allows(ticket.tokens):
+                return None
+
+            duplicate = Ticket(ticket.user, ticket.priority, ticket.tokens, next(self.sequence))
+            self._admit(duplicate, now)
+            return duplicate
+
+    def release(self, ticket: Ticket) -> None:
+        """
+        Give back a slot and settle the ticket's tokens against the quota.
+
+        Args:
+            ticket: Ticket returned by acquire()
+        """
+        with self.condition:
+            self.active -= 1
+            self.active_by_user[ticket.user] -= 1
+            if not self.active_by_user[ticket.user]:
+                del self.active_by_user[ticket.user]
+
+            bucket = self.buckets.get(ticket.user)
+            if bucket is not None:
+                # Replace the estimate charged at admission with the actual usage
+                bucket.tokens += ticket.charged - ticket.tokens
+                bucket.refill(time.monotonic())
+                if ticket.user not in self.active_by_user and bucket.tokens >= bucket.capacity:
+                    # A full bucket is the same as none; don't keep one per past session
+                    del self.buckets[ticket.user]
+
+            self.condition.notify_all()
+
+    def _next_ticket(self, now: float) -> Optional[Ticket]:
+        """
+        Pick the waiting ticket to admit next, if any may start now.
+
+        Eligible tickets are those whose user is under the per-user limit
+        and quota; among them the most urgent class wins (with aging),
+        then the user with the fewest calls in flight, then arrival order.
+        """
+        if self.active >= self.max_concurrency:
+            return None
+
+        best = None
+        best_key = None
+
+        for ticket in self.waiting:
+            if ticket.user is not None and self.active_by_user.get(ticket.user, 0) >= self.user_concurrency:
+                continue
+
+            bucket = self._bucket(ticket.user, now)
+            if bucket is not None and not bucket.allows(ticket.tokens):
+                if not ticket.quota_waited:
+                    ticket.quota_waited = True
+                    llm_quota_waits_total.inc(priority=ticket.priority)
+                continue
+
+            key = (ticket.effective_rank(now), self.active_by_user.get(ticket.user, 0), ticket.sequence)
+            if best_key is None or key < best_key:
+                best, best_key = ticket, key
+
+        return best
+
+    def _admit(self, ticket: Ticket, now: float) -> None:
+        """Account for an admitted ticket (called with the condition held)."""
+        self.active += 1
+        self.active_by_user[ticket.user] = self.active_by_user.get(ticket.user, 0) + 1
+
+        bucket = self._bucket(ticket.user, now)
+        if bucket is not None:
+            bucket.tokens -= ticket.tokens
+        ticket.charged = ticket.tokens
+
+        ticket.admitted_at = now
+        llm_queue_wait_seconds.observe(now - ticket.enqueued_at, priority=ticket.priority)
+
+    def _bucket(self, user: Optional[str], now: float) -> Optional[TokenBucket]:
+        """Get the user's refilled token bucket (None without a quota, or for shared calls)."""
+        if not self.user_tokens_per_minute or user is None:
+            return None
+        bucket = self.buckets.get(user)
+        if bucket is None:
+            bucket = self.buckets[user] = TokenBucket(self.user_tokens_per_minute)
+        bucket.refill(now)
+        return bucket
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Get the current load.
+
+        Returns:
+            Dictionary with active calls, waiting calls per class and
+            per-user calls in flight
+        """
+        with self.condition:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "active": self.active,
+                "waiting": {priority: sum(1 for t in self.waiting if t.priority == priority) for priority in PRIORITIES},
+                "active_by_user": dict(self.active_by_user)
+            }
+
+
+# Global instance
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,205 @@
+"""
+Agent Result Schemas.
+
+Defines each agent's JSON result once as a pydantic model. The field
+aliases are the compact wire keys the prompts ask for, so the same model
+drives the API's schema-constrained output, local validation with type
+coercion, and the expansion back to the full result keys.
+"""
+
+from typing import Dict, Any, List, Optional, Type
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+
+class AgentResult(BaseModel):
+    """Base class for agent results."""
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        coerce_numbers_to_str=True,
+        extra="allow"
+    )
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _coerce_lists(cls, value: Any, info) -> Any:
+        """Wrap a single string in a list for list-typed fields."""
+        field = cls.model_fields.get(info.field_name)
+        if field is not None and isinstance(value, str) and _is_list_annotation(field.annotation):
+            return [item.strip() for item in value.split("\n") if item.strip()] or [value]
+        return value
+
+
+def _is_list_annotation(annotation: Any) -> bool:
+    """Check whether a field annotation is (optionally) a list of strings."""
+    return annotation in (List[str], Optional[List[str]])
+
+
+def _coerce_confidence(value: Any) -> Any:
+    """Coerce confidence values given as percentages or strings into 0-1."""
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+        try:
+            value = float(value)
+        except ValueError:
+            return value
+
+    if isinstance(value, (int, float)) and 1 < value <= 100:
+        return value / 100
+
+    return value
+
+
+class ClassificationResult(AgentResult):
+    """Task classifier result."""
+
+    task_type: str = Field(alias="t")
+    confidence: float = Field(alias="cf")
+    detected_language: Optional[str] = Field(None, alias="l")
+    reasoning: Optional[str] = Field(None, alias="r")
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _confidence(cls, value: Any) -> Any:
+        return _coerce_confidence(value)
+
+
+class BatchedClassification(ClassificationResult):
+    """One input's result in a batched classification."""
+
+    index: int = Field(alias="i")
+
+
+class ClassificationBatchResult(AgentResult):
+    """Task classifier result for several inputs classified in one call."""
+
+    results: List[BatchedClassification] = Field(alias="rs")
+
+
+class ExplanationResult(AgentResult):
+    """Explainer agent result."""
+
+    english_explanation: str = Field(alias="en")
+    arabic_explanation: str = Field(alias="ar")
+    gulf_example: Optional[str] = Field(None, alias="ex")
+    key_terms: Optional[List[str]] = Field(None, alias="kt")
+    suggested_next_step: Optional[str] = Field(None, alias="nx")
+
+
+class WritingResult(AgentResult):
+    """Writer agent result."""
+
+    input_language: Optional[str] = Field(None, alias="lang")
+    improved_text: str = Field(alias="it")
+    arabic_translation: Optional[str] = Field(None, alias="tar")
+    english_translation: Optional[str] = Field(None, alias="ten")
+    changes_explanation_ar: str = Field(alias="ch")
+    grammar_points: Optional[List[str]] = Field(None, alias="gp")
+    tone_improvements: Optional[List[str]] = Field(None, alias="ti")
+    suggested_next_step: Optional[str] = Field(None, alias="nx")
+
+
+class QuizQuestion(AgentResult):
+    """A single quiz question."""
+
+    question_en: str = Field(alias="q")
+    question_ar: str = Field(alias="qa")
+    options: List[str] = Field(alias="o")
+    options_ar: Optional[List[str]] = Field(None, alias="oa")
+    correct_answer: int = Field(alias="c")
+    explanation: Optional[str] = Field(None, alias="e")
+
+
+class QuizResult(AgentResult):
+    """Quiz agent result."""
+
+    questions: List[QuizQuestion] = Field(alias="qs")
+
+
+class GeneralQAResult(AgentResult):
+    """General Q&A agent result."""
+
+    english_answer: str = Field(alias="en")
+    arabic_answer: str = Field(alias="ar")
+    category: Optional[str] = Field(None, alias="cat")
+    confidence: Optional[float] = Field(None, alias="cf")
+    follow_up_suggestions: Optional[List[str]] = Field(None, alias="fu")
+
+    @field_validator("confidence", mode="before")
+    @classmethod
+    def _confidence(cls, value: Any) -> Any:
+        return _coerce_confidence(value)
+
+
+# Result schema per agent profile
+AGENT_SCHEMAS: Dict[str, Type[AgentResult]] = {
+    "classifier": ClassificationResult,
+    "classifier_batch": ClassificationBatchResult,
+    "explainer": ExplanationResult,
+    "writer": WritingResult,
+    "quiz": QuizResult,
+    "general_qa": GeneralQAResult
+}
+
+
+def _is_required_field(schema: Type[AgentResult], key: str) -> bool:
+    """Check whether a field, given by wire key or full name, is required."""
+    for name, field in schema.model_fields.items():
+        if key in (name, field.alias):
+            return field.is_required()
+    return False
+
+
+def get_json_schema(agent: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the JSON schema (using the compact wire keys) for an agent's result.
+
+    Args:
+        agent: Agent profile name
+
+    Returns:
+        JSON schema dictionary, or None for unknown agents
+    """
+    schema = AGENT_SCHEMAS.get(agent)
+    if schema is None:
+        return None
+    return schema.model_json_schema(by_alias=True)
+
+
+def coerce_result(agent: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate and coerce a parsed payload against the agent's schema.
+
+    If the only invalid item is the last element of an optional list
+    (typically cut off by a truncated response), that element is dropped.
+    Required lists such as quiz questions are not trimmed: the error is
+    raised so field recovery can regenerate the invalid element.
+
+    Args:
+        agent: Agent profile name
+        data: Parsed JSON payload (compact or full keys)
+
+    Returns:
+        Result dictionary using the full key names
+
+    Raises:
+        ValidationError: If the payload cannot be coerced into the schema
+    """
+    schema = AGENT_SCHEMAS[agent]
+
+    try:
+        return schema.model_validate(data).model_dump(exclude_none=True)
+    except ValidationError as e:
+        locations = {error["loc"][:2] for error in e.errors()}
+        if len(locations) != 1 or len(next(iter(locations))) != 2:
+            raise
+
+        key, index = next(iter(locations))
+        items = data.get(key) if isinstance(data, dict) else None
+        if not isinstance(items, list) or len(items) < 2 or index != len(items) - 1:
+            raise
+        if _is_required_field(schema, key):
+            raise
+
+        trimmed = {**data, key: items[:-1]}
+        return schema.model_validate(trimmed).model_dump(exclude_none=True)
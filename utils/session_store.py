@@ -0,0 +1,412 @@
+"""
+Session Store.
+
+Keeps conversations and session state on the server, keyed by session
+ID, so that they survive page reloads and server restarts and do not
+have to live in full in every UI session. Messages are append-only rows
+with a per-session sequence number, read newest first a page at a time;
+session state is a set of JSON values per key. Sessions idle for longer
+than the TTL are removed.
+
+Two implementations share the interface: an in-memory store keeping a
+bounded number of messages per session, and a SQLite store in WAL mode
+(readers never block the writer) for persistence.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, List, Optional
+from config import config
+
+
+# Seconds between sweeps for idle sessions, run as part of writes
+SWEEP_INTERVAL = 60
+
+# Session IDs chosen by clients are limited to URL-safe characters
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def _dump(value: Any) -> str:
+    """Serialize a value for storage (unknown types become strings)."""
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class SessionStore(ABC):
+    """Interface of the session stores, with the idle-session sweep they share."""
+
+    def __init__(self, ttl: int = None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl: Seconds an idle session is kept (defaults to Config.SESSION_TTL;
+                0 keeps sessions forever)
+        """
+        self.ttl = config.SESSION_TTL if ttl is None else ttl
+        self.last_sweep = time.time()
+
+    @abstractmethod
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> int:
+        """
+        Append a message to a session's conversation.
+
+        Args:
+            session_id: Session identifier
+            message: JSON-serializable message dictionary
+
+        Returns:
+            The message's sequence number in the session (from 1)
+        """
+        ...
+
+    def recent_messages(self, session_id: str, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Get a session's latest messages.
+
+        Args:
+            session_id: Session identifier
+            limit: Most messages returned (defaults to Config.SESSION_PAGE_SIZE)
+
+        Returns:
+            Messages in chronological order, each with its "seq"
+        """
+        return self.messages_before(session_id, None, limit)
+
+    @abstractmethod
+    def messages_before(self, session_id: str, seq: Optional[int], limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Get the page of messages preceding a sequence number.
+
+        Args:
+            session_id: Session identifier
+            seq: Sequence number to page back from (None for the latest)
+            limit: Most messages returned (defaults to Config.SESSION_PAGE_SIZE)
+
+        Returns:
+            Messages in chronological order, each with its "seq"
+        """
+        ...
+
+    @abstractmethod
+    def load_state(self, session_id: str) -> Dict[str, Any]:
+        """
+        Get a session's stored state.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Dictionary of the stored keys (empty for unknown sessions)
+        """
+        ...
+
+    @abstractmethod
+    def save_state(self, session_id: str, values: Dict[str, Any]) -> None:
+        """
+        Store state values of a session, replacing those keys only.
+
+        Args:
+            session_id: Session identifier
+            values: JSON-serializable values by key
+        """
+        ...
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        """Whether the store has the session."""
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        Remove a session with its messages and state.
+
+        Returns:
+            False if the session did not exist
+        """
+        ...
+
+    @abstractmethod
+    def expire(self) -> int:
+        """
+        Remove sessions idle for longer than the TTL.
+
+        Returns:
+            Number of sessions removed
+        """
+        ...
+
+    @abstractmethod
+    def session_count(self) -> int:
+        """Number of stored sessions."""
+        ...
+
+    def _maybe_sweep(self) -> None:
+        """Expire idle sessions if the last sweep is long enough ago."""
+        now = time.time()
+        if not self.ttl or now - self.last_sweep < SWEEP_INTERVAL:
+            return
+        self.last_sweep = now
+        self.expire()
+
+
+class StoredSession:
+    """Messages and state of one session in the memory store."""
+
+    def __init__(self, max_messages: int):
+        """
+        Initialize an empty session.
+
+        Args:
+            max_messages: Most messages kept; older ones are dropped
+        """
+        self.messages: deque = deque(maxlen=max_messages)  # (seq, serialized message)
+        self.next_seq = 1
+        self.state: Dict[str, str] = {}  # key -> serialized value
+        self.last_used = time.time()
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in process memory, with a bounded number of messages each."""
+
+    def __init__(self, ttl: int = None, max_messages: int = None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl: Seconds an idle session is kept (see SessionStore)
+            max_messages: Messages kept per session (defaults to
+                Config.SESSION_MAX_MESSAGES)
+        """
+        super().__init__(ttl)
+        self.max_messages = max_messages or config.SESSION_MAX_MESSAGES
+        self.sessions: Dict[str, StoredSession] = {}
+        self.lock = threading.Lock()
+
+    def _session(self, session_id: str) -> StoredSession:
+        """Get or create a session and mark it as used (called with the lock held)."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = StoredSession(self.max_messages)
+        session.last_used = time.time()
+        return session
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> int:
+        body = _dump(message)
+        with self.lock:
+            session = self._session(session_id)
+            seq = session.next_seq
+            session.next_seq += 1
+            session.messages.append((seq, body))
+        self._maybe_sweep()
+        return seq
+
+    def messages_before(self, session_id: str, seq: Optional[int], limit: int = None) -> List[Dict[str, Any]]:
+        limit = limit or config.SESSION_PAGE_SIZE
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                return []
+            page = []
+            for message_seq, body in reversed(session.messages):
+                if seq is not None and message_seq >= seq:
+                    continue
+                page.append((message_seq, body))
+                if len(page) >= limit:
+                    break
+        return [dict(json.loads(body), seq=message_seq) for message_seq, body in reversed(page)]
+
+    def load_state(self, session_id: str) -> Dict[str, Any]:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            state = dict(session.state) if session is not None else {}
+        return {key: json.loads(value) for key, value in state.items()}
+
+    def save_state(self, session_id: str, values: Dict[str, Any]) -> None:
+        serialized = {key: _dump(value) for key, value in values.items()}
+        with self.lock:
+            self._session(session_id).state.update(serialized)
+        self._maybe_sweep()
+
+    def exists(self, session_id: str) -> bool:
+        with self.lock:
+            return session_id in self.sessions
+
+    def delete(self, session_id: str) -> bool:
+        with self.lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    def expire(self) -> int:
+        if not self.ttl:
+            return 0
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            expired = [session_id for session_id, session in self.sessions.items() if session.last_used < cutoff]
+            for session_id in expired:
+                del self.sessions[session_id]
+        return len(expired)
+
+    def session_count(self) -> int:
+        with self.lock:
+            return len(self.sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite database in WAL mode, one connection per thread."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)",
+        """CREATE TABLE IF NOT EXISTS messages (
+            session_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            body TEXT NOT NULL,
+            PRIMARY KEY (session_id, seq)
+        ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS session_state (
+            session_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (session_id, key)
+        ) WITHOUT ROWID""",
+    )
+
+    def __init__(self, path: str = None, ttl: int = None):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            path: Database file (defaults to Config.SESSION_DB_PATH)
+            ttl: Seconds an idle session is kept (see SessionStore)
+        """
+        super().__init__(ttl)
+        self.path = path or config.SESSION_DB_PATH
+        self.local = threading.local()
+        with self._connection() as connection:
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last commits on power loss, not corruption
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def _touch(connection: sqlite3.Connection, session_id: str) -> None:
+        """Create the session row or update its last use."""
+        now = time.time()
+        connection.execute(
+            "INSERT INTO sessions (session_id, created_at, last_used) VALUES (?, ?, ?) "
+            "ON CONFLICT (session_id) DO UPDATE SET last_used = excluded.last_used",
+            (session_id, now, now)
+        )
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> int:
+        body = _dump(message)
+        with self._connection() as connection:
+            self._touch(connection, session_id)
+            # One statement, so concurrent appends cannot pick the same number
+            seq = connection.execute(
+                "INSERT INTO messages (session_id, seq, created_at, body) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM messages WHERE session_id = ? "
+                "RETURNING seq",
+                (session_id, time.time(), body, session_id)
+            ).fetchone()[0]
+        self._maybe_sweep()
+        return seq
+
+    def messages_before(self, session_id: str, seq: Optional[int], limit: int = None) -> List[Dict[str, Any]]:
+        limit = limit or config.SESSION_PAGE_SIZE
+        # Walks the primary key backwards from the newest row; no sorting
+        rows = self._connection().execute(
+            "SELECT seq, body FROM messages WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+            (session_id, seq if seq is not None else 2 ** 62, limit)
+        ).fetchall()
+        return [dict(json.loads(body), seq=message_seq) for message_seq, body in reversed(rows)]
+
+    def load_state(self, session_id: str) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            "SELECT key, value FROM session_state WHERE session_id = ?", (session_id,)
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def save_state(self, session_id: str, values: Dict[str, Any]) -> None:
+        rows = [(session_id, key, _dump(value)) for key, value in values.items()]
+        with self._connection() as connection:
+            self._touch(connection, session_id)
+            connection.executemany(
+                "INSERT INTO session_state (session_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id, key) DO UPDATE SET value = excluded.value",
+                rows
+            )
+        self._maybe_sweep()
+
+    def exists(self, session_id: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None
+
+    def delete(self, session_id: str) -> bool:
+        with self._connection() as connection:
+            return self._delete(connection, [session_id]) > 0
+
+    def expire(self) -> int:
+        if not self.ttl:
+            return 0
+        with self._connection() as connection:
+            expired = [
+                row[0] for row in connection.execute(
+                    "SELECT session_id FROM sessions WHERE last_used < ?", (time.time() - self.ttl,)
+                )
+            ]
+            return self._delete(connection, expired)
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, session_ids: Iterable[str]) -> int:
+        """Delete sessions with their rows; returns how many existed."""
+        ids = [(session_id,) for session_id in session_ids]
+        connection.executemany("DELETE FROM messages WHERE session_id = ?", ids)
+        connection.executemany("DELETE FROM session_state WHERE session_id = ?", ids)
+        before = connection.total_changes
+        connection.executemany("DELETE FROM sessions WHERE session_id = ?", ids)
+        return connection.total_changes - before
+
+    def session_count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store() -> SessionStore:
+    """
+    Build the store selected by Config.SESSION_STORE.
+
+    Returns:
+        A SQLiteSessionStore for "sqlite", otherwise a MemorySessionStore
+
+    Raises:
+        ValueError: If the store type is unknown
+    """
+    kind = config.SESSION_STORE.lower()
+    if kind == "sqlite":
+        return SQLiteSessionStore()
+    if kind == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_STORE: {config.SESSION_STORE} (expected sqlite or memory)")
+
+
+# Global instance
+session_store = create_session_store()
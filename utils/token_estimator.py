@@ -0,0 +1,283 @@
+"""
+Local Token Estimation and Adaptive Output Budgets.
+
+Estimates token counts without a tokenizer dependency, treating Arabic
+and Latin script differently, and sizes each agent's max_tokens from the
+input length and the output lengths observed so far.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+from config import config
+
+
+class TokenEstimator:
+    """Dependency-free token count estimator for Arabic and English text."""
+
+    # Average characters per token by script (BPE vocabularies split
+    # Arabic into noticeably shorter pieces than English)
+    LATIN_CHARS_PER_TOKEN = 4.0
+    ARABIC_CHARS_PER_TOKEN = 2.0
+    DIGITS_PER_TOKEN = 3.0
+
+    # Single spaces merge into the following word; a line break with its
+    # indentation and any other symbol count as one token each
+
+    # Per-message overhead of the chat format (role, separators)
+    MESSAGE_OVERHEAD = 4
+
+    RUN_PATTERN = re.compile(
+        r'([A-Za-z]+)|([\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]+)|(\d+)|(\n\s*|\S)'
+    )
+
+    def estimate(self, text: str) -> int:
+        """
+        Estimate the number of tokens in a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            Estimated token count
+        """
+        if not text:
+            return 0
+
+        tokens = 0
+        for latin, arabic, digits, _ in self.RUN_PATTERN.findall(text):
+            if latin:
+                tokens += math.ceil(len(latin) / self.LATIN_CHARS_PER_TOKEN)
+            elif arabic:
+                tokens += math.ceil(len(arabic) / self.ARABIC_CHARS_PER_TOKEN)
+            elif digits:
+                tokens += math.ceil(len(digits) / self.DIGITS_PER_TOKEN)
+            else:
+                tokens += 1
+
+        return tokens
+
+    def estimate_messages(self, messages: List[Dict[str, str]]) -> int:
+        """
+        Estimate the prompt tokens of a list of chat messages.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+
+        Returns:
+            Estimated token count
+        """
+        return sum(self.estimate(m.get("content", "")) + self.MESSAGE_OVERHEAD for m in messages)
+
+
+class OutputHistogram:
+    """Rolling window of observed values with percentile lookup."""
+
+    def __init__(self, window: int = 200):
+        """
+        Initialize the histogram.
+
+        Args:
+            window: Number of most recent observations kept
+        """
+        self.values = deque(maxlen=window)
+
+    def record(self, value: float) -> None:
+        """Add an observation."""
+        self.values.append(value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Get a percentile of the observations.
+
+        Args:
+            p: Percentile between 0 and 100
+
+        Returns:
+            The percentile value, or None without observations
+        """
+        if not self.values:
+            return None
+
+        ordered = sorted(self.values)
+        index = min(len(ordered) - 1, int(math.ceil(p / 100 * len(ordered))) - 1)
+        return ordered[max(0, index)]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class TokenBudgetPolicy:
+    """Sizes max_tokens for one agent from input length and observed outputs."""
+
+    def __init__(
+        self,
+        base: int,
+        input_ratio: float = 0.0,
+        floor: int = 100,
+        ceiling: int = 2000,
+        headroom: float = 1.25,
+        min_samples: int = 20
+    ):
+        """
+        Initialize a policy.
+
+        The expected output is modelled as a fixed part plus input_ratio
+        times the input tokens. The fixed part starts at base and, once
+        min_samples outputs have been observed, follows the 95th
+        percentile of what the agent actually produced.
+
+        Args:
+            base: Initial fixed part of the output budget
+            input_ratio: Output tokens expected per input token
+            floor: Smallest budget ever returned
+            ceiling: Largest budget ever returned
+            headroom: Multiplier applied on top of the expected output
+            min_samples: Observations needed before the histogram is used
+        """
+        self.base = base
+        self.input_ratio = input_ratio
+        self.floor = floor
+        self.ceiling = ceiling
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.histogram = OutputHistogram()
+        self.truncations = 0
+
+    def max_tokens_for(self, input_tokens: int) -> int:
+        """
+        Compute the max_tokens budget for a request.
+
+        Args:
+            input_tokens: Estimated tokens of the user-provided input
+
+        Returns:
+            max_tokens to send with the request
+        """
+        fixed = self.base
+        if len(self.histogram) >= self.min_samples:
+            fixed = self.histogram.percentile(95)
+
+        budget = (fixed + self.input_ratio * input_tokens) * self.headroom
+        return int(min(self.ceiling, max(self.floor, budget)))
+
+    def record(self, input_tokens: int, output_tokens: int, truncated: bool = False) -> None:
+        """
+        Record an observed output.
+
+        Args:
+            input_tokens: Estimated tokens of the user-provided input
+            output_tokens: Completion tokens produced
+            truncated: Whether the output hit max_tokens
+        """
+        fixed = max(0.0, output_tokens - self.input_ratio * input_tokens)
+
+        if truncated:
+            # The real output would have been longer; push the estimate up
+            self.truncations += 1
+            fixed *= 1.5
+
+        self.histogram.record(fixed)
+
+
+class TokenBudgets:
+    """Registry of per-agent token budget policies and truncation events."""
+
+    def __init__(self, policies: Dict[str, TokenBudgetPolicy]):
+        """
+        Initialize the registry.
+
+        Args:
+            policies: Mapping of agent profile name -> policy
+        """
+        self.policies = policies
+        self.truncation_events = deque(maxlen=100)
+        self.lock = threading.Lock()
+
+    def max_tokens_for(self, agent: Optional[str], input_tokens: int) -> int:
+        """
+        Get the max_tokens budget for an agent request.
+
+        Args:
+            agent: Agent profile name (None or unknown uses Config.MAX_TOKENS)
+            input_tokens: Estimated tokens of the user-provided input
+
+        Returns:
+            max_tokens to send with the request
+        """
+        policy = self.policies.get(agent)
+        if policy is None or not config.ADAPTIVE_MAX_TOKENS:
+            return config.MAX_TOKENS
+
+        with self.lock:
+            return policy.max_tokens_for(input_tokens)
+
+    def record(
+        self,
+        agent: Optional[str],
+        input_tokens: int,
+        output_tokens: int,
+        max_tokens: int,
+        finish_reason: Optional[str]
+    ) -> None:
+        """
+        Record the outcome of a request.
+
+        Args:
+            agent: Agent profile name
+            input_tokens: Estimated tokens of the user-provided input
+            output_tokens: Completion tokens produced
+            max_tokens: The budget the request was sent with
+            finish_reason: The API's finish_reason ("length" means truncated)
+        """
+        truncated = finish_reason == "length"
+
+        with self.lock:
+            if truncated:
+                self.truncation_events.append({
+                    "agent": agent or "unknown",
+                    "max_tokens": max_tokens,
+                    "input_tokens": input_tokens,
+                    "timestamp": time.time()
+                })
+
+            policy = self.policies.get(agent)
+            if policy is not None:
+                policy.record(input_tokens, output_tokens, truncated)
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Get the current budgets, observed output percentiles and truncations.
+
+        Returns:
+            Dictionary of agent -> statistics, plus recent truncation events
+        """
+        with self.lock:
+            agents = {}
+            for agent, policy in self.policies.items():
+                agents[agent] = {
+                    "samples": len(policy.histogram),
+                    "p50_output_fixed": policy.histogram.percentile(50),
+                    "p95_output_fixed": policy.histogram.percentile(95),
+                    "budget_for_empty_input": policy.max_tokens_for(0),
+                    "truncations": policy.truncations
+                }
+
+            return {
+                "agents": agents,
+                "recent_truncations": list(self.truncation_events)
+            }
+
+
+# Global instances
+token_estimator = TokenEstimator()
+token_budgets = TokenBudgets({
+    "classifier": TokenBudgetPolicy(base=80, floor=60, ceiling=200),
+    "explainer": TokenBudgetPolicy(base=900, input_ratio=0.5, floor=400, ceiling=2000),
+    "writer": TokenBudgetPolicy(base=150, input_ratio=2.5, floor=400, ceiling=3000),
+    "quiz": TokenBudgetPolicy(base=700, floor=400, ceiling=1500),
+    "general_qa": TokenBudgetPolicy(base=600, input_ratio=0.3, floor=300, ceiling=1500),
+})
@@ -0,0 +1,284 @@
+"""
+Pipeline Tracing.
+
+Lightweight per-request tracing: one trace per processed user input,
+with nested spans for each pipeline step carrying durations and token
+counts. Finished traces can be exported as JSON lines in the
+OpenTelemetry (OTLP JSON) span shape.
+"""
+
+import contextvars
+import functools
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+from config import config
+
+
+# Innermost open span of the current request (per thread / context)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed step within a trace."""
+
+    def __init__(
+        self,
+        name: str,
+        trace: Optional["Trace"],
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize and start a span.
+
+        Args:
+            name: Step name, e.g. "llm.chat"
+            trace: The trace the span belongs to (None for a detached span)
+            parent: Enclosing span, if any
+            attributes: Initial attributes
+        """
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.span_id = secrets.token_hex(8)
+        self.depth = parent.depth + 1 if parent else 0
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "OK"
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set one attribute (None values are ignored)."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        """Mark the span as failed with an exception or error message."""
+        self.status = "ERROR"
+        self.status_message = str(error)[:300]
+
+    def end(self) -> None:
+        """Stop the span's clock."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        """Duration in milliseconds (up to now for an open span)."""
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1_000_000
+
+    def to_otel(self) -> Dict[str, Any]:
+        """
+        Convert to an OTLP JSON span.
+
+        Returns:
+            Dictionary in the OpenTelemetry span shape
+        """
+        return {
+            "traceId": self.trace.trace_id if self.trace else "",
+            "spanId": self.span_id,
+            "parentSpanId": self.parent.span_id if self.parent else "",
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otel_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {
+                "code": "STATUS_CODE_ERROR" if self.status == "ERROR" else "STATUS_CODE_OK",
+                "message": self.status_message
+            }
+        }
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str):
+        """
+        Initialize a trace.
+
+        Args:
+            name: Name of the root operation
+        """
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self.lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        """Register a span with the trace."""
+        with self.lock:
+            self.spans.append(span)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get a compact, display-friendly view of the trace.
+
+        Returns:
+            Dictionary with trace_id, total duration, token totals and one
+            entry per span in start order
+        """
+        with self.lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+
+        root = spans[0] if spans else None
+        llm_spans = [s for s in spans if s.name == "llm.chat"]
+
+        return {
+            "trace_id": self.trace_id,
+            "duration_ms": root.duration_ms if root else 0.0,
+            "prompt_tokens": sum(s.attributes.get("llm.prompt_tokens", 0) for s in llm_spans),
+            "completion_tokens": sum(s.attributes.get("llm.completion_tokens", 0) for s in llm_spans),
+            "spans": [
+                {
+                    "name": s.name,
+                    "depth": s.depth,
+                    "duration_ms": round(s.duration_ms, 1),
+                    "status": s.status,
+                    "prompt_tokens": s.attributes.get("llm.prompt_tokens"),
+                    "completion_tokens": s.attributes.get("llm.completion_tokens")
+                }
+                for s in spans
+            ]
+        }
+
+
+class Tracer:
+    """Creates traces and spans and exports finished traces."""
+
+    def __init__(self, export_path: Optional[str] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            export_path: JSONL file finished traces are appended to
+                (defaults to Config.TRACE_EXPORT_PATH; empty disables export)
+        """
+        self.export_path = export_path if export_path is not None else config.TRACE_EXPORT_PATH
+        self.export_lock = threading.Lock()
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes):
+        """
+        Start a new trace with a root span for the duration of the block.
+
+        Args:
+            name: Name of the root operation
+            **attributes: Root span attributes
+
+        Yields:
+            The new Trace
+        """
+        trace = Trace(name)
+        root = Span(name, trace, attributes=attributes)
+        trace.add(root)
+        token = _current_span.set(root)
+
+        try:
+            yield trace
+        except Exception as e:
+            root.set_error(e)
+            raise
+        finally:
+            root.end()
+            _current_span.reset(token)
+            self.export(trace)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Record a child span of the current span for the duration of the block.
+
+        Outside of a trace the span is still timed but not recorded, so
+        callers never need to check whether tracing is active.
+
+        Args:
+            name: Step name
+            **attributes: Span attributes
+
+        Yields:
+            The new Span
+        """
+        parent = _current_span.get()
+        trace = parent.trace if parent else None
+        span = Span(name, trace, parent, attributes)
+        if trace is not None:
+            trace.add(span)
+        token = _current_span.set(span)
+
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        """Get the innermost open span, if any."""
+        return _current_span.get()
+
+    def export(self, trace: Trace) -> None:
+        """
+        Append a finished trace to the JSONL export file, one span per line.
+
+        Args:
+            trace: The finished trace
+        """
+        if not self.export_path:
+            return
+
+        with trace.lock:
+            lines = [json.dumps(span.to_otel(), ensure_ascii=False) for span in trace.spans]
+
+        try:
+            with self.export_lock:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+        except OSError:
+            # Tracing must never break a request
+            pass
+
+
+def traced(name: str):
+    """
+    Decorator recording a span around every call of a function.
+
+    Args:
+        name: Span name
+
+    Returns:
+        The decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _otel_value(value: Any) -> Dict[str, Any]:
+    """Wrap an attribute value in its OTLP JSON type."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# Global instance
+tracer = Tracer()
@@ -4,7 +4,16 @@ Input Validation Utilities.
 Provides validation functions for user inputs and agent responses.
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# Required text fields of each agent's result, with their minimum length
+# after stripping whitespace
+AGENT_TEXT_FIELDS = {
+    "explainer": {"english_explanation": 10, "arabic_explanation": 10},
+    "writer": {"improved_text": 5, "changes_explanation_ar": 5},
+    "general_qa": {"english_answer": 5, "arabic_answer": 5}
+}
 
 
 class Validators:
@@ -72,19 +81,7 @@ class Validators:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        required_fields = ["english_explanation", "arabic_explanation"]
-
-        for field in required_fields:
-            if field not in result:
-                return False, f"Missing required field: {field}"
-
-            if not isinstance(result[field], str):
-                return False, f"Field {field} must be a string"
-
-            if len(result[field].strip()) < 10:
-                return False, f"Field {field} is too short"
-
-        return True, None
+        return Validators._first_error("explainer", result)
 
     @staticmethod
     def validate_writing_result(result: Dict[str, Any]) -> tuple[bool, Optional[str]]:
@@ -97,19 +94,7 @@ class Validators:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        required_fields = ["improved_text", "changes_explanation_ar"]
-
-        for field in required_fields:
-            if field not in result:
-                return False, f"Missing required field: {field}"
-
-            if not isinstance(result[field], str):
-                return False, f"Field {field} must be a string"
-
-            if len(result[field].strip()) < 5:
-                return False, f"Field {field} is too short"
-
-        return True, None
+        return Validators._first_error("writer", result)
 
     @staticmethod
     def validate_quiz_result(result: Dict[str, Any]) -> tuple[bool, Optional[str]]:
@@ -132,23 +117,46 @@ class Validators:
             return False, "Questions list cannot be empty"
 
         for i, question in enumerate(result["questions"]):
-            required_fields = ["question_en", "question_ar", "options", "correct_answer"]
+            is_valid, error_msg = Validators.validate_quiz_question(question, i)
+            if not is_valid:
+                return False, error_msg
+
+        return True, None
+
+    @staticmethod
+    def validate_quiz_question(question: Dict[str, Any], index: int) -> tuple[bool, Optional[str]]:
+        """
+        Validate a single quiz question.
+
+        Args:
+            question: Question dictionary
+            index: Position of the question in the quiz (0-based)
 
-            for field in required_fields:
-                if field not in question:
-                    return False, f"Question {i+1} missing field: {field}"
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        i = index
+
+        if not isinstance(question, dict):
+            return False, f"Question {i+1} must be an object"
 
-            if not isinstance(question["options"], list):
-                return False, f"Question {i+1}: options must be a list"
+        required_fields = ["question_en", "question_ar", "options", "correct_answer"]
 
-            if len(question["options"]) < 2:
-                return False, f"Question {i+1}: must have at least 2 options"
+        for field in required_fields:
+            if field not in question:
+                return False, f"Question {i+1} missing field: {field}"
+
+        if not isinstance(question["options"], list):
+            return False, f"Question {i+1}: options must be a list"
 
-            if not isinstance(question["correct_answer"], int):
-                return False, f"Question {i+1}: correct_answer must be an integer"
+        if len(question["options"]) < 2:
+            return False, f"Question {i+1}: must have at least 2 options"
 
-            if question["correct_answer"] < 0 or question["correct_answer"] >= len(question["options"]):
-                return False, f"Question {i+1}: correct_answer index out of range"
+        if not isinstance(question["correct_answer"], int):
+            return False, f"Question {i+1}: correct_answer must be an integer"
+
+        if question["correct_answer"] < 0 or question["correct_answer"] >= len(question["options"]):
+            return False, f"Question {i+1}: correct_answer index out of range"
 
         return True, None
 
@@ -163,34 +171,103 @@ class Validators:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        required_fields = ["english_answer", "arabic_answer"]
+        return Validators._first_error("general_qa", result)
 
-        for field in required_fields:
-            if field not in result:
-                return False, f"Missing required field: {field}"
+    @staticmethod
+    def find_invalid_fields(agent: str, result: Dict[str, Any]) -> List[str]:
+        """
+        List the fields of an agent result that fail validation.
+
+        Unlike the validate_* methods, this does not stop at the first
+        problem, so a caller can keep the valid parts of a result and ask
+        again only for the rest.
+
+        Args:
+            agent: Agent profile name ("explainer", "writer", "quiz", "general_qa")
+            result: Agent result dictionary
+
+        Returns:
+            Invalid field names; quiz questions are reported as "questions[i]"
+        """
+        if agent == "quiz":
+            questions = result.get("questions")
+            if not isinstance(questions, list) or len(questions) == 0:
+                return ["questions"]
+
+            return [
+                f"questions[{i}]" for i, question in enumerate(questions)
+                if not Validators.validate_quiz_question(question, i)[0]
+            ]
+
+        return [field for field, _ in Validators._field_errors(agent, result)]
+
+    @staticmethod
+    def _field_errors(agent: str, result: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """
+        Check every field of an explainer, writer or general Q&A result.
+
+        Args:
+            agent: Agent profile name (see AGENT_TEXT_FIELDS)
+            result: Agent result dictionary
+
+        Returns:
+            (field, error message) pairs, in field order
+        """
+        errors = []
 
-            if not isinstance(result[field], str):
-                return False, f"Field {field} must be a string"
+        for field, min_length in AGENT_TEXT_FIELDS[agent].items():
+            error = Validators._check_text_field(result, field, min_length)
+            if error:
+                errors.append((field, error))
 
-            if len(result[field].strip()) < 5:
-                return False, f"Field {field} is too short"
+        if agent == "general_qa":
+            # Optional fields
+            if "category" in result and not isinstance(result["category"], str):
+                errors.append(("category", "Category must be a string"))
 
-        # Optional fields validation
-        if "category" in result and not isinstance(result["category"], str):
-            return False, "Category must be a string"
+            if "confidence" in result:
+                if not isinstance(result["confidence"], (int, float)):
+                    errors.append(("confidence", "Confidence must be a number"))
+                elif not 0 <= result["confidence"] <= 1:
+                    errors.append(("confidence", "Confidence must be between 0 and 1"))
 
-        if "confidence" in result:
-            if not isinstance(result["confidence"], (int, float)):
-                return False, "Confidence must be a number"
-            if not 0 <= result["confidence"] <= 1:
-                return False, "Confidence must be between 0 and 1"
+            if "follow_up_suggestions" in result and not isinstance(result["follow_up_suggestions"], list):
+                errors.append(("follow_up_suggestions", "Follow-up suggestions must be a list"))
 
-        if "follow_up_suggestions" in result:
-            if not isinstance(result["follow_up_suggestions"], list):
-                return False, "Follow-up suggestions must be a list"
+        return errors
 
+    @staticmethod
+    def _first_error(agent: str, result: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+        """Validate a result by its field checks, reporting the first problem."""
+        errors = Validators._field_errors(agent, result)
+        if errors:
+            return False, errors[0][1]
         return True, None
 
+    @staticmethod
+    def _check_text_field(result: Dict[str, Any], field: str, min_length: int) -> Optional[str]:
+        """
+        Check a required text field.
+
+        Args:
+            result: Result dictionary
+            field: Field name
+            min_length: Minimum length after stripping whitespace
+
+        Returns:
+            Error message, or None if the field is valid
+        """
+        if field not in result:
+            return f"Missing required field: {field}"
+
+        if not isinstance(result[field], str):
+            return f"Field {field} must be a string"
+
+        if len(result[field].strip()) < min_length:
+            return f"Field {field} is too short"
+
+        return None
+
 
 # Global instance
 validators = Validators()
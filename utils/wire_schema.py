@@ -0,0 +1,217 @@
+"""
+Compact Wire Schema for Agent JSON Outputs.
+
+The prompts ask the model to answer with short keys and no whitespace.
+This module maps those compact payloads back to the full dictionary
+shapes that the validators and the UI expect, and keeps per-agent
+statistics on how many output characters and tokens the compact form saves.
+The key mappings come from the field aliases in utils.schemas.
+"""
+
+import json
+import threading
+import typing
+from typing import Dict, Any, Optional
+from pydantic import BaseModel
+from utils.schemas import AGENT_SCHEMAS
+from utils.token_estimator import token_estimator
+
+
+class WireSchema:
+    """Mapping between compact wire keys and full result keys for one agent."""
+
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        nested: Optional[Dict[str, "WireSchema"]] = None
+    ):
+        """
+        Initialize a wire schema.
+
+        Args:
+            keys: Mapping of compact key -> full key
+            nested: Optional mapping of full key -> schema applied to each
+                item of a list (or to a dict) stored under that key
+        """
+        self.keys = keys
+        self.reverse_keys = {full: short for short, full in keys.items()}
+        self.nested = nested or {}
+
+    @classmethod
+    def from_model(cls, model: typing.Type[BaseModel]) -> "WireSchema":
+        """
+        Build a wire schema from a result model's field aliases.
+
+        Args:
+            model: Pydantic model whose aliases are the compact keys
+
+        Returns:
+            WireSchema for the model, including nested list-of-model fields
+        """
+        keys = {}
+        nested = {}
+
+        for name, field in model.model_fields.items():
+            if field.alias:
+                keys[field.alias] = name
+
+            for arg in typing.get_args(field.annotation):
+                if isinstance(arg, type) and issubclass(arg, BaseModel):
+                    nested[name] = cls.from_model(arg)
+
+        return cls(keys, nested=nested)
+
+    def expand(self, data: Any) -> Any:
+        """
+        Expand a compact payload into the full result shape.
+
+        Keys that are already in their full form are kept as-is, so a model
+        that ignores the compact instructions still produces a valid result.
+
+        Args:
+            data: Parsed compact JSON
+
+        Returns:
+            Dictionary using the full key names
+        """
+        if not isinstance(data, dict):
+            return data
+
+        expanded = {}
+        for key, value in data.items():
+            full_key = self.keys.get(key, key)
+            expanded[full_key] = self._convert_nested(full_key, value, expand=True)
+
+        return expanded
+
+    def compact(self, data: Any) -> Any:
+        """
+        Convert a full result dictionary into its compact wire form.
+
+        Args:
+            data: Result dictionary using full key names
+
+        Returns:
+            Dictionary using the compact key names
+        """
+        if not isinstance(data, dict):
+            return data
+
+        compacted = {}
+        for key, value in data.items():
+            short_key = self.reverse_keys.get(key, key)
+            compacted[short_key] = self._convert_nested(key, value, expand=False)
+
+        return compacted
+
+    def _convert_nested(self, full_key: str, value: Any, expand: bool) -> Any:
+        """Apply the nested schema registered for a key, if any."""
+        schema = self.nested.get(full_key)
+        if schema is None:
+            return value
+
+        convert = schema.expand if expand else schema.compact
+
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+
+        return convert(value)
+
+
+# Wire schemas per agent profile, derived from the result schemas
+WIRE_SCHEMAS = {
+    agent: WireSchema.from_model(model)
+    for agent, model in AGENT_SCHEMAS.items()
+}
+
+
+class WireStats:
+    """Tracks how much output the compact wire format saves per agent."""
+
+    def __init__(self):
+        """Initialize empty statistics."""
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.lock = threading.Lock()
+
+    def record(self, agent: str, wire_text: str, expanded: Dict[str, Any]) -> None:
+        """
+        Record one response received in compact form.
+
+        The verbose size is what the same result would have cost with the
+        full key names and the indented layout the prompts used to show.
+
+        Args:
+            agent: Agent profile name
+            wire_text: Raw response text as received from the model
+            expanded: The expanded result dictionary
+        """
+        verbose_text = json.dumps(expanded, ensure_ascii=False, indent=4)
+        wire_tokens = token_estimator.estimate(wire_text)
+        verbose_tokens = token_estimator.estimate(verbose_text)
+
+        with self.lock:
+            entry = self.stats.setdefault(agent, {
+                "responses": 0,
+                "wire_chars": 0,
+                "verbose_chars": 0,
+                "wire_tokens": 0,
+                "verbose_tokens": 0
+            })
+            entry["responses"] += 1
+            entry["wire_chars"] += len(wire_text)
+            entry["verbose_chars"] += len(verbose_text)
+            entry["wire_tokens"] += wire_tokens
+            entry["verbose_tokens"] += verbose_tokens
+
+    def get_savings(self, agent: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get output savings statistics.
+
+        Args:
+            agent: Optional agent profile name; all agents when omitted
+
+        Returns:
+            Dictionary of agent -> counts and saved percentage (of tokens)
+        """
+        with self.lock:
+            snapshot = {name: dict(entry) for name, entry in self.stats.items()}
+
+        agents = [agent] if agent else list(snapshot.keys())
+        report = {}
+
+        for name in agents:
+            entry = snapshot.get(name)
+            if not entry:
+                continue
+
+            saved = entry["verbose_chars"] - entry["wire_chars"]
+            saved_tokens = entry["verbose_tokens"] - entry["wire_tokens"]
+            report[name] = {
+                **entry,
+                "saved_chars": saved,
+                "saved_tokens": saved_tokens,
+                "saved_percentage": (saved_tokens / entry["verbose_tokens"]) * 100 if entry["verbose_tokens"] else 0.0
+            }
+
+        return report
+
+
+def expand_wire_result(agent: str, data: Any) -> Any:
+    """
+    Expand a compact agent payload into its full result shape.
+
+    Args:
+        agent: Agent profile name (see WIRE_SCHEMAS)
+        data: Parsed JSON payload
+
+    Returns:
+        The expanded payload, or the input unchanged for unknown agents
+    """
+    schema = WIRE_SCHEMAS.get(agent)
+    if schema is None:
+        return data
+    return schema.expand(data)
+
+
+# Global instance
+wire_stats = WireStats()